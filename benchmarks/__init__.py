@@ -0,0 +1,4 @@
+"""Headless microbenchmarks for TriggerFlow's hot paths.
+
+Run with `python -m benchmarks` from the repository root; see run.py.
+"""
@@ -0,0 +1,102 @@
+"""ButtonConfigLoader parse and compile_config cost for generated configs."""
+
+import os
+import tempfile
+from typing import Any, Dict, List
+
+import yaml
+
+from benchmarks.harness import measure
+from triggerflowlib.utils.buttoncfgloader import ButtonConfigLoader, compile_config
+
+FULL_SIZES = (10, 100, 1000, 5000)
+QUICK_SIZES = (10, 100)
+
+
+def make_config(entries: int) -> Dict[str, Any]:
+    """Roughly 70% buttons and 30% triggers, over the common action types.
+
+    Only plugins with no third-party dependencies are used, so binding
+    works headless.
+    """
+    config: Dict[str, Any] = {}
+    for i in range(entries):
+        kind = i % 10
+        if kind >= 7:
+            config[f"t{i}"] = {
+                "type": "process_running",
+                "process": f"game{i}.exe",
+                "on_enter": [
+                    {
+                        "type": "voicemeeter_set_parameter",
+                        "parameter": "Strip[0].Mute",
+                        "value": 1,
+                    },
+                    {"type": "voicemod_mute"},
+                ],
+                "on_exit": [{"type": "voicemod_unmute"}],
+            }
+            continue
+        if kind == 0:
+            action = {"type": "voicemeeter_toggle", "parameter": f"Strip[{i % 5}].Mute"}
+        elif kind == 1:
+            action = {
+                "type": "voicemeeter_route_input",
+                "strip_index": i % 5,
+                "target_bus": "A2",
+            }
+        elif kind == 2:
+            action = {"type": "voicemeeter_toggle_a_pair", "strips": [0, 3]}
+        elif kind == 3:
+            action = {"type": "voicemod_select_voice", "voice_id": f"voice{i}"}
+        elif kind == 4:
+            action = {"type": "voicemod_play_sound", "sound_file": f"s{i}.wav"}
+        else:
+            action = {
+                "type": "sequence",
+                "steps": [
+                    {"type": "voicemod_mute"},
+                    {"type": "delay", "ms": 250},
+                    {
+                        "type": "voicemeeter_set_parameter",
+                        "parameter": "Bus[0].Gain",
+                        "value": -6,
+                    },
+                ],
+            }
+        config[f"b{i}"] = {"text": f"Button {i}", "action": action}
+    return config
+
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    sizes = QUICK_SIZES if quick else FULL_SIZES
+    min_time = 0.05 if quick else 0.2
+    results = []
+    for size in sizes:
+        params = {"entries": size}
+        fd, path = tempfile.mkstemp(suffix=".yaml", prefix="triggerflow-bench-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                yaml.safe_dump(make_config(size), f, sort_keys=False)
+            parsed = ButtonConfigLoader(path)
+            results.append(
+                measure(
+                    lambda: ButtonConfigLoader(path), "config.parse", params, min_time
+                )
+            )
+            results.append(
+                measure(
+                    lambda: compile_config(parsed), "config.compile", params, min_time
+                )
+            )
+            results.append(
+                measure(
+                    lambda: compile_config(ButtonConfigLoader(path)),
+                    "config.load_total",
+                    params,
+                    min_time,
+                )
+            )
+        finally:
+            os.remove(path)
+    return results
@@ -0,0 +1,39 @@
+"""run_action dispatch overhead with no-op handlers."""
+
+from typing import Any, Dict, List
+
+from benchmarks import fakes
+from benchmarks.harness import measure
+from triggerflowlib.utils import actions
+from triggerflowlib.utils.executor import ActionExecutor
+
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    min_time = 0.05 if quick else 0.2
+    fakes.install_noop_actions()
+    executor = ActionExecutor(workers=2)
+    try:
+        noop = {"type": fakes.NOOP_ACTION}
+        legacy = {"type": fakes.NOOP_LEGACY_ACTION}
+        plan = actions.compile_action(noop)
+        seq = actions.compile_action({"type": "sequence", "steps": [noop] * 3})
+        results = [
+            measure(lambda: actions.run_action(plan), "dispatch.bound", {}, min_time),
+            measure(lambda: actions.run_action(noop), "dispatch.dict", {}, min_time),
+            measure(
+                lambda: actions.run_action(legacy), "dispatch.legacy", {}, min_time
+            ),
+            measure(
+                lambda: executor.run(plan), "dispatch.executor_roundtrip", {}, min_time
+            ),
+            measure(
+                lambda: executor.run(seq),
+                "dispatch.executor_sequence",
+                {"steps": 3},
+                min_time,
+            ),
+        ]
+    finally:
+        executor.shutdown()
+        fakes.remove_noop_actions()
+    return results
@@ -0,0 +1,71 @@
+"""Key combo compile and send cost against a fake user32, and macro timing."""
+
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakeUser32
+from benchmarks.harness import measure
+from triggerflowlib.utils import keyboard_utils, keyplans, macros
+
+COMBOS = (("f13",), ("ctrl", "shift", "m"), ("ctrl", "alt", "shift", "f10"))
+
+
+def check_prepared(user32: FakeUser32):
+    """A combo bound from config must reach its first press already built."""
+    sendinput = keyplans.SendInputBackend(user32)
+    saved = keyboard_utils._injector
+    keyboard_utils._injector = keyplans.KeyInjector([("sendinput", lambda: sendinput)])
+    try:
+        plan = keyboard_utils.compile_keybind(["ctrl", "alt", "f9"])
+        if not sendinput.is_prepared(plan):
+            raise RuntimeError("compile_keybind did not prepare the SendInput plan")
+    finally:
+        keyboard_utils._injector = saved
+
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    min_time = 0.05 if quick else 0.2
+    user32 = FakeUser32()
+    check_prepared(user32)
+    sendinput = keyplans.SendInputBackend(user32)
+    results = []
+    for combo in COMBOS:
+        params = {"keys": "+".join(combo)}
+        plan = keyplans.compile_keys(combo)
+
+        def _uncached():
+            keyplans._plans.clear()
+            keyplans.compile_keys(combo)
+
+        results.append(measure(_uncached, "keys.compile", params, min_time))
+        results.append(
+            measure(
+                lambda: keyplans.compile_keys(combo),
+                "keys.compile_cached",
+                params,
+                min_time,
+            )
+        )
+        sendinput.send(plan)
+        results.append(
+            measure(lambda: sendinput.send(plan), "keys.sendinput", params, min_time)
+        )
+
+    # 50 steps with 2 ms waits; ns/op should stay close to the nominal 50 ms
+    steps: List[Dict[str, Any]] = []
+    for _ in range(25):
+        steps += [{"tap": "a"}, {"wait": 2}]
+    macro = macros.compile_macro(steps, repress="queue", name="bench")
+    runner = macros.MacroRunner(send=keyplans.RecordingBackend().send)
+    try:
+        results.append(
+            measure(
+                lambda: runner.play(macro).wait(5.0),
+                "keys.macro",
+                {"steps": len(steps), "nominal_ms": round(macro.duration * 1000.0, 3)},
+                min_time,
+                repeat=3,
+            )
+        )
+    finally:
+        runner.stop()
+    return results
@@ -0,0 +1,83 @@
+"""ConditionWatcher tick cost against a synthetic process table."""
+
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakeProcessTable
+from benchmarks.harness import measure
+from triggerflowlib.utils.process_watch import ConditionWatcher, ProcessTracker
+
+FULL_TABLE_SIZES = (100, 1000, 5000)
+FULL_TRIGGER_COUNTS = (1, 20, 200)
+QUICK_TABLE_SIZES = (100, 1000)
+QUICK_TRIGGER_COUNTS = (1, 20)
+
+
+def make_triggers(count: int) -> List[Dict[str, Any]]:
+    """A mix of exact, glob and regex process triggers."""
+    triggers = []
+    for i in range(count):
+        item: Dict[str, Any] = {"key": f"t{i}", "type": "process_running"}
+        kind = i % 3
+        if kind == 0:
+            item["process"] = f"app{i}.exe"
+        elif kind == 1:
+            item["pattern"] = f"tool{i}*.exe"
+        else:
+            item["regex"] = rf"^daemon{i}\b"
+        triggers.append(item)
+    # one trigger that always matches something in the table
+    if triggers:
+        triggers[0] = {"key": "t0", "type": "process_running", "process": "chrome.exe"}
+    return triggers
+
+
+def _watcher(table: FakeProcessTable, triggers) -> ConditionWatcher:
+    tracker = ProcessTracker(list_pids=table.pids, resolve=table.resolve)
+    watcher = ConditionWatcher(triggers, backend="polling", tracker=tracker)
+    watcher.run_once()  # prime the cache and the heap
+    return watcher
+
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    sizes = QUICK_TABLE_SIZES if quick else FULL_TABLE_SIZES
+    counts = QUICK_TRIGGER_COUNTS if quick else FULL_TRIGGER_COUNTS
+    min_time = 0.05 if quick else 0.2
+    results = []
+    for size in sizes:
+        for count in counts:
+            params = {"processes": size, "triggers": count}
+            table = FakeProcessTable(size)
+            watcher = _watcher(table, make_triggers(count))
+            try:
+                # nothing changed and nothing due: pid diff + heap peek
+                results.append(
+                    measure(watcher.run_once, "watcher.tick_steady", params, min_time)
+                )
+
+                # 1% of the table replaced between ticks
+                churn = max(1, size // 100)
+
+                def _churn_tick():
+                    table.churn(churn)
+                    watcher.run_once()
+
+                results.append(
+                    measure(
+                        _churn_tick,
+                        "watcher.tick_churn",
+                        dict(params, churn=churn),
+                        min_time,
+                    )
+                )
+
+                # every condition re-evaluated each tick
+                def _all_due_tick():
+                    watcher.poke()
+                    watcher.run_once()
+
+                results.append(
+                    measure(_all_due_tick, "watcher.tick_all_due", params, min_time)
+                )
+            finally:
+                watcher.stop()
+    return results
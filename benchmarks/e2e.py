@@ -0,0 +1,351 @@
+"""End-to-end press-to-effect latency against local backend stand-ins.
+
+    python -m benchmarks.e2e                          # all backends, JSON to stdout
+    python -m benchmarks.e2e --backends voicemod --rates 20,100 -o e2e.json
+
+A press goes through the same path as a button click: a plan compiled at
+startup, submitted to the shared ActionExecutor, run on its backend's
+queue by the real plugin. Latency is measured from the submit to the
+moment the stand-in receives the command ("effect") and to the completion
+callback ("done").
+
+Scenarios:
+  press_rate  presses at a sustained rate per backend for --duration s
+  triggers    N process triggers firing together when one fake process
+              starts, run through ConditionWatcher (on_enter actions
+              alternate between the available backends)
+
+The backends are VoicemodStandin (on VOICEMOD_HOST/VOICEMOD_PORT),
+SpotifyStandin (via SPOTIFY_API_URL with a cached OAuth token) and
+FakeVoicemeeterDLL. Spotify is skipped when spotipy is not installed. The
+output also includes the stats histograms, which break down per-plugin
+call time (see triggerflowlib/utils/stats.py).
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.fakes import FakeProcessTable
+from benchmarks.standins import (
+    FakeVoicemeeterDLL,
+    Recorder,
+    SpotifyStandin,
+    VoicemodStandin,
+)
+
+BACKENDS = ("voicemod", "voicemeeter", "spotify")
+SCOPE = "user-read-playback-state user-modify-playback-state"
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    """count/mean/p50/p95/p99/max in milliseconds (nearest-rank percentiles)."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pct(q: float) -> float:
+        return ordered[max(0, math.ceil(q * n) - 1)] * 1000.0
+
+    return {
+        "count": n,
+        "mean_ms": sum(ordered) / n * 1000.0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": ordered[-1] * 1000.0,
+    }
+
+
+class Environment:
+    """Starts the stand-ins and points the plugins at them."""
+
+    def __init__(self, backends: List[str]):
+        self.recorder = Recorder()
+        self.backends: List[str] = []
+        self.skipped: Dict[str, str] = {}
+        self._closers: List[Callable[[], None]] = []
+        self._cwd = os.getcwd()
+        # never route local stand-in traffic through a proxy
+        os.environ["NO_PROXY"] = os.environ["no_proxy"] = "127.0.0.1,localhost"
+        for name in backends:
+            try:
+                getattr(self, f"_setup_{name}")()
+                self.backends.append(name)
+            except Exception as e:
+                self.skipped[name] = str(e)
+                print(f"[e2e] skipping {name}: {e}", file=sys.stderr)
+
+    def _setup_voicemod(self):
+        if "triggerflowlib.plugins.voicemod" in sys.modules:
+            raise RuntimeError("voicemod plugin imported before the stand-in started")
+        standin = VoicemodStandin(self.recorder).start()
+        self._closers.append(standin.close)
+        os.environ["VOICEMOD_HOST"] = standin.host
+        os.environ["VOICEMOD_PORT"] = str(standin.port)
+
+    def _setup_voicemeeter(self):
+        from triggerflowlib.plugins.registry import get_plugin
+
+        voicemeeter = get_plugin("voicemeeter")
+        voicemeeter._dll = FakeVoicemeeterDLL(self.recorder)
+        voicemeeter._logged_in = False
+
+    def _setup_spotify(self):
+        import spotipy  # noqa: F401 - skip cleanly when missing
+
+        if "triggerflowlib.plugins.spotify" in sys.modules:
+            raise RuntimeError("spotify plugin imported before the stand-in started")
+        standin = SpotifyStandin(self.recorder).start()
+        self._closers.append(standin.close)
+        os.environ["SPOTIFY_API_URL"] = standin.api_url
+        os.environ["SPOTIPY_CLIENT_ID"] = "triggerflow-bench"
+        os.environ["SPOTIPY_CLIENT_SECRET"] = "triggerflow-bench"
+        os.environ["SPOTIPY_REDIRECT_URI"] = "http://127.0.0.1:8888/callback"
+        os.environ.pop("SPOTIPY_CLIENT_USERNAME", None)
+        # SpotifyOAuth reads its token from ./.cache; give it a valid one
+        workdir = tempfile.mkdtemp(prefix="triggerflow-e2e-")
+        token = {
+            "access_token": "bench",
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "expires_at": int(time.time()) + 3600,
+            "refresh_token": "bench",
+            "scope": SCOPE,
+        }
+        with open(os.path.join(workdir, ".cache"), "w") as f:
+            json.dump(token, f)
+        os.chdir(workdir)
+
+    def action(self, backend: str, tag: str) -> Tuple[Dict[str, Any], Any]:
+        """Return (action dict, recorder key) for one uniquely tagged command."""
+        if backend == "voicemod":
+            return {"type": "voicemod_select_voice", "voice_id": tag}, tag
+        if backend == "spotify":
+            uri = f"spotify:playlist:{tag}"
+            return {"type": "spotify_play_playlist", "playlist_uri": uri}, uri
+        if backend == "voicemeeter":
+            # unique float per tag; exact in c_float for ints below 2**24
+            value = float(abs(hash(tag)) % (1 << 23))
+            param = "Strip[0].Gain"
+            action = {
+                "type": "voicemeeter_set_parameter",
+                "parameter": param,
+                "value": value,
+            }
+            return action, (param, value)
+        raise ValueError(f"unknown backend: {backend}")
+
+    def close(self):
+        os.chdir(self._cwd)
+        for close in self._closers:
+            close()
+
+
+def run_press_rate(
+    env: Environment, backend: str, rate: float, duration: float
+) -> Dict[str, Any]:
+    """Press at `rate` per second for `duration` seconds and time every press."""
+    from triggerflowlib.utils import actions
+    from triggerflowlib.utils.executor import get_action_executor
+
+    executor = get_action_executor()
+    count = max(1, int(rate * duration))
+    run_id = f"{backend}-{rate:g}-{time.monotonic_ns()}"
+    presses = []
+    for i in range(count):
+        action, key = env.action(backend, f"{run_id}-{i}")
+        presses.append((actions.compile_action(action), key))
+
+    pressed: Dict[Any, float] = {}
+    done: Dict[Any, float] = {}
+    errors = [0]
+    lock = Lock()
+
+    def _callback(key):
+        def _done(_result, error):
+            with lock:
+                done[key] = time.perf_counter()
+                if error is not None:
+                    errors[0] += 1
+
+        return _done
+
+    dropped = 0
+    start = time.perf_counter()
+    for i, (plan, key) in enumerate(presses):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        pressed[key] = time.perf_counter()
+        if not executor.submit(plan, callback=_callback(key)):
+            dropped += 1
+            del pressed[key]
+
+    received = env.recorder.wait_all(pressed, timeout=max(10.0, duration * 5))
+    deadline = time.monotonic() + 5.0
+    while len(done) < len(pressed) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    effect = [received[k] - t for k, t in pressed.items() if k in received]
+    finished = [done[k] - t for k, t in pressed.items() if k in done]
+    return {
+        "scenario": "press_rate",
+        "backend": backend,
+        "rate_per_s": rate,
+        "duration_s": duration,
+        "presses": count,
+        "dropped": dropped,
+        "errors": errors[0],
+        "lost": len(pressed) - len(received),
+        "effect": _summary(effect),
+        "done": _summary(finished),
+    }
+
+
+def run_triggers(env: Environment, triggers: int, rounds: int) -> Dict[str, Any]:
+    """Fire `triggers` on_enter blocks at once by starting one watched process."""
+    from triggerflowlib.utils.process_watch import ConditionWatcher, ProcessTracker
+
+    table = FakeProcessTable(200)
+    items = []
+    keys = []
+    for k in range(triggers):
+        backend = env.backends[k % len(env.backends)]
+        action, key = env.action(backend, f"trigger{k}-{time.monotonic_ns()}")
+        items.append(
+            {
+                "key": f"t{k}",
+                "type": "process_running",
+                "process": "bench-game.exe",
+                "on_enter": [action],
+            }
+        )
+        keys.append(key)
+    tracker = ProcessTracker(list_pids=table.pids, resolve=table.resolve)
+    watcher = ConditionWatcher(items, backend="polling", tracker=tracker)
+    watcher.run_once()
+
+    effect: List[float] = []
+    last: List[float] = []
+    lost = 0
+    try:
+        for _ in range(rounds):
+            env.recorder.clear()
+            pid = table.spawn("bench-game.exe")
+            started = time.perf_counter()
+            watcher.run_once()
+            received = env.recorder.wait_all(keys, timeout=10.0)
+            lost += len(keys) - len(received)
+            times = [t - started for t in received.values()]
+            effect.extend(times)
+            if times:
+                last.append(max(times))
+            table.kill(pid)
+            watcher.run_once()
+            # let the exit settle before the next round
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+    return {
+        "scenario": "triggers",
+        "backends": list(env.backends),
+        "triggers": triggers,
+        "rounds": rounds,
+        "lost": lost,
+        "effect": _summary(effect),
+        "all_effects": _summary(last),
+    }
+
+
+def _describe(result: Dict[str, Any]) -> str:
+    e = result["effect"]
+    if not e.get("count"):
+        return "no samples"
+    return (
+        f"p50 {e['p50_ms']:8.2f} ms  p95 {e['p95_ms']:8.2f} ms  "
+        f"p99 {e['p99_ms']:8.2f} ms  max {e['max_ms']:8.2f} ms  n={e['count']}"
+    )
+
+
+def _floats(text: str) -> List[float]:
+    return [float(x) for x in text.split(",") if x.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.e2e")
+    parser.add_argument(
+        "--backends", default=",".join(BACKENDS), help="comma-separated subset"
+    )
+    parser.add_argument("--rates", default="10,50,200", help="presses per second")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per rate")
+    parser.add_argument("--triggers", default="1,10,50", help="concurrent triggers")
+    parser.add_argument("--rounds", type=int, default=20, help="rounds per trigger run")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    wanted = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = set(wanted) - set(BACKENDS)
+    if unknown:
+        parser.error(f"unknown backend(s): {', '.join(sorted(unknown))}")
+
+    output = os.path.abspath(args.output) if args.output else None
+    env = Environment(wanted)
+    if not env.backends:
+        print("[e2e] no backend available", file=sys.stderr)
+        env.close()
+        return 1
+
+    from triggerflowlib.utils import stats
+
+    stats.reset()
+    results = []
+    try:
+        for backend in env.backends:
+            for rate in _floats(args.rates):
+                result = run_press_rate(env, backend, rate, args.duration)
+                results.append(result)
+                print(
+                    f"[e2e] {backend:<12} {rate:>6g}/s  {_describe(result)}",
+                    file=sys.stderr,
+                )
+        for count in _floats(args.triggers):
+            result = run_triggers(env, int(count), args.rounds)
+            results.append(result)
+            print(
+                f"[e2e] triggers={int(count):<5}        {_describe(result)}",
+                file=sys.stderr,
+            )
+    finally:
+        env.close()
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backends": env.backends,
+            "skipped": env.skipped,
+        },
+        "results": results,
+        "plugin_stats": stats.snapshot(),
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[e2e] wrote {output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Fake backends so the benchmarks run headless, without psutil access to
+real processes, audio DLLs, Spotify, Voicemod or user32."""
+
+import ctypes
+import random
+from typing import Dict, List, Optional, Tuple
+
+from triggerflowlib.utils import actions, keyplans
+
+NOOP_ACTION = "bench_noop"
+NOOP_LEGACY_ACTION = "bench_noop_legacy"
+
+# a realistic table is dominated by repeated service/helper names
+_COMMON_NAMES = [
+    "svchost.exe",
+    "chrome.exe",
+    "conhost.exe",
+    "runtimebroker.exe",
+    "explorer.exe",
+    "python.exe",
+    "code.exe",
+    "discord.exe",
+]
+
+
+class FakeProcessTable:
+    """Synthetic process table with the ProcessTracker list_pids/resolve hooks."""
+
+    def __init__(self, size: int, seed: int = 1):
+        self._rng = random.Random(seed)
+        self._next_pid = 1000
+        self._procs: Dict[int, Tuple[float, str]] = {}
+        for i in range(size):
+            self.spawn(self._random_name(i))
+
+    def _random_name(self, i: int) -> str:
+        if i % 4:
+            return self._rng.choice(_COMMON_NAMES)
+        return f"helper{i}.exe"
+
+    def spawn(self, name: str) -> int:
+        pid = self._next_pid
+        self._next_pid += 1
+        self._procs[pid] = (float(pid), name.lower())
+        return pid
+
+    def kill(self, pid: int):
+        self._procs.pop(pid, None)
+
+    def churn(self, count: int, name: Optional[str] = None):
+        """Replace `count` random processes with new ones."""
+        victims = self._rng.sample(list(self._procs), min(count, len(self._procs)))
+        for pid in victims:
+            old = self._procs.pop(pid)[1]
+            self.spawn(name or old)
+
+    def pids(self) -> List[int]:
+        return list(self._procs)
+
+    def resolve(self, pid: int) -> Optional[Tuple[float, str]]:
+        return self._procs.get(pid)
+
+
+def _noop(*_args, **_kwargs):
+    return None
+
+
+def install_noop_actions():
+    """Register no-op action types: one bound, one on the legacy handler path."""
+    actions.ACTION_BINDERS[NOOP_ACTION] = lambda _params: (_noop, (), None)
+    actions.ACTION_BACKENDS[NOOP_ACTION] = "bench"
+    actions.ACTION_HANDLERS[NOOP_LEGACY_ACTION] = _noop
+    actions.ACTION_BACKENDS[NOOP_LEGACY_ACTION] = "bench"
+
+
+def remove_noop_actions():
+    actions.ACTION_BINDERS.pop(NOOP_ACTION, None)
+    actions.ACTION_HANDLERS.pop(NOOP_LEGACY_ACTION, None)
+    actions.ACTION_BACKENDS.pop(NOOP_ACTION, None)
+    actions.ACTION_BACKENDS.pop(NOOP_LEGACY_ACTION, None)
+
+
+_SEND_INPUT = ctypes.CFUNCTYPE(
+    ctypes.c_uint, ctypes.c_uint, ctypes.POINTER(keyplans.INPUT), ctypes.c_int
+)
+_MAP_VK = ctypes.CFUNCTYPE(ctypes.c_uint, ctypes.c_uint, ctypes.c_uint)
+
+
+class FakeUser32:
+    """SendInput/MapVirtualKeyW as ctypes callbacks; counts calls and events."""
+
+    def __init__(self):
+        self.calls = 0
+        self.events = 0
+        self.SendInput = _SEND_INPUT(self._send_input)
+        self.MapVirtualKeyW = _MAP_VK(lambda vk, _map_type: vk & 0xFF)
+
+    def _send_input(self, count: int, _inputs, _size: int) -> int:
+        self.calls += 1
+        self.events += count
+        return count
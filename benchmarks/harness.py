@@ -0,0 +1,58 @@
+"""Timing helpers shared by the benchmark modules."""
+
+import statistics
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def measure(
+    fn: Callable[[], Any],
+    name: str,
+    params: Optional[Dict[str, Any]] = None,
+    min_time: float = 0.1,
+    repeat: int = 5,
+    setup: Optional[Callable[[], Any]] = None,
+) -> Dict[str, Any]:
+    """Time fn() and return one result record.
+
+    The loop count is doubled until one repeat takes at least min_time
+    (like timeit's autorange); then `repeat` runs are timed. setup() runs
+    once before each repeat, outside the timed region.
+    """
+    number = 1
+    while True:
+        if setup is not None:
+            setup()
+        elapsed = _time_loop(fn, number)
+        if elapsed >= min_time or number >= 1 << 24:
+            break
+        number *= 2
+    per_op = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        per_op.append(_time_loop(fn, number) / number * 1e9)
+    return {
+        "name": name,
+        "params": dict(params or {}),
+        "number": number,
+        "repeat": repeat,
+        "ns_per_op_min": min(per_op),
+        "ns_per_op_median": statistics.median(per_op),
+        "ns_per_op_max": max(per_op),
+    }
+
+
+def _time_loop(fn: Callable[[], Any], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+def format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
@@ -0,0 +1,54 @@
+"""Replay an action journal against the local backend stand-ins.
+
+    python -m benchmarks.replay journal.bin --speed 5 -o replay.json
+
+Voicemod, Spotify and Voicemeeter actions run through the real plugins
+against the stand-ins from standins.py. Actions for other backends
+(keyboard, user commands) are stubbed with their recorded duration so
+nothing is typed or executed on this machine.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+from benchmarks.e2e import BACKENDS, Environment
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay")
+    parser.add_argument("path", help="journal file (rotated files are included)")
+    parser.add_argument("--speed", type=float, default=1.0, help="0 = no pauses")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    path = os.path.abspath(args.path)
+    output = os.path.abspath(args.output) if args.output else None
+    env = Environment(list(BACKENDS))
+
+    from triggerflowlib.utils import actions, journal, stats
+
+    live = set(env.backends)
+    stubbed = {b for b in actions.ACTION_BACKENDS.values() if b not in live}
+    stats.reset()
+    try:
+        summary = journal.replay(
+            journal.read_journals(path), speed=args.speed, stub_backends=stubbed
+        )
+    finally:
+        env.close()
+    report = {"replay": summary, "backends": sorted(live), "stats": stats.snapshot()}
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[replay] wrote {output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Run the TriggerFlow microbenchmarks and emit JSON results.
+
+    python -m benchmarks                    # full suite, JSON to stdout
+    python -m benchmarks --quick            # smaller matrix for a smoke run
+    python -m benchmarks --only watcher -o results/watcher.json
+
+A human-readable summary goes to stderr. The JSON holds metadata (time,
+git commit, Python, platform) and one record per case with ns/op
+min/median/max, so you can compare results across commits.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import bench_config, bench_dispatch, bench_keys, bench_watcher
+from benchmarks.harness import format_ns
+
+SUITES: Dict[str, Callable[[bool], List[Dict[str, Any]]]] = {
+    "dispatch": bench_dispatch.run,
+    "watcher": bench_watcher.run,
+    "config": bench_config.run,
+    "keys": bench_keys.run,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _describe(result: Dict[str, Any]) -> str:
+    params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+    return (
+        f"{result['name']:<30} {params:<38} "
+        f"median {format_ns(result['ns_per_op_median']):>10}  "
+        f"min {format_ns(result['ns_per_op_min']):>10}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--quick", action="store_true", help="smaller matrix")
+    parser.add_argument(
+        "--only", action="append", choices=sorted(SUITES), help="suite(s) to run"
+    )
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, Any]] = []
+    for name in args.only or list(SUITES):
+        print(f"[benchmarks] {name}", file=sys.stderr)
+        for result in SUITES[name](args.quick):
+            result["suite"] = name
+            results.append(result)
+            print(f"  {_describe(result)}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[benchmarks] wrote {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
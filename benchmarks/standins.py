@@ -0,0 +1,257 @@
+"""Local stand-ins for the external backends, for end-to-end latency runs.
+
+Each stand-in timestamps (time.perf_counter) every command it receives
+under a correlation key, so the harness can pair a button press with the
+moment the backend saw it:
+
+  VoicemodStandin    TCP server speaking the plugin's newline-delimited JSON
+  SpotifyStandin     HTTP server for the Web API calls play_playlist makes
+  FakeVoicemeeterDLL ctypes callbacks imitating VoicemeeterRemote64.dll
+"""
+
+import ctypes
+import json
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Thread
+from typing import Any, Dict, Hashable, Iterable, Optional
+from urllib.parse import urlparse
+
+
+class Recorder:
+    """Thread-safe key -> receive time map with blocking waits."""
+
+    def __init__(self):
+        self._cv = Condition()
+        self._seen: Dict[Hashable, float] = {}
+
+    def record(self, key: Hashable, when: Optional[float] = None):
+        when = time.perf_counter() if when is None else when
+        with self._cv:
+            self._seen.setdefault(key, when)
+            self._cv.notify_all()
+
+    def wait_all(self, keys: Iterable[Hashable], timeout: float) -> Dict:
+        """Wait until every key was recorded (or timeout); return what arrived."""
+        keys = list(keys)
+        deadline = time.monotonic() + timeout
+        with self._cv:
+            while True:
+                missing = [k for k in keys if k not in self._seen]
+                remaining = deadline - time.monotonic()
+                if not missing or remaining <= 0:
+                    return {k: self._seen[k] for k in keys if k in self._seen}
+                self._cv.wait(remaining)
+
+    def clear(self):
+        with self._cv:
+            self._seen.clear()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _VoicemodHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        received = time.perf_counter()
+        if not line:
+            return
+        message = json.loads(line)
+        self.server.standin.received(message, received)
+        reply = {
+            "actionType": message.get("action"),
+            "id": message.get("id"),
+            "payload": {},
+        }
+        self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+
+class VoicemodStandin:
+    """Imitates the Voicemod API on 127.0.0.1.
+
+    loadVoice is keyed by voiceID, playMeme by fileName; other actions are
+    keyed by the action name.
+    """
+
+    def __init__(self, recorder: Recorder, host: str = "127.0.0.1", port: int = 0):
+        self.recorder = recorder
+        self._server = _TCPServer((host, port), _VoicemodHandler)
+        self._server.standin = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = Thread(
+            target=self._server.serve_forever, name="VoicemodStandin", daemon=True
+        )
+
+    def received(self, message: Dict[str, Any], when: float):
+        payload = message.get("payload") or {}
+        action = message.get("action")
+        if action == "loadVoice":
+            key = payload.get("voiceID")
+        elif action == "playMeme":
+            key = payload.get("fileName")
+        else:
+            key = action
+        self.recorder.record(key, when)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _SpotifyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args):
+        pass
+
+    def _reply(self, status: int, body: Optional[Dict[str, Any]] = None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip("/")
+        if path.endswith("/me"):
+            self._reply(200, {"id": "triggerflow-bench", "product": "premium"})
+        elif path.endswith("/me/player/devices"):
+            self._reply(
+                200,
+                {
+                    "devices": [
+                        {"id": "bench-device", "is_active": True, "name": "Bench"}
+                    ]
+                },
+            )
+        else:
+            self._reply(404, {"error": {"status": 404, "message": "not found"}})
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        received = time.perf_counter()
+        path = urlparse(self.path).path.rstrip("/")
+        if path.endswith("/me/player/play"):
+            payload = json.loads(body) if body else {}
+            self.server.standin.recorder.record(payload.get("context_uri"), received)
+            self._reply(204)
+        else:
+            self._reply(404, {"error": {"status": 404, "message": "not found"}})
+
+
+class SpotifyStandin:
+    """Imitates the Spotify Web API endpoints play_playlist uses.
+
+    Point the plugin at it with SPOTIFY_API_URL=<api_url>. start_playback is
+    keyed by context_uri.
+    """
+
+    def __init__(self, recorder: Recorder, host: str = "127.0.0.1", port: int = 0):
+        self.recorder = recorder
+        self._server = ThreadingHTTPServer((host, port), _SpotifyHandler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = Thread(
+            target=self._server.serve_forever, name="SpotifyStandin", daemon=True
+        )
+
+    @property
+    def api_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+_LOGIN = ctypes.CFUNCTYPE(ctypes.c_long)
+_SET_FLOAT = ctypes.CFUNCTYPE(ctypes.c_long, ctypes.c_char_p, ctypes.c_float)
+_GET_FLOAT = ctypes.CFUNCTYPE(
+    ctypes.c_long, ctypes.c_char_p, ctypes.POINTER(ctypes.c_float)
+)
+_GET_TYPE = ctypes.CFUNCTYPE(ctypes.c_long, ctypes.POINTER(ctypes.c_long))
+_SET_SCRIPT = ctypes.CFUNCTYPE(ctypes.c_long, ctypes.c_char_p)
+
+
+class FakeVoicemeeterDLL:
+    """In-memory parameter store exposing the VBVMR_* calls the plugin makes.
+
+    The functions are real ctypes callbacks, so the plugin's argtypes and
+    byref() handling run as they would against the DLL. Every set, including
+    each assignment of a VBVMR_SetParameters script, is recorded under
+    (parameter name, value). `calls` counts DLL round trips.
+    """
+
+    def __init__(self, recorder: Recorder):
+        self.recorder = recorder
+        self.params: Dict[str, float] = {}
+        self.calls = 0
+        self.dirty = True  # the real DLL reports dirty right after login
+        self.VBVMR_Login = _LOGIN(lambda: 0)
+        self.VBVMR_Logout = _LOGIN(lambda: 0)
+        self.VBVMR_IsParametersDirty = _LOGIN(self._is_dirty)
+        self.VBVMR_SetParameterFloat = _SET_FLOAT(self._set_float)
+        self.VBVMR_GetParameterFloat = _GET_FLOAT(self._get_float)
+        self.VBVMR_GetVoicemeeterType = _GET_TYPE(self._get_type)
+        self.VBVMR_SetParameters = _SET_SCRIPT(self._set_script)
+
+    def set_external(self, name: str, value: float):
+        """A change made outside TriggerFlow, e.g. in the Voicemeeter window."""
+        self.params[name] = ctypes.c_float(value).value
+        self.dirty = True
+
+    def _is_dirty(self) -> int:
+        self.calls += 1
+        dirty, self.dirty = self.dirty, False
+        return 1 if dirty else 0
+
+    def _set_float(self, name: bytes, value: float) -> int:
+        received = time.perf_counter()
+        self.calls += 1
+        self.dirty = True
+        key = name.decode("utf-8")
+        self.params[key] = value
+        self.recorder.record((key, value), received)
+        return 0
+
+    def _set_script(self, script: bytes) -> int:
+        received = time.perf_counter()
+        self.calls += 1
+        self.dirty = True
+        text = script.decode("utf-8").replace("\n", ";").replace(",", ";")
+        for line, statement in enumerate(text.split(";"), 1):
+            if not statement.strip():
+                continue
+            name, sep, value = statement.partition("=")
+            if not sep:
+                return line  # like the DLL: the failing line number
+            key = name.strip()
+            # stored as c_float, like a SetParameterFloat call
+            self.params[key] = ctypes.c_float(float(value)).value
+            self.recorder.record((key, self.params[key]), received)
+        return 0
+
+    def _get_float(self, name: bytes, out) -> int:
+        self.calls += 1
+        out[0] = self.params.get(name.decode("utf-8"), 0.0)
+        return 0
+
+    def _get_type(self, out) -> int:
+        out[0] = 2  # Banana
+        return 0
@@ -0,0 +1,51 @@
+"""Dump or replay a TriggerFlow action journal.
+
+    python tools/journal.py dump journal.bin
+    python tools/journal.py replay journal.bin --speed 10
+    python tools/journal.py replay journal.bin --stub
+
+Record a journal by starting TriggerFlow with TRIGGERFLOW_JOURNAL set. See
+triggerflowlib/utils/journal.py for the format, and benchmarks/replay.py to
+replay against local backend stand-ins.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from triggerflowlib.utils import journal, stats  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python tools/journal.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    dump = sub.add_parser("dump", help="print records as JSON lines")
+    dump.add_argument("path")
+    rep = sub.add_parser("replay", help="re-drive the journaled actions")
+    rep.add_argument("path")
+    rep.add_argument("--speed", type=float, default=1.0, help="0 = no pauses")
+    rep.add_argument(
+        "--stub", action="store_true", help="sleep the recorded durations instead"
+    )
+    args = parser.parse_args(argv)
+
+    if not journal.journal_files(args.path):
+        print(f"[journal] {args.path} not found")
+        return 1
+    if args.command == "dump":
+        for rec in journal.read_journals(args.path):
+            print(json.dumps(rec._asdict()))
+        return 0
+
+    summary = journal.replay(
+        journal.read_journals(args.path), speed=args.speed, stub=args.stub
+    )
+    print(json.dumps({"replay": summary, "stats": stats.snapshot()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
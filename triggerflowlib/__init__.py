@@ -1,6 +1,26 @@
 from .ui import button_create, button_ui
 from .utils import buttoncfgloader
-from .plugins import spotify
-from .plugins.spotify import play_playlist
-from .utils.keyboard_utils import mute_mic_keybind, deafen_headset_keybind
-from .plugins import usercommands
\ No newline at end of file
+
+# Plugins load lazily on first attribute access; see plugins/registry.py
+_LAZY = {
+    "spotify": ("triggerflowlib.plugins.spotify", None),
+    "play_playlist": ("triggerflowlib.plugins.spotify", "play_playlist"),
+    "mute_mic_keybind": ("triggerflowlib.utils.keyboard_utils", "mute_mic_keybind"),
+    "deafen_headset_keybind": (
+        "triggerflowlib.utils.keyboard_utils",
+        "deafen_headset_keybind",
+    ),
+    "usercommands": ("triggerflowlib.plugins.usercommands", None),
+}
+
+
+def __getattr__(name):
+    target = _LAZY.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    module = importlib.import_module(target[0])
+    value = module if target[1] is None else getattr(module, target[1])
+    globals()[name] = value
+    return value
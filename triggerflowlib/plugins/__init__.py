@@ -1,3 +1,22 @@
-from .spotify import play_playlist
-from .voicemeeter import *
-from .usercommands import *
\ No newline at end of file
+# Plugin modules are imported on first use (see registry.py) so that
+# importing triggerflowlib does not pull in spotipy, PyAutoGUI and friends.
+# `triggerflowlib.plugins.<name>` and the old re-exported names still work.
+import importlib
+
+from .registry import get_plugin
+
+# modules whose public names used to be star-imported here, in lookup order
+_REEXPORT = ("voicemeeter", "usercommands")
+
+
+def __getattr__(name):
+    if name == "play_playlist":
+        return get_plugin("spotify").play_playlist
+    if name in ("spotify", "voicemeeter", "voicemod", "usercommands"):
+        return importlib.import_module(f"{__name__}.{name}")
+    if not name.startswith("_"):
+        for plugin in _REEXPORT:
+            module = get_plugin(plugin)
+            if hasattr(module, name):
+                return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
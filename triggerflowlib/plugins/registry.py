@@ -0,0 +1,89 @@
+"""Lazy plugin registry.
+
+Built-in plugins are registered by module path and only imported the first
+time an action that needs them is bound, so a config that only uses
+Voicemeeter never pays for spotipy or PyAutoGUI/Pillow.
+
+Third-party packages can add action types through the "triggerflow.actions"
+entry point group. The entry point name is the action type and its value
+points at a binder with the same contract as the built-in ones:
+
+    [project.entry-points."triggerflow.actions"]
+    obs_switch_scene = "triggerflow_obs.actions:bind_switch_scene"
+
+    def bind_switch_scene(params: dict):
+        return switch_scene, (params["scene"],), None
+
+Entry points are discovered from package metadata only; the plugin module
+is imported when its action type is first bound.
+"""
+
+import importlib
+from threading import Lock
+from types import ModuleType
+from typing import Callable, Dict, Optional
+
+ENTRY_POINT_GROUP = "triggerflow.actions"
+
+BUILTIN_PLUGINS: Dict[str, str] = {
+    "spotify": "triggerflowlib.plugins.spotify",
+    "voicemeeter": "triggerflowlib.plugins.voicemeeter",
+    "voicemod": "triggerflowlib.plugins.voicemod",
+    "usercommands": "triggerflowlib.plugins.usercommands",
+    "keyboard": "triggerflowlib.utils.keyboard_utils",
+}
+
+_lock = Lock()
+_entry_points = None
+
+
+def get_plugin(name: str) -> ModuleType:
+    """Import (once) and return a built-in plugin module by short name."""
+    path = BUILTIN_PLUGINS.get(name)
+    if path is None:
+        raise KeyError(f"unknown plugin: {name}")
+    return importlib.import_module(path)
+
+
+def _discover():
+    """Read entry point metadata once; nothing is imported here."""
+    global _entry_points
+    if _entry_points is None:
+        with _lock:
+            if _entry_points is None:
+                found = {}
+                try:
+                    from importlib.metadata import entry_points
+
+                    eps = entry_points()
+                    if hasattr(eps, "select"):
+                        group = eps.select(group=ENTRY_POINT_GROUP)
+                    else:  # Python < 3.10
+                        group = eps.get(ENTRY_POINT_GROUP, [])
+                    for ep in group:
+                        found.setdefault(ep.name, ep)
+                except Exception as e:
+                    print(f"[plugins] entry point discovery failed: {e}")
+                _entry_points = found
+    return _entry_points
+
+
+def available_entry_points() -> Dict[str, str]:
+    """Return {action_type: 'module:attr'} for installed third-party plugins."""
+    return {name: ep.value for name, ep in _discover().items()}
+
+
+def load_entry_point(action_type: str) -> Optional[Callable[[dict], tuple]]:
+    """Import and return the binder a third-party plugin registered, if any."""
+    ep = _discover().get(action_type)
+    if ep is None:
+        return None
+    return ep.load()
+
+
+def entry_point_module(action_type: str) -> Optional[str]:
+    """Module path of a third-party action type, without importing it."""
+    ep = _discover().get(action_type)
+    if ep is None:
+        return None
+    return ep.value.split(":", 1)[0]
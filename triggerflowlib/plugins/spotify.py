@@ -2,11 +2,16 @@ import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 import os
 
+from triggerflowlib.utils import stats
+
 # The 'scope' determines what permissions our app is asking for.
 # 'user-read-playback-state' is needed to see available devices.
 # 'user-modify-playback-state' is needed to control playback.
 SCOPE = "user-read-playback-state user-modify-playback-state"
 
+# Optional Web API base URL override, e.g. a local stand-in for benchmarks
+_API_URL = os.environ.get("SPOTIFY_API_URL")
+
 def get_spotify_client():
     """
     Authenticates with Spotify using credentials from environment variables.
@@ -15,12 +20,15 @@ def get_spotify_client():
     # Spotipy will automatically look for the environment variables:
     # SPOTIPY_CLIENT_ID, SPOTIPY_CLIENT_SECRET, and SPOTIPY_REDIRECT_URI
     try:
-        auth_manager = SpotifyOAuth(scope=SCOPE)
-        sp = spotipy.Spotify(auth_manager=auth_manager)
-        
-        # A quick check to see if authentication is working
-        sp.current_user()
-        
+        with stats.timer("plugin", "spotify.auth"):
+            auth_manager = SpotifyOAuth(scope=SCOPE)
+            sp = spotipy.Spotify(auth_manager=auth_manager)
+            if _API_URL:
+                sp.prefix = _API_URL.rstrip("/") + "/"
+
+            # A quick check to see if authentication is working
+            sp.current_user()
+
         return sp
     except Exception as e:
         print(f"Error authenticating with Spotify: {e}")
@@ -41,7 +49,8 @@ def play_playlist(playlist_uri):
 
     try:
         # Check for active devices
-        devices = sp.devices()
+        with stats.timer("plugin", "spotify.devices"):
+            devices = sp.devices()
         if not devices or not devices['devices']:
             print("No active Spotify device found. Please start playing on a device first.")
             return
@@ -59,7 +68,8 @@ def play_playlist(playlist_uri):
             print("No active device, using the first one found.")
 
         # Start playback
-        sp.start_playback(device_id=active_device_id, context_uri=playlist_uri)
+        with stats.timer("plugin", "spotify.start_playback"):
+            sp.start_playback(device_id=active_device_id, context_uri=playlist_uri)
         print(f"Started playing playlist {playlist_uri} on device {active_device_id}.")
     except spotipy.exceptions.SpotifyException as e:
         if e.http_status == 404:
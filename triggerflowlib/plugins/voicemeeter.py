@@ -2,6 +2,14 @@ import ctypes
 import os
 import platform
 import atexit
+import re
+import time
+from functools import lru_cache
+from threading import Lock, RLock
+from typing import Dict, Iterable, Optional, Tuple
+
+from triggerflowlib.utils import stats
+from triggerflowlib.utils.scheduler import get_scheduler
 
 _DLL_PATHS = [
     os.environ.get("VOICEMEETER_DLL"),
@@ -28,13 +36,46 @@ def _load():
 
 
 _dll = None
+_bound = None  # the DLL whose prototypes are set
+_has_script = False  # VBVMR_SetParameters available
 _logged_in = False
+# DLL calls come from the voicemeeter action queue and the mirror poll
+_io_lock = RLock()
+
+
+def _bind_prototypes(dll):
+    """Set argtypes/restype once per loaded DLL instead of on every call."""
+    global _has_script
+    c_long = ctypes.c_long
+    for name in ("VBVMR_Login", "VBVMR_Logout", "VBVMR_IsParametersDirty"):
+        fn = getattr(dll, name, None)
+        if fn is not None:
+            fn.argtypes = []
+            fn.restype = c_long
+    dll.VBVMR_SetParameterFloat.argtypes = [ctypes.c_char_p, ctypes.c_float]
+    dll.VBVMR_SetParameterFloat.restype = c_long
+    dll.VBVMR_GetParameterFloat.argtypes = [
+        ctypes.c_char_p,
+        ctypes.POINTER(ctypes.c_float),
+    ]
+    dll.VBVMR_GetParameterFloat.restype = c_long
+    dll.VBVMR_GetVoicemeeterType.argtypes = [ctypes.POINTER(c_long)]
+    dll.VBVMR_GetVoicemeeterType.restype = c_long
+    script = getattr(dll, "VBVMR_SetParameters", None)
+    _has_script = script is not None
+    if script is not None:
+        script.argtypes = [ctypes.c_char_p]
+        script.restype = c_long
 
 
 def _ensure_loaded():
-    global _dll
+    global _dll, _bound
     if _dll is None:
         _dll = _load()
+    if _bound is not _dll:
+        _bind_prototypes(_dll)
+        _bound = _dll
+        _mirror.clear()
 
 
 def _ensure_connected():
@@ -42,19 +83,24 @@ def _ensure_connected():
     global _logged_in
     _ensure_loaded()
     if not _logged_in:
-        res = _dll.VBVMR_Login()
+        with stats.timer("plugin", "voicemeeter.login"):
+            res = _dll.VBVMR_Login()
         if res != 0:
             raise RuntimeError(
                 f"Voicemeeter login failed (code {res}). Ensure Voicemeeter x64 is installed and running."
             )
         _logged_in = True
+        # parameters read back correctly only after the first dirty check
+        with _io_lock:
+            _dll.VBVMR_IsParametersDirty()
 
 
 def login():
     """Initialize connection to Voicemeeter. Returns True on success."""
     global _logged_in
     _ensure_loaded()
-    res = _dll.VBVMR_Login()
+    with stats.timer("plugin", "voicemeeter.login"):
+        res = _dll.VBVMR_Login()
     _logged_in = res == 0
     return _logged_in
 
@@ -69,6 +115,7 @@ def logout():
 
 @atexit.register
 def _cleanup_voicemeeter():
+    _mirror.stop()
     try:
         if _dll is not None and _logged_in:
             _dll.VBVMR_Logout()
@@ -76,38 +123,195 @@ def _cleanup_voicemeeter():
         pass
 
 
+@stats.instrument("voicemeeter.set_parameter")
 def set_parameter_float(name: str, value: float):
     """Set a Voicemeeter parameter by name. Returns True on success."""
     _ensure_connected()
     # VBVMR_SetParameterFloat(char* pParamName, float value)
-    fn = _dll.VBVMR_SetParameterFloat
-    fn.argtypes = [ctypes.c_char_p, ctypes.c_float]
-    fn.restype = ctypes.c_int
-    name_b = name.encode("utf-8")
-    res = fn(name_b, ctypes.c_float(value))
+    with _io_lock:
+        res = _dll.VBVMR_SetParameterFloat(name.encode("utf-8"), value)
+    if res == 0:
+        _mirror.wrote(((name, value),))
     return res == 0
 
 
+@stats.instrument("voicemeeter.get_parameter")
 def get_parameter_float(name: str):
     """Get a Voicemeeter parameter value. Returns float or raises."""
     _ensure_connected()
-    fn = _dll.VBVMR_GetParameterFloat
-    fn.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.c_float)]
-    fn.restype = ctypes.c_int
+    return _read_parameter(name)
+
+
+def _read_parameter(name: str) -> float:
     out = ctypes.c_float()
-    res = fn(name.encode("utf-8"), ctypes.byref(out))
+    with _io_lock:
+        res = _dll.VBVMR_GetParameterFloat(name.encode("utf-8"), ctypes.byref(out))
     if res != 0:
         raise RuntimeError(f"VBVMR_GetParameterFloat failed for {name} (code {res})")
     return float(out.value)
 
 
+def _format_value(value: float) -> str:
+    text = f"{float(value):.4f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+@lru_cache(maxsize=1024)
+def compile_script(assignments: Tuple[Tuple[str, float], ...]) -> bytes:
+    """VBVMR_SetParameters script for (name, value) pairs.
+
+    A name assigned twice keeps only its last value.
+    """
+    merged = {}
+    for name, value in assignments:
+        merged.pop(name, None)
+        merged[name] = value
+    return ";".join(f"{n}={_format_value(v)}" for n, v in merged.items()).encode(
+        "utf-8"
+    )
+
+
+@stats.instrument("voicemeeter.set_parameters")
+def set_parameters(assignments: Iterable[Tuple[str, float]]) -> bool:
+    """Set several parameters in one VBVMR_SetParameters call.
+
+    Falls back to one SetParameterFloat per parameter on DLLs without it.
+    """
+    assignments = tuple((str(n), float(v)) for n, v in assignments)
+    if not assignments:
+        return True
+    _ensure_connected()
+    if not _has_script:
+        return all([set_parameter_float(n, v) for n, v in assignments])
+    with _io_lock:
+        res = _dll.VBVMR_SetParameters(compile_script(assignments))
+    if res != 0:
+        print(f"[voicemeeter] parameter script failed (code {res})")
+        return False
+    _mirror.wrote(assignments)
+    return True
+
+
+POLL_INTERVAL = 0.05  # seconds between IsParametersDirty checks
+WRITE_HOLD = 0.25  # how long Voicemeeter may take to apply our own write
+
+
+class ParameterMirror:
+    """Local copy of the parameters toggles read.
+
+    A parameter is read from the DLL the first time it is asked for and
+    from the copy after that. While anything is cached, a poll on the
+    shared scheduler calls VBVMR_IsParametersDirty every POLL_INTERVAL
+    seconds. Our own writes update the copy at once. A dirty flag may be
+    our write or an outside change (e.g. a click in the Voicemeeter
+    window), so it always leads to a re-read of the whole cache: once
+    WRITE_HOLD has passed since our last write, and at the latest
+    WRITE_HOLD after the flag, so rapid presses can't postpone it. Names
+    written within WRITE_HOLD keep their written value and are read on
+    the next pass. The cache only holds what toggles read, so a refresh
+    is a handful of calls, each taking _io_lock on its own.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self.interval = interval
+        self.refreshes = 0
+        self._values: Dict[str, float] = {}
+        self._written: Dict[str, float] = {}  # cached name -> monotonic write time
+        self._last_write = float("-inf")  # monotonic
+        self._dirty_since: Optional[float] = None  # first unhandled dirty flag
+        self._handle = None
+        self._stopped = False
+        self._lock = Lock()
+
+    def get(self, name: str) -> float:
+        if self._handle is None:
+            self._ensure_polling()
+        value = self._values.get(name)
+        if value is None:
+            value = self._values[name] = _read_parameter(name)
+        return value
+
+    def known(self, name: str) -> Optional[float]:
+        """Cached value, without a DLL read; None if not cached."""
+        return self._values.get(name)
+
+    def wrote(self, assignments: Iterable[Tuple[str, float]]):
+        now = self._last_write = time.monotonic()
+        for name, value in assignments:
+            value = ctypes.c_float(value).value  # stored as c_float by Voicemeeter
+            if name in self._values:
+                self._values[name] = value
+                self._written[name] = now
+
+    def clear(self):
+        self._values.clear()
+        self._written.clear()
+        self._dirty_since = None
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            handle, self._handle = self._handle, None
+        if handle is not None:
+            get_scheduler().cancel(handle)
+
+    def _ensure_polling(self):
+        with self._lock:
+            if self._handle is None and not self._stopped:
+                self._handle = get_scheduler().call_later(self.interval, self._poll)
+
+    def _poll(self):
+        # scheduler thread: one cheap DLL call unless something changed;
+        # reads take _io_lock one at a time so actions can interleave
+        with self._lock:
+            self._handle = None
+        if _dll is None or not _logged_in or not self._values:
+            return  # the next get() restarts polling
+        try:
+            with _io_lock:
+                dirty = _dll.VBVMR_IsParametersDirty() == 1
+            now = time.monotonic()
+            if dirty and self._dirty_since is None:
+                self._dirty_since = now
+            since = self._dirty_since
+            if since is not None and (
+                now - self._last_write >= WRITE_HOLD or now - since >= WRITE_HOLD
+            ):
+                self._refresh(now)
+        except Exception as e:
+            print(f"[voicemeeter] parameter poll failed: {e}")
+        self._ensure_polling()
+
+    def _refresh(self, now: float):
+        self._dirty_since = None
+        for name in list(self._values):
+            written = self._written.get(name)
+            if written is not None and now - written < WRITE_HOLD:
+                # may not be applied yet; read it on the next pass
+                if self._dirty_since is None:
+                    self._dirty_since = now
+                continue
+            value = _read_parameter(name)
+            # a write that landed meanwhile is newer than what we just read
+            if self._written.get(name) == written:
+                self._values[name] = value
+                self._written.pop(name, None)
+        self.refreshes += 1
+
+
+_mirror = ParameterMirror()
+
+
+def get_cached_parameter(name: str) -> float:
+    """Parameter value from the local mirror (read from the DLL on first use)."""
+    _ensure_connected()
+    return _mirror.get(name)
+
+
 def get_voicemeeter_type():
     _ensure_connected()
-    fn = _dll.VBVMR_GetVoicemeeterType
-    fn.argtypes = [ctypes.POINTER(ctypes.c_int)]
-    fn.restype = ctypes.c_int
-    out = ctypes.c_int()
-    res = fn(ctypes.byref(out))
+    out = ctypes.c_long()
+    res = _dll.VBVMR_GetVoicemeeterType(ctypes.byref(out))
     if res != 0:
         raise RuntimeError("VBVMR_GetVoicemeeterType failed")
     return int(out.value)
@@ -128,7 +332,7 @@ def set_strip_gain(strip_index: int, gain_db: float):
 
 def toggle_mute(parameter_name: str):
     """Toggle a boolean-like parameter (0.0 or 1.0) by reading and setting it."""
-    val = get_parameter_float(parameter_name)
+    val = get_cached_parameter(parameter_name)
     new = 0.0 if val >= 0.5 else 1.0
     return set_parameter_float(parameter_name, new)
 
@@ -157,19 +361,24 @@ def set_strip_outputs(
 
     Example: set_strip_outputs(0, a1=0.0, a2=1.0) will route strip 0 to A2 only.
     """
-    if a1 is not None:
-        set_parameter_float(_strip_output_param(strip_index, "A1"), float(a1))
-    if a2 is not None:
-        set_parameter_float(_strip_output_param(strip_index, "A2"), float(a2))
-    if a3 is not None:
-        set_parameter_float(_strip_output_param(strip_index, "A3"), float(a3))
-    if b1 is not None:
-        set_parameter_float(_strip_output_param(strip_index, "B1"), float(b1))
-    if b2 is not None:
-        set_parameter_float(_strip_output_param(strip_index, "B2"), float(b2))
-    if b3 is not None:
-        set_parameter_float(_strip_output_param(strip_index, "B3"), float(b3))
-    return True
+    outputs = (("A1", a1), ("A2", a2), ("A3", a3), ("B1", b1), ("B2", b2), ("B3", b3))
+    return set_parameters(
+        (_strip_output_param(strip_index, bus), float(v))
+        for bus, v in outputs
+        if v is not None
+    )
+
+
+@lru_cache(maxsize=256)
+def _route_assignments(strip_index: int, target_bus: str, exclusive: bool):
+    family = target_bus[0]
+    assignments = []
+    if exclusive:
+        for bus in (f"{family}1", f"{family}2", f"{family}3"):
+            if bus != target_bus:
+                assignments.append((_strip_output_param(strip_index, bus), 0.0))
+    assignments.append((_strip_output_param(strip_index, target_bus), 1.0))
+    return tuple(assignments)
 
 
 def route_strip_to_bus(strip_index: int, target_bus: str, exclusive: bool = True):
@@ -181,92 +390,148 @@ def route_strip_to_bus(strip_index: int, target_bus: str, exclusive: bool = True
     target_bus = target_bus.upper()
     if target_bus not in ("A1", "A2", "A3", "B1", "B2", "B3"):
         raise ValueError("target_bus must be one of A1, A2, A3, B1, B2, B3")
-    if exclusive:
-        if target_bus.startswith("A"):
-            set_strip_outputs(strip_index, a1=0.0, a2=0.0, a3=0.0)
+    # other buses off and the target on, in one script
+    return set_parameters(
+        _route_assignments(int(strip_index), target_bus, bool(exclusive))
+    )
+
+
+def _toggle_pair(strip_indices, first: str, second: str, tag: str):
+    """Flip each strip between two buses; all writes go out as one script.
+
+    Current routing comes from the parameter mirror, so no sleeping for
+    Voicemeeter to settle.
+    """
+    _ensure_connected()
+    assignments = []
+    for strip_index in strip_indices:
+        first_param = _strip_output_param(strip_index, first)
+        second_param = _strip_output_param(strip_index, second)
+        a = _mirror.get(first_param)
+        b = _mirror.get(second_param)
+
+        # Debug output
+        print(f"[{tag}] Strip {strip_index}: {first}={a:.1f}, {second}={b:.1f}")
+
+        if a >= 0.5 and b < 0.5:
+            print(f"  → Switching to {second}")
+            values = (0.0, 1.0)
+        elif b >= 0.5 and a < 0.5:
+            print(f"  → Switching to {first}")
+            values = (1.0, 0.0)
         else:
-            set_strip_outputs(strip_index, b1=0.0, b2=0.0, b3=0.0)
-    # enable target
-    set_parameter_float(_strip_output_param(strip_index, target_bus), 1.0)
-    return True
+            # default to the first bus if neither or both
+            print(f"  → Defaulting to {first} (neither or both were active)")
+            values = (1.0, 0.0)
+        assignments.append((first_param, values[0]))
+        assignments.append((second_param, values[1]))
+
+    return set_parameters(assignments)
 
 
 def toggle_b1_b2(strip_index: int):
     """Toggle between B1 and B2 for a given strip (exclusive within B buses)."""
-    import time
-
-    # Force parameter refresh
-    _ensure_connected()
-    if hasattr(_dll, "VBVMR_IsParametersDirty"):
-        _dll.VBVMR_IsParametersDirty()
-
-    time.sleep(0.02)
-
-    b1 = get_parameter_float(_strip_output_param(strip_index, "B1"))
-    b2 = get_parameter_float(_strip_output_param(strip_index, "B2"))
-
-    print(f"[toggle_b1_b2] Strip {strip_index}: B1={b1:.1f}, B2={b2:.1f}")
-
-    if b1 >= 0.5 and b2 < 0.5:
-        # switch to B2
-        print(f"  → Switching to B2")
-        set_strip_outputs(strip_index, b1=0.0, b2=1.0)
-    elif b2 >= 0.5 and b1 < 0.5:
-        # switch to B1
-        print(f"  → Switching to B1")
-        set_strip_outputs(strip_index, b1=1.0, b2=0.0)
-    else:
-        # default to B1 if neither or both
-        print(f"  → Defaulting to B1")
-        set_strip_outputs(strip_index, b1=1.0, b2=0.0)
-
-    time.sleep(0.02)
-    return True
+    return _toggle_pair((int(strip_index),), "B1", "B2", "toggle_b1_b2")
 
 
 def toggle_b1_b2_for_strips(strip_indices):
     """Toggle B1/B2 for each strip index provided."""
-    for idx in strip_indices:
-        toggle_b1_b2(int(idx))
-    return True
+    return _toggle_pair([int(i) for i in strip_indices], "B1", "B2", "toggle_b1_b2")
 
 
 def toggle_a1_a2(strip_index: int):
     """Toggle between A1 and A2 for a given strip (exclusive within A buses)."""
-    import time
-
-    # Force parameter refresh by calling IsParametersDirty
-    _ensure_connected()
-    if hasattr(_dll, "VBVMR_IsParametersDirty"):
-        _dll.VBVMR_IsParametersDirty()
-
-    time.sleep(0.02)  # Small delay to ensure Voicemeeter updates
-
-    a1 = get_parameter_float(_strip_output_param(strip_index, "A1"))
-    a2 = get_parameter_float(_strip_output_param(strip_index, "A2"))
-
-    # Debug output
-    print(f"[toggle_a1_a2] Strip {strip_index}: A1={a1:.1f}, A2={a2:.1f}")
-
-    if a1 >= 0.5 and a2 < 0.5:
-        # switch to A2
-        print(f"  → Switching to A2")
-        set_strip_outputs(strip_index, a1=0.0, a2=1.0)
-    elif a2 >= 0.5 and a1 < 0.5:
-        # switch to A1
-        print(f"  → Switching to A1")
-        set_strip_outputs(strip_index, a1=1.0, a2=0.0)
-    else:
-        # default to A1 if neither or both
-        print(f"  → Defaulting to A1 (neither or both were active)")
-        set_strip_outputs(strip_index, a1=1.0, a2=0.0)
-
-    time.sleep(0.02)  # Small delay after setting
-    return True
+    return _toggle_pair((int(strip_index),), "A1", "A2", "toggle_a1_a2")
 
 
 def toggle_a1_a2_for_strips(strip_indices):
     """Toggle A1/A2 for each strip index provided."""
-    for idx in strip_indices:
-        toggle_a1_a2(int(idx))
-    return True
+    return _toggle_pair([int(i) for i in strip_indices], "A1", "A2", "toggle_a1_a2")
+
+
+# Scenes: a full routing/mute/gain layout defined once in config and applied
+# as the difference from the current state.
+#
+#   voicemeeter_scenes:
+#     streaming:
+#       strips: {0: {A1: 1, A2: 0, Mute: 0}, 3: {B1: 1, Gain: -6}}
+#       buses: {0: {Mute: 0, Gain: 0}}
+#       parameters: {"Strip[5].Comp": 2}
+
+_SCENE_SECTIONS = {"strips": "Strip", "buses": "Bus"}
+_PARAM_KEY = re.compile(r"^[A-Za-z][A-Za-z0-9_.]*$")
+_scenes: Dict[str, Tuple[Tuple[str, float], ...]] = {}
+
+
+def compile_scene(spec) -> Tuple[Tuple[str, float], ...]:
+    """Flatten a scene mapping into (parameter name, value) pairs."""
+    if not isinstance(spec, dict):
+        raise ValueError("scene must be a mapping of strips/buses/parameters")
+    values: Dict[str, float] = {}
+    for section, entries in spec.items():
+        if not isinstance(entries, dict):
+            raise ValueError(f"{section} must be a mapping")
+        if section == "parameters":
+            for name, value in entries.items():
+                values[str(name)] = float(value)
+            continue
+        prefix = _SCENE_SECTIONS.get(section)
+        if prefix is None:
+            raise ValueError(
+                f"unknown scene section {section!r} (strips, buses, parameters)"
+            )
+        for index, params in entries.items():
+            if not isinstance(params, dict):
+                raise ValueError(f"{section}.{index} must be a mapping")
+            for key, value in params.items():
+                if not _PARAM_KEY.match(str(key)):
+                    raise ValueError(f"bad parameter name {key!r}")
+                values[f"{prefix}[{int(index)}].{key}"] = float(value)
+    if not values:
+        raise ValueError("scene is empty")
+    return tuple(values.items())
+
+
+def define_scenes(scenes) -> Dict[str, Tuple[Tuple[str, float], ...]]:
+    """Compile and register the config's named scenes, replacing earlier ones.
+
+    Raises ValueError naming the first bad scene.
+    """
+    if not isinstance(scenes, dict):
+        raise ValueError("voicemeeter_scenes must be a mapping of name -> scene")
+    compiled = {}
+    for name, spec in scenes.items():
+        try:
+            compiled[str(name)] = compile_scene(spec)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{name}: {e}") from e
+    _scenes.clear()
+    _scenes.update(compiled)
+    return dict(_scenes)
+
+
+def get_scene(name: str) -> Tuple[Tuple[str, float], ...]:
+    try:
+        return _scenes[name]
+    except KeyError:
+        raise KeyError(f"unknown voicemeeter scene {name!r}") from None
+
+
+def _differs(name: str, value: float) -> bool:
+    current = _mirror.known(name)
+    return current is None or abs(current - ctypes.c_float(value).value) > 1e-4
+
+
+@stats.instrument("voicemeeter.apply_scene")
+def apply_scene(assignments: Tuple[Tuple[str, float], ...], force: bool = False):
+    """Send the scene parameters that differ from the current state.
+
+    Nothing is read from the DLL. Parameters the mirror has cached (read
+    back and kept current by its poll) are sent only if they differ; any
+    other parameter counts as changed, since Voicemeeter may have moved it
+    since we last wrote it. Everything that differs goes out as one
+    VBVMR_SetParameters script; force sends all of it.
+    """
+    if not force:
+        assignments = tuple((n, v) for n, v in assignments if _differs(n, v))
+    return set_parameters(assignments)
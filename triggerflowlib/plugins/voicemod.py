@@ -8,6 +8,8 @@ import json
 import socket
 import os
 
+from triggerflowlib.utils import stats
+
 
 _VOICEMOD_PORT = int(os.environ.get("VOICEMOD_PORT", "59129"))
 _VOICEMOD_HOST = os.environ.get("VOICEMOD_HOST", "localhost")
@@ -24,7 +26,12 @@ def _send_command(action: str, payload: dict = None):
     }
     if payload:
         message["payload"] = payload
-    
+
+    with stats.timer("plugin", f"voicemod.{action}"):
+        return _roundtrip(message)
+
+
+def _roundtrip(message: dict):
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(2.0)
@@ -1,8 +1,13 @@
 import tkinter as tk
 import json
-from triggerflowlib.utils.buttoncfgloader import ButtonConfigLoader
-from triggerflowlib.utils import actions
+import os
+import time
+from triggerflowlib.utils.buttoncfgloader import ButtonConfigLoader, compile_config
+from triggerflowlib.utils import journal, stats
+from triggerflowlib.utils.executor import get_action_executor
+from triggerflowlib.utils.hotkeys import HotkeyWatcher
 from triggerflowlib.utils.process_watch import ConditionWatcher
+from triggerflowlib.utils.schedules import ScheduleWatcher
 
 
 def _safe_import(name, globals=None, locals=None, fromlist=(), level=0):
@@ -23,6 +28,44 @@ def _safe_eval_lambda(lambda_str: str):
     return eval(lambda_str, safe_globals, {})
 
 
+def _make_action_runner(root, button, key, plan):
+    """Build a button command that queues the action and never blocks Tk.
+
+    The action runs on its backend's executor queue. The button looks busy
+    (sunken, watch cursor) until every queued press has finished, and the
+    outcome is handed back to the Tk thread through root.after.
+    """
+    in_flight = [0]
+    idle_relief = button.cget("relief")
+
+    def _finished(_result, error):
+        in_flight[0] -= 1
+        if in_flight[0] == 0:
+            button.config(relief=idle_relief, cursor="")
+        if error is not None:
+            print(f"[{key}] action failed: {error}")
+        # let triggers waiting on this button drop their back-off
+        watcher = getattr(root, "_condition_watcher", None)
+        if watcher is not None:
+            watcher.poke(key)
+
+    def _on_done(result, error):
+        # worker thread: post back to the Tk main loop
+        try:
+            root.after(0, _finished, result, error)
+        except RuntimeError:
+            pass  # window already destroyed
+
+    def _run():
+        if not get_action_executor().submit(plan, callback=_on_done, source=key):
+            print(f"[{key}] action queue full, press ignored")
+            return
+        in_flight[0] += 1
+        button.config(relief="sunken", cursor="watch")
+
+    return _run
+
+
 def CreateButtonLayout():
     root = tk.Tk()
     root.geometry("200x300")
@@ -30,54 +73,110 @@ def CreateButtonLayout():
         version_info = json.load(f)
         root.title(f"TriggerFlow (v{version_info['version']})")
 
-    button_config = ButtonConfigLoader("config/buttons.yaml")
+    # Optional periodic latency stats dump (see triggerflowlib/utils/stats.py)
+    stats_file = os.environ.get("TRIGGERFLOW_STATS_FILE")
+    if stats_file:
+        interval = float(os.environ.get("TRIGGERFLOW_STATS_INTERVAL", "60"))
+        root._stop_stats_dump = stats.start_periodic_dump(stats_file, interval)
+
+    # Optional action journal for offline replay (see triggerflowlib/utils/journal.py)
+    journal_file = os.environ.get("TRIGGERFLOW_JOURNAL")
+    if journal_file:
+        max_mb = float(os.environ.get("TRIGGERFLOW_JOURNAL_MAX_MB", "16"))
+        journal.open_journal(journal_file, max_bytes=int(max_mb * 1024 * 1024))
+
+    # Bind every action up front; a bad config fails here with all errors listed
+    button_config = compile_config(ButtonConfigLoader("config/buttons.yaml"))
 
     # Start condition watcher for any keys starting with 't' (e.g., t1, t2, ...)
     if isinstance(button_config, dict):
         trigger_items = [
-            v
+            dict(v, key=k)
             for k, v in button_config.items()
             if isinstance(k, str) and k.lower().startswith("t") and isinstance(v, dict)
         ]
         if trigger_items:
-            watcher = ConditionWatcher(trigger_items)
-            watcher.start()
-            root._condition_watcher = watcher  # keep a reference to avoid GC
+            # `type: schedule` items fire on time; everything else is a condition
+            schedule_items = [t for t in trigger_items if t.get("type") == "schedule"]
+            condition_items = [t for t in trigger_items if t.get("type") != "schedule"]
+            if condition_items:
+                watcher = ConditionWatcher(condition_items)
+                watcher.start()
+                root._condition_watcher = watcher  # keep a reference to avoid GC
+            if schedule_items:
+                schedules = ScheduleWatcher(schedule_items)
+                schedules.start()
+                root._schedule_watcher = schedules
 
             # Render trigger labels that update when status changes
             triggers_frame = tk.Frame(root)
             triggers_frame.pack(pady=5)
             tk.Label(triggers_frame, text="Triggers:", anchor="w").pack(fill="x")
-            labels = []
+            labels = {}
 
             # Initial placeholders based on provided config
             for t in trigger_items:
                 label_text = (
-                    t.get("label") or t.get("name") or t.get("process") or "Trigger"
+                    t.get("label")
+                    or t.get("name")
+                    or t.get("process")
+                    or t.get("pattern")
+                    or t.get("regex")
+                    or "Trigger"
                 )
                 lbl = tk.Label(
                     triggers_frame, text=f"{label_text}: Checking...", fg="gray"
                 )
                 lbl.pack(anchor="w")
-                labels.append(lbl)
+                labels[t["key"]] = lbl
 
             root._trigger_labels = labels
+            root._trigger_version = 0
+            root._schedule_version = 0
+
+            def _refresh_condition_labels(watcher):
+                # only labels whose condition changed since the last
+                # refresh are touched; idle refreshes do no Tk work
+                version, changed = watcher.changed_since(root._trigger_version)
+                root._trigger_version = version
+                for item in changed:
+                    lbl = root._trigger_labels.get(item.get("key"))
+                    if lbl is None:
+                        continue
+                    state = item.get("active")
+                    name = item.get("label") or item.get("process") or item["key"]
+                    if state is None:
+                        txt, color = f"{name}: Checking...", "gray"
+                    elif state:
+                        txt, color = f"{name}: Running", "green"
+                    else:
+                        txt, color = f"{name}: Stopped", "red"
+                    lbl.config(text=txt, fg=color)
+
+            def _refresh_schedule_labels(schedules):
+                version, changed = schedules.changed_since(root._schedule_version)
+                root._schedule_version = version
+                for item in changed:
+                    lbl = root._trigger_labels.get(item.get("key"))
+                    if lbl is None:
+                        continue
+                    name = item.get("label") or item["key"]
+                    next_fire = item.get("next_fire")
+                    if next_fire is None:
+                        txt, color = f"{name}: Done", "gray"
+                    else:
+                        when = time.strftime("%H:%M:%S", time.localtime(next_fire))
+                        txt, color = f"{name}: Next {when}", "blue"
+                    lbl.config(text=txt, fg=color)
 
             def _refresh_trigger_labels():
                 try:
-                    snapshot = root._condition_watcher.snapshot()
-                    for i, item in enumerate(snapshot):
-                        if i >= len(root._trigger_labels):
-                            break
-                        state = item.get("active")
-                        name = item.get("label") or item.get("process") or f"T{i+1}"
-                        if state is None:
-                            txt, color = f"{name}: Checking...", "gray"
-                        elif state:
-                            txt, color = f"{name}: Running", "green"
-                        else:
-                            txt, color = f"{name}: Stopped", "red"
-                        root._trigger_labels[i].config(text=txt, fg=color)
+                    watcher = getattr(root, "_condition_watcher", None)
+                    if watcher is not None:
+                        _refresh_condition_labels(watcher)
+                    schedules = getattr(root, "_schedule_watcher", None)
+                    if schedules is not None:
+                        _refresh_schedule_labels(schedules)
                 finally:
                     # Schedule next refresh
                     root.after(1000, _refresh_trigger_labels)
@@ -85,6 +184,42 @@ def CreateButtonLayout():
             # Kick off periodic UI updates
             root.after(500, _refresh_trigger_labels)
 
+    # Global hotkeys for any keys starting with 'h' (e.g., h1, h2, ...)
+    hotkey_items = [
+        dict(v, key=k)
+        for k, v in button_config.items()
+        if isinstance(k, str) and k.lower().startswith("h") and isinstance(v, dict)
+    ]
+    if hotkey_items:
+        hotkey_watcher = HotkeyWatcher(hotkey_items)
+        hotkey_watcher.start()
+        root._hotkey_watcher = hotkey_watcher
+
+        hotkeys_frame = tk.Frame(root)
+        hotkeys_frame.pack(pady=5)
+        tk.Label(hotkeys_frame, text="Hotkeys:", anchor="w").pack(fill="x")
+        hotkey_labels = {}
+        for item in hotkey_watcher.snapshot():
+            lbl = tk.Label(hotkeys_frame, text=f"{item['label']}: {item['hotkey']}")
+            lbl.pack(anchor="w")
+            hotkey_labels[item["key"]] = lbl
+        root._hotkey_version = 0
+
+        def _refresh_hotkey_labels():
+            try:
+                version, changed = hotkey_watcher.changed_since(root._hotkey_version)
+                root._hotkey_version = version
+                for item in changed:
+                    lbl = hotkey_labels.get(item["key"])
+                    if lbl is None:
+                        continue
+                    txt = f"{item['label']}: {item['hotkey']} ({item['fired']}x)"
+                    lbl.config(text=txt, fg="green")
+            finally:
+                root.after(500, _refresh_hotkey_labels)
+
+        root.after(500, _refresh_hotkey_labels)
+
     for button_key, button_data in button_config.items():
         # Only render keys that look like buttons (start with 'b')
         if not (isinstance(button_key, str) and button_key.lower().startswith("b")):
@@ -94,24 +229,27 @@ def CreateButtonLayout():
 
         # Prefer declarative `action` blocks
         if "action" in button_data:
+            button = tk.Button(root, text=button_data.get("text", "Default Text"))
+            button.config(
+                command=_make_action_runner(
+                    root, button, button_key, button_data["action"]
+                )
+            )
+            button.pack(pady=10)
+            continue
 
-            def make_action_runner(act):
-                return lambda a=act: actions.run_action(a)
-
-            button_command = make_action_runner(button_data["action"])
+        # Legacy fallback: evaluate the command string to get a callable.
+        command_str = button_data.get("command")
+        if command_str:
+            try:
+                button_command = _safe_eval_lambda(command_str)
+            except Exception:
+                # If safe eval fails, fall back to a harmless noop that logs
+                button_command = lambda: print(
+                    f"Failed to evaluate command for {button_key}"
+                )
         else:
-            # Legacy fallback: evaluate the command string to get a callable.
-            command_str = button_data.get("command")
-            if command_str:
-                try:
-                    button_command = _safe_eval_lambda(command_str)
-                except Exception:
-                    # If safe eval fails, fall back to a harmless noop that logs
-                    button_command = lambda: print(
-                        f"Failed to evaluate command for {button_key}"
-                    )
-            else:
-                button_command = lambda: print("No command")
+            button_command = lambda: print("No command")
 
         button = tk.Button(
             root, text=button_data.get("text", "Default Text"), command=button_command
@@ -1 +1 @@
-from .buttoncfgloader import ButtonConfigLoader
\ No newline at end of file
+from .buttoncfgloader import ButtonConfigLoader, compile_config
\ No newline at end of file
@@ -1,200 +1,453 @@
-from triggerflowlib.plugins import spotify, voicemeeter, usercommands, voicemod
-from triggerflowlib.utils import keyboard_utils
+from time import perf_counter
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
 
+from triggerflowlib.plugins import registry
+from triggerflowlib.plugins.registry import get_plugin
+from triggerflowlib.utils import stats
 
-# Handlers accept a params dict (may be empty) and perform the action.
-def _spotify_play_playlist(params: dict):
+
+class ActionConfigError(ValueError):
+    """Raised when one or more action blocks fail to compile.
+
+    `errors` holds every problem found, as human-readable strings.
+    """
+
+    def __init__(self, errors: List[str]):
+        self.errors = list(errors)
+        super().__init__(
+            "invalid action config:\n" + "\n".join(f"  - {e}" for e in self.errors)
+        )
+
+
+class BoundAction(NamedTuple):
+    """An action compiled once at config load: handler and converted arguments.
+
+    Calling it runs the action; no per-press lookups or validation. Each
+    call is timed into the per-type and per-backend stats histograms.
+    """
+
+    type: str
+    fn: Callable
+    args: Tuple
+    kwargs: Mapping[str, Any]
+    backend: str = "default"
+    coalesce: bool = False
+    # the action dict this was compiled from (read-only), for the journal
+    spec: Optional[Mapping[str, Any]] = None
+
+    def __call__(self):
+        if self.backend == COMPOSITE_BACKEND:
+            # timed by the executor that drives it
+            return self.fn(*self.args, **self.kwargs)
+        start = perf_counter()
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException:
+            stats.record_action(self.type, self.backend, perf_counter() - start, True)
+            raise
+        stats.record_action(self.type, self.backend, perf_counter() - start)
+        return result
+
+
+_NO_KWARGS: Mapping[str, Any] = MappingProxyType({})
+
+
+# Binders accept a params dict (may be empty), validate and convert it, and
+# return (callable, args, kwargs) for the action.
+def _bind_spotify_play_playlist(params: dict):
     uri = params.get("playlist_uri")
     if not uri:
         raise KeyError("spotify_play_playlist requires playlist_uri")
-    return spotify.play_playlist(uri)
+    return get_plugin("spotify").play_playlist, (str(uri),), None
 
 
-def _mute_mic(_params: dict):
-    return keyboard_utils.mute_mic_keybind()
+def _bind_mute_mic(_params: dict):
+    keyboard = get_plugin("keyboard")
+    plan = keyboard.compile_keybind(keyboard.MUTE_MIC_KEYS)
+    return keyboard.send_plan, (plan,), None
 
 
-def _deafen_headset(_params: dict):
-    return keyboard_utils.deafen_headset_keybind()
+def _bind_deafen_headset(_params: dict):
+    keyboard = get_plugin("keyboard")
+    plan = keyboard.compile_keybind(keyboard.DEAFEN_HEADSET_KEYS)
+    return keyboard.send_plan, (plan,), None
 
 
-def _press_keys(params: dict):
+def _bind_press_keys(params: dict):
     keys = params.get("keys")
-    if not keys:
+    if not keys or not isinstance(keys, (list, tuple)):
         raise KeyError("key_press requires keys list")
-    return keyboard_utils.press_keybind(keys)
+    delay_ms = float(params.get("delay_ms", 0))
+    keyboard = get_plugin("keyboard")
+    plan = keyboard.compile_keybind([str(k) for k in keys], delay_ms)
+    return keyboard.send_plan, (plan,), None
+
+
+def _bind_macro(params: dict):
+    """Timed key sequence, run on the macro thread (see utils/macros.py).
+
+    expects: { 'steps': [ {down|up|tap|keys|text|wait: ...}, ... ],
+               'on_repress': 'cancel' | 'restart' | 'queue', 'name': str }
+    """
+    from triggerflowlib.utils import macros
+
+    macro = macros.compile_macro(
+        params.get("steps"),
+        str(params.get("on_repress", "cancel")),
+        str(params.get("name", "macro")),
+    )
+    return macros.play_macro, (macro,), None
 
 
-def _vm_set_parameter(params: dict):
+def _bind_vm_set_parameter(params: dict):
     # expects {'parameter': 'Strip[0].Mute', 'value': 1.0}
     param = params.get("parameter")
     if not param:
         raise KeyError("voicemeeter_set_parameter requires parameter name")
     if "value" not in params:
         raise KeyError("voicemeeter_set_parameter requires value")
-    val = params["value"]
-    return voicemeeter.set_parameter_float(param, float(val))
+    value = float(params["value"])
+    return get_plugin("voicemeeter").set_parameter_float, (str(param), value), None
 
 
-def _vm_toggle(params: dict):
+def _bind_vm_toggle(params: dict):
     param = params.get("parameter")
     if not param:
         raise KeyError("voicemeeter_toggle requires parameter name")
-    return voicemeeter.toggle_mute(param)
+    return get_plugin("voicemeeter").toggle_mute, (str(param),), None
 
 
-def _vm_route_input(params: dict):
+def _bind_vm_route_input(params: dict):
     # expects {'strip_index': 0, 'target_bus': 'A2', 'exclusive': True}
     if "strip_index" not in params:
         raise KeyError("voicemeeter_route_input requires strip_index")
     if "target_bus" not in params:
         raise KeyError("voicemeeter_route_input requires target_bus")
     strip_index = int(params["strip_index"])
-    target_bus = str(params["target_bus"])
+    target_bus = str(params["target_bus"]).upper()
+    if target_bus not in ("A1", "A2", "A3", "B1", "B2", "B3"):
+        raise ValueError("target_bus must be one of A1, A2, A3, B1, B2, B3")
     exclusive = bool(params.get("exclusive", True))
-    return voicemeeter.route_strip_to_bus(strip_index, target_bus, exclusive=exclusive)
+    return (
+        get_plugin("voicemeeter").route_strip_to_bus,
+        (strip_index, target_bus),
+        {"exclusive": exclusive},
+    )
 
 
-ACTION_HANDLERS = {
-    "spotify_play_playlist": _spotify_play_playlist,
-    "mute_mic": _mute_mic,
-    "deafen_headset": _deafen_headset,
-    "key_press": _press_keys,
-    "voicemeeter_set_parameter": _vm_set_parameter,
-    "voicemeeter_toggle": _vm_toggle,
-    "voicemeeter_route_input": _vm_route_input,
-}
-
-
-def _vm_toggle_b_pair(params: dict):
-    """Toggle B1/B2 for two strips, typically an input and the first virtual input.
+def _bind_vm_apply_scene(params: dict):
+    """Apply a named scene from `voicemeeter_scenes` (or an inline one).
 
-    expects: { 'strips': [<int>, <int>] }
+    expects: { 'scene': <name> | {strips/buses/parameters}, 'force': bool }
     """
+    scene = params.get("scene")
+    if not scene:
+        raise KeyError("voicemeeter_apply_scene requires 'scene'")
+    voicemeeter = get_plugin("voicemeeter")
+    if isinstance(scene, dict):
+        assignments = voicemeeter.compile_scene(scene)
+    else:
+        assignments = voicemeeter.get_scene(str(scene))
+    force = bool(params.get("force", False))
+    return voicemeeter.apply_scene, (assignments,), {"force": force}
+
+
+def _strip_pair(params: dict, atype: str) -> Tuple[int, int]:
     strips = params.get("strips")
     if not strips or not isinstance(strips, (list, tuple)) or len(strips) != 2:
-        raise KeyError(
-            "voicemeeter_toggle_b_pair requires 'strips' list of two indices"
-        )
-    return voicemeeter.toggle_b1_b2_for_strips(strips)
+        raise KeyError(f"{atype} requires 'strips' list of two indices")
+    return int(strips[0]), int(strips[1])
 
 
-# register the new action
-ACTION_HANDLERS["voicemeeter_toggle_b_pair"] = _vm_toggle_b_pair
+def _bind_vm_toggle_b_pair(params: dict):
+    """Toggle B1/B2 for two strips, typically an input and the first virtual input.
+
+    expects: { 'strips': [<int>, <int>] }
+    """
+    strips = _strip_pair(params, "voicemeeter_toggle_b_pair")
+    return get_plugin("voicemeeter").toggle_b1_b2_for_strips, (strips,), None
 
 
-def _vm_toggle_a_pair(params: dict):
+def _bind_vm_toggle_a_pair(params: dict):
     """Toggle A1/A2 for two strips, typically an input and the first virtual input.
 
     expects: { 'strips': [<int>, <int>] }
     """
-    strips = params.get("strips")
-    if not strips or not isinstance(strips, (list, tuple)) or len(strips) != 2:
-        raise KeyError(
-            "voicemeeter_toggle_a_pair requires 'strips' list of two indices"
-        )
-    return voicemeeter.toggle_a1_a2_for_strips(strips)
-
-
-ACTION_HANDLERS["voicemeeter_toggle_a_pair"] = _vm_toggle_a_pair
+    strips = _strip_pair(params, "voicemeeter_toggle_a_pair")
+    return get_plugin("voicemeeter").toggle_a1_a2_for_strips, (strips,), None
 
 
-def _user_command(params: dict):
-    """Dynamically calls a function from the usercommands module."""
+def _bind_user_command(params: dict):
+    """Resolves a function from the usercommands module."""
     command_name = params.get("command_name")
     if not command_name:
         raise KeyError("user_command requires 'command_name'")
 
     # Get the function from the usercommands module
-    func_to_call = getattr(usercommands, command_name, None)
+    func_to_call = getattr(get_plugin("usercommands"), command_name, None)
     if not func_to_call or not callable(func_to_call):
         raise AttributeError(
             f"'{command_name}' is not a callable function in usercommands module."
         )
 
-    # Extract the function's parameters from the 'parameters' sub-dictionary
-    func_params = params.get("parameters", {})
+    # The function's parameters come from the 'parameters' sub-dictionary
+    func_params = params.get("parameters") or {}
+    if not isinstance(func_params, dict):
+        raise ValueError("user_command 'parameters' must be a mapping")
+    return func_to_call, (), func_params
 
-    return func_to_call(**func_params)
 
-
-ACTION_HANDLERS["user_command"] = _user_command
-
-
-def _voicemod_select_voice(params: dict):
+def _bind_voicemod_select_voice(params: dict):
     """Select a Voicemod voice by ID."""
     voice_id = params.get("voice_id")
     if not voice_id:
         raise KeyError("voicemod_select_voice requires 'voice_id'")
-    return voicemod.select_voice(voice_id)
+    return get_plugin("voicemod").select_voice, (str(voice_id),), None
 
 
-def _voicemod_toggle_voice_changer(params: dict):
-    """Toggle Voicemod voice changer on/off."""
-    return voicemod.toggle_voice_changer()
+def _bind_voicemod_play_sound(params: dict):
+    """Play a Voicemod sound/meme."""
+    sound_file = params.get("sound_file")
+    if not sound_file:
+        raise KeyError("voicemod_play_sound requires 'sound_file'")
+    loop = bool(params.get("loop", False))
+    return get_plugin("voicemod").play_sound, (str(sound_file),), {"loop": loop}
 
 
-def _voicemod_toggle_mute(params: dict):
-    """Toggle Voicemod microphone mute."""
-    return voicemod.toggle_mute()
+# Composite actions are not run by a single handler: the ActionExecutor
+# drives them step by step (see executor.ActionExecutor.submit). Their plan
+# args are (type, payload); calling the plan directly runs it through the
+# shared executor and waits for it.
+COMPOSITE_BACKEND = "composite"
 
 
-def _voicemod_mute(params: dict):
-    """Mute Voicemod microphone."""
-    return voicemod.mute()
+def _run_composite(atype: str, payload):
+    from triggerflowlib.utils.executor import get_action_executor
 
+    plan = BoundAction(
+        atype, _run_composite, (atype, payload), _NO_KWARGS, COMPOSITE_BACKEND
+    )
+    return get_action_executor().run(plan)
 
-def _voicemod_unmute(params: dict):
-    """Unmute Voicemod microphone."""
-    return voicemod.unmute()
 
+def _bind_steps(params: dict, atype: str):
+    steps = params.get("steps")
+    if not isinstance(steps, (list, tuple)) or not steps:
+        raise KeyError(f"{atype} requires a non-empty 'steps' list")
+    errors: List[str] = []
+    plans = compile_actions(steps, f"{atype}.steps", errors)
+    if errors:
+        raise ActionConfigError(errors)
+    return _run_composite, (atype, plans), None
 
-def _voicemod_toggle_hear_myself(params: dict):
-    """Toggle Voicemod 'Hear Myself' feature."""
-    return voicemod.toggle_hear_myself()
 
+def _bind_sequence(params: dict):
+    """Run steps one after another; stops at the first failing step.
 
-def _voicemod_play_sound(params: dict):
-    """Play a Voicemod sound/meme."""
-    sound_file = params.get("sound_file")
-    if not sound_file:
-        raise KeyError("voicemod_play_sound requires 'sound_file'")
-    loop = params.get("loop", False)
-    return voicemod.play_sound(sound_file, loop=loop)
+    expects: { 'steps': [ {action...}, ... ] }
+    """
+    return _bind_steps(params, "sequence")
 
 
-def _voicemod_stop_sounds(params: dict):
-    """Stop all Voicemod sounds."""
-    return voicemod.stop_all_sounds()
+def _bind_parallel(params: dict):
+    """Start all steps at once; done when the slowest one finishes.
 
+    expects: { 'steps': [ {action...}, ... ] }
+    """
+    return _bind_steps(params, "parallel")
 
-ACTION_HANDLERS["voicemod_select_voice"] = _voicemod_select_voice
-ACTION_HANDLERS["voicemod_toggle_voice_changer"] = _voicemod_toggle_voice_changer
-ACTION_HANDLERS["voicemod_toggle_mute"] = _voicemod_toggle_mute
-ACTION_HANDLERS["voicemod_mute"] = _voicemod_mute
-ACTION_HANDLERS["voicemod_unmute"] = _voicemod_unmute
-ACTION_HANDLERS["voicemod_toggle_hear_myself"] = _voicemod_toggle_hear_myself
-ACTION_HANDLERS["voicemod_play_sound"] = _voicemod_play_sound
-ACTION_HANDLERS["voicemod_stop_sounds"] = _voicemod_stop_sounds
 
+def _bind_delay(params: dict):
+    """Wait on the shared timer, e.g. between sequence steps.
 
-def run_action(action: dict):
-    """Run a declarative action dict.
+    expects: { 'seconds': <float> } or { 'ms': <float> }
+    """
+    if "seconds" in params:
+        seconds = float(params["seconds"])
+    elif "ms" in params:
+        seconds = float(params["ms"]) / 1000.0
+    else:
+        raise KeyError("delay requires 'seconds' or 'ms'")
+    if seconds < 0:
+        raise ValueError("delay must not be negative")
+    return _run_composite, ("delay", seconds), None
+
+
+def _no_params(plugin: str, attr: str):
+    """Binder for actions that take no parameters; imports the plugin on bind."""
+    return lambda _params: (getattr(get_plugin(plugin), attr), (), None)
+
+
+ACTION_BINDERS: Dict[str, Callable[[dict], tuple]] = {
+    "spotify_play_playlist": _bind_spotify_play_playlist,
+    "mute_mic": _bind_mute_mic,
+    "deafen_headset": _bind_deafen_headset,
+    "key_press": _bind_press_keys,
+    "macro": _bind_macro,
+    "voicemeeter_set_parameter": _bind_vm_set_parameter,
+    "voicemeeter_toggle": _bind_vm_toggle,
+    "voicemeeter_route_input": _bind_vm_route_input,
+    "voicemeeter_toggle_b_pair": _bind_vm_toggle_b_pair,
+    "voicemeeter_toggle_a_pair": _bind_vm_toggle_a_pair,
+    "voicemeeter_apply_scene": _bind_vm_apply_scene,
+    "user_command": _bind_user_command,
+    "voicemod_select_voice": _bind_voicemod_select_voice,
+    "voicemod_toggle_voice_changer": _no_params("voicemod", "toggle_voice_changer"),
+    "voicemod_toggle_mute": _no_params("voicemod", "toggle_mute"),
+    "voicemod_mute": _no_params("voicemod", "mute"),
+    "voicemod_unmute": _no_params("voicemod", "unmute"),
+    "voicemod_toggle_hear_myself": _no_params("voicemod", "toggle_hear_myself"),
+    "voicemod_play_sound": _bind_voicemod_play_sound,
+    "voicemod_stop_sounds": _no_params("voicemod", "stop_all_sounds"),
+    "sequence": _bind_sequence,
+    "parallel": _bind_parallel,
+    "delay": _bind_delay,
+}
+
+# Which backend each action type talks to. Actions for the same backend are
+# serialized by the executor; different backends run in parallel.
+ACTION_BACKENDS: Dict[str, str] = {
+    "spotify_play_playlist": "spotify",
+    "mute_mic": "keyboard",
+    "deafen_headset": "keyboard",
+    "key_press": "keyboard",
+    "macro": "macro",  # play_macro only hands off to the macro thread
+    "voicemeeter_set_parameter": "voicemeeter",
+    "voicemeeter_toggle": "voicemeeter",
+    "voicemeeter_route_input": "voicemeeter",
+    "voicemeeter_toggle_b_pair": "voicemeeter",
+    "voicemeeter_toggle_a_pair": "voicemeeter",
+    "voicemeeter_apply_scene": "voicemeeter",
+    "user_command": "user",
+    "voicemod_select_voice": "voicemod",
+    "voicemod_toggle_voice_changer": "voicemod",
+    "voicemod_toggle_mute": "voicemod",
+    "voicemod_mute": "voicemod",
+    "voicemod_unmute": "voicemod",
+    "voicemod_toggle_hear_myself": "voicemod",
+    "voicemod_play_sound": "voicemod",
+    "voicemod_stop_sounds": "voicemod",
+    "sequence": COMPOSITE_BACKEND,
+    "parallel": COMPOSITE_BACKEND,
+    "delay": COMPOSITE_BACKEND,
+}
+
+# Actions that undo themselves when run twice. Only these may set
+# `coalesce: true`: the executor then folds a burst of presses by parity
+# (even = no-op, odd = one toggle).
+COALESCIBLE_ACTIONS = {
+    "mute_mic",
+    "deafen_headset",
+    "voicemeeter_toggle",
+    "voicemeeter_toggle_b_pair",
+    "voicemeeter_toggle_a_pair",
+    "voicemod_toggle_voice_changer",
+    "voicemod_toggle_mute",
+    "voicemod_toggle_hear_myself",
+}
+
+# Legacy extension point: handlers here take the params dict on every call.
+# They are bound as-is; prefer adding a binder to ACTION_BINDERS.
+ACTION_HANDLERS: Dict[str, Callable[[dict], Any]] = {}
+
+
+def _load_plugin_binder(atype: str):
+    """Import a third-party binder registered under the entry point group.
+
+    The binder is cached in ACTION_BINDERS; its actions share one backend
+    queue per plugin module.
+    """
+    try:
+        binder = registry.load_entry_point(atype)
+    except Exception as e:
+        raise ActionConfigError([f"{atype}: failed to load plugin: {e}"]) from e
+    if binder is None:
+        return None
+    ACTION_BINDERS[atype] = binder
+    ACTION_BACKENDS.setdefault(atype, registry.entry_point_module(atype) or "default")
+    return binder
+
+
+def compile_action(action: dict) -> BoundAction:
+    """Validate an action dict and bind it to its handler.
 
     action: {'type': <str>, ...params}
+    Raises ActionConfigError describing the problem.
     """
+    if isinstance(action, BoundAction):
+        return action
     if not isinstance(action, dict):
-        raise ValueError("action must be a mapping")
+        raise ActionConfigError(["action must be a mapping"])
     atype = action.get("type")
     if not atype:
-        raise KeyError("action missing 'type' field")
-    handler = ACTION_HANDLERS.get(atype)
-    if not handler:
-        raise KeyError(f"unsupported action type: {atype}")
+        raise ActionConfigError(["action missing 'type' field"])
     # copy params and remove type
     params = dict(action)
     params.pop("type", None)
-    return handler(params)
+    coalesce = bool(params.pop("coalesce", False))
+    if coalesce and atype not in COALESCIBLE_ACTIONS:
+        raise ActionConfigError([f"{atype}: coalesce is only supported for toggles"])
+    binder = ACTION_BINDERS.get(atype)
+    if binder is None and atype not in ACTION_HANDLERS:
+        binder = _load_plugin_binder(atype)
+    if binder is None:
+        handler = ACTION_HANDLERS.get(atype)
+        if handler is None:
+            raise ActionConfigError([f"unsupported action type: {atype}"])
+        return BoundAction(
+            atype,
+            handler,
+            (MappingProxyType(params),),
+            _NO_KWARGS,
+            ACTION_BACKENDS.get(atype, "default"),
+            coalesce,
+            MappingProxyType(dict(action)),
+        )
+    try:
+        fn, args, kwargs = binder(params)
+    except ActionConfigError:
+        raise
+    except (KeyError, ValueError, TypeError, AttributeError, ImportError) as e:
+        msg = str(e.args[0] if isinstance(e, KeyError) and e.args else e)
+        if atype not in msg:
+            msg = f"{atype}: {msg}"
+        raise ActionConfigError([msg]) from e
+    kwargs = MappingProxyType(dict(kwargs)) if kwargs else _NO_KWARGS
+    backend = ACTION_BACKENDS.get(atype, "default")
+    spec = MappingProxyType(dict(action))
+    return BoundAction(atype, fn, tuple(args), kwargs, backend, coalesce, spec)
+
+
+def compile_actions(
+    items: Any, where: str, errors: List[str]
+) -> Tuple[BoundAction, ...]:
+    """Compile a list of action dicts, appending problems to errors.
+
+    where names the config location (e.g. 't1.on_enter') for error messages.
+    """
+    if items is None:
+        return ()
+    if not isinstance(items, (list, tuple)):
+        errors.append(f"{where}: expected a list of actions")
+        return ()
+    plans = []
+    for i, item in enumerate(items):
+        try:
+            plans.append(compile_action(item))
+        except ActionConfigError as e:
+            errors.extend(f"{where}[{i}]: {msg}" for msg in e.errors)
+    return tuple(plans)
+
+
+def run_action(action):
+    """Run a compiled BoundAction, or compile and run a declarative action dict.
+
+    action: BoundAction or {'type': <str>, ...params}
+    """
+    if isinstance(action, BoundAction):
+        return action()
+    return compile_action(action)()
 
 
 # END FILE
@@ -1,6 +1,79 @@
 import yaml
 
+from triggerflowlib.plugins.registry import get_plugin
+from triggerflowlib.utils import actions
+from triggerflowlib.utils.actions import ActionConfigError
+from triggerflowlib.utils.hotkeys import check_hotkeys
+from triggerflowlib.utils.process_watch import check_conditions
+from triggerflowlib.utils.schedules import check_schedules
+
+# top-level config keys that are definitions, not b#/t#/h# entries
+SCENES_KEY = "voicemeeter_scenes"
+
 def ButtonConfigLoader(config_path):
     with open(config_path, 'r') as file:
         config = yaml.safe_load(file)
-    return config
\ No newline at end of file
+    return config
+
+
+def compile_config(config):
+    """Compile every `action`, `on_enter`, `on_exit` and `on_fire` block of a config.
+
+    Returns a new config dict in which `action` is a BoundAction and
+    `on_enter`/`on_exit`/`on_fire` are tuples of BoundActions, so nothing is looked up
+    or validated per press. h# hotkeys, schedules and process/system
+    conditions are checked here too. Raises ActionConfigError listing every problem found, not just the
+    first.
+    """
+    if config is None:
+        return {}
+    if not isinstance(config, dict):
+        raise ActionConfigError(["config root must be a mapping of b#/t#/h# entries"])
+    errors = []
+    compiled = {}
+    if SCENES_KEY in config:
+        # scenes first, so voicemeeter_apply_scene actions can name them
+        try:
+            get_plugin("voicemeeter").define_scenes(config[SCENES_KEY])
+        except (ValueError, ImportError) as e:
+            errors.append(f"{SCENES_KEY}: {e}")
+    for key, item in config.items():
+        if key == SCENES_KEY:
+            compiled[key] = item
+            continue
+        if isinstance(item, dict):
+            item = dict(item)
+            if "action" in item:
+                try:
+                    item["action"] = actions.compile_action(item["action"])
+                except ActionConfigError as e:
+                    errors.extend(f"{key}.action: {msg}" for msg in e.errors)
+            for phase in ("on_enter", "on_exit", "on_fire"):
+                if phase in item:
+                    item[phase] = actions.compile_actions(
+                        item[phase], f"{key}.{phase}", errors
+                    )
+        compiled[key] = item
+    hotkey_items = {
+        k: v
+        for k, v in compiled.items()
+        if isinstance(k, str) and k.lower().startswith("h") and isinstance(v, dict)
+    }
+    errors.extend(check_hotkeys(hotkey_items))
+    trigger_items = {
+        k: v
+        for k, v in compiled.items()
+        if isinstance(k, str) and k.lower().startswith("t") and isinstance(v, dict)
+    }
+    schedule_items = {
+        k: v for k, v in trigger_items.items() if v.get("type") == "schedule"
+    }
+    errors.extend(check_schedules(schedule_items))
+    errors.extend(
+        check_conditions(
+            {k: v for k, v in trigger_items.items() if v.get("type") != "schedule"}
+        )
+    )
+    if errors:
+        raise ActionConfigError(errors)
+    return compiled
@@ -0,0 +1,365 @@
+import time
+from collections import deque
+from threading import Condition, Event, Lock, Thread
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from triggerflowlib.utils import actions, journal, stats
+from triggerflowlib.utils.scheduler import get_scheduler
+
+
+class KeyedExecutor:
+    """Bounded worker pool that runs tasks in submission order per key.
+
+    Tasks sharing a key never run concurrently and start in the order they
+    were submitted; tasks with different keys run in parallel on up to
+    `workers` threads. At most `max_pending` tasks may be queued; further
+    submissions are rejected and counted as overflow.
+    """
+
+    def __init__(
+        self, workers: int = 4, max_pending: int = 256, name: str = "Executor"
+    ):
+        self._workers = max(1, int(workers))
+        self._max_pending = max(1, int(max_pending))
+        self._name = name
+        self._cv = Condition()
+        self._queues: Dict[Hashable, Deque[Tuple[Callable, tuple, dict, Any]]] = {}
+        self._ready: Deque[Hashable] = deque()
+        self._active = set()
+        self._threads: List[Thread] = []
+        self._shutdown = False
+        self._pending = 0
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "overflow": 0,
+            "max_depth": 0,
+        }
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable,
+        *args,
+        callback: Optional[Callable[[Any, Optional[BaseException]], None]] = None,
+        **kwargs,
+    ) -> bool:
+        """Queue fn(*args, **kwargs) behind earlier tasks with the same key.
+
+        callback(result, error) is called on the worker thread when the task
+        finishes. Returns False if the queue is full and the task was dropped.
+        """
+        with self._cv:
+            if self._shutdown:
+                raise RuntimeError(f"{self._name} is shut down")
+            if self._pending >= self._max_pending:
+                self._counters["overflow"] += 1
+                return False
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque()
+            queue.append((fn, args, kwargs, callback))
+            self._pending += 1
+            self._counters["submitted"] += 1
+            if self._pending > self._counters["max_depth"]:
+                self._counters["max_depth"] = self._pending
+            if key not in self._active and len(queue) == 1:
+                self._ready.append(key)
+                self._cv.notify()
+            busy = len(self._ready) + len(self._active)
+            if len(self._threads) < min(self._workers, busy):
+                t = Thread(
+                    target=self._worker,
+                    name=f"{self._name}-{len(self._threads)}",
+                    daemon=True,
+                )
+                self._threads.append(t)
+                t.start()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Return queue depth and lifetime counters."""
+        with self._cv:
+            out = dict(self._counters)
+            out["queued"] = self._pending
+            out["running"] = len(self._active)
+            out["workers"] = len(self._threads)
+        return out
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None):
+        """Stop accepting tasks; workers exit once the queues drain."""
+        with self._cv:
+            self._shutdown = True
+            self._cv.notify_all()
+        if wait:
+            for t in list(self._threads):
+                t.join(timeout)
+
+    def _worker(self):
+        while True:
+            with self._cv:
+                while not self._ready:
+                    if self._shutdown:
+                        return
+                    self._cv.wait()
+                key = self._ready.popleft()
+                self._active.add(key)
+                fn, args, kwargs, callback = self._queues[key].popleft()
+                self._pending -= 1
+            result, error = None, None
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                error = e
+            if callback is not None:
+                try:
+                    callback(result, error)
+                except Exception as e:
+                    print(f"[{self._name}] callback failed: {e}")
+            elif error is not None:
+                print(f"[{self._name}] task for {key} failed: {error}")
+            with self._cv:
+                self._counters["failed" if error is not None else "completed"] += 1
+                self._active.discard(key)
+                if self._queues[key]:
+                    self._ready.append(key)
+                    self._cv.notify()
+                else:
+                    del self._queues[key]
+
+
+class ActionExecutor:
+    """Runs actions off the caller's thread with one serialized queue per backend.
+
+    Actions for the same backend (Voicemeeter DLL, Spotify, Voicemod,
+    keyboard, ...) run one at a time in submission order, so a backend never
+    sees overlapping calls; different backends run in parallel.
+
+    Composite actions are driven here without occupying a worker: sequence
+    steps are chained through completion callbacks, parallel steps are all
+    submitted at once, and delays are resumed by the shared Scheduler.
+
+    Plans compiled with `coalesce: true` fold repeated presses: while an
+    identical toggle is still queued, new presses join it instead of queuing
+    another run. When it starts, an odd number of presses runs the toggle
+    once and an even number does nothing; every press gets the result.
+
+    When a journal is open (journal.open_journal) every action that runs is
+    recorded with its source, start time, duration and outcome.
+    """
+
+    def __init__(self, workers: int = 6, max_pending: int = 256):
+        self._pool = KeyedExecutor(
+            workers=workers, max_pending=max_pending, name="ActionExecutor"
+        )
+        self._lock = Lock()
+        self._coalescing: Dict[Hashable, List[Optional[Callable]]] = {}
+        self._coalesce_counters = {"coalesced": 0, "cancelled_out": 0}
+
+    def submit(
+        self,
+        action,
+        callback: Optional[Callable[[Any, Optional[BaseException]], None]] = None,
+        source: Optional[str] = None,
+    ) -> bool:
+        """Queue an action (BoundAction or dict) on its backend's queue.
+
+        callback(result, error) runs on the worker thread when it finishes.
+        source names what fired the action (button key, "t1.on_enter", ...)
+        for the journal. Returns False if the queue is full and the action
+        was dropped.
+        """
+        plan = actions.compile_action(action)
+        if plan.backend == actions.COMPOSITE_BACKEND:
+            self._start_composite(plan, callback or _report_failure, source)
+            return True
+        if plan.coalesce:
+            return self._submit_coalesced(plan, callback, source)
+        return self._pool.submit(
+            plan.backend, _execute, plan, source, callback=callback
+        )
+
+    def _submit_coalesced(self, plan, callback, source) -> bool:
+        key = _coalesce_key(plan)
+        with self._lock:
+            presses = self._coalescing.get(key)
+            if presses is not None:
+                # an identical toggle is still queued; ride along with it
+                presses.append(callback)
+                self._coalesce_counters["coalesced"] += 1
+                return True
+            presses = self._coalescing[key] = [callback]
+
+        def _fan_out(result, error):
+            callbacks = [cb for cb in presses if cb is not None]
+            if not callbacks:
+                _report_failure(result, error)
+            for cb in callbacks:
+                try:
+                    cb(result, error)
+                except Exception as e:
+                    print(f"[ActionExecutor] callback failed: {e}")
+
+        if self._pool.submit(
+            plan.backend,
+            self._run_coalesced,
+            key,
+            plan,
+            presses,
+            source,
+            callback=_fan_out,
+        ):
+            return True
+        with self._lock:
+            if self._coalescing.get(key) is presses:
+                del self._coalescing[key]
+        # presses that joined in the meantime were accepted; fail them
+        full = RuntimeError("action queue full")
+        for cb in presses[1:]:
+            (cb or _report_failure)(None, full)
+        return False
+
+    def _run_coalesced(
+        self, key, plan, presses: List[Optional[Callable]], source: Optional[str]
+    ):
+        with self._lock:
+            # later presses start a new toggle behind this one
+            if self._coalescing.get(key) is presses:
+                del self._coalescing[key]
+            count = len(presses)
+            if count % 2 == 0:
+                self._coalesce_counters["cancelled_out"] += 1
+        if count % 2 == 0:
+            return None
+        return _execute(plan, source)
+
+    def _start_composite(self, plan, callback, source):
+        atype, payload = plan.args
+        start = time.perf_counter()
+
+        def _timed(result, error):
+            elapsed = time.perf_counter() - start
+            stats.record("action", atype, elapsed, error is not None)
+            callback(result, error)
+
+        if atype == "delay":
+            # no thread sleeps: the shared timer resumes the caller
+            get_scheduler().call_later(payload, _timed, None, None)
+        elif atype == "sequence":
+            self._sequence_step(payload, 0, [], _timed, source)
+        elif atype == "parallel":
+            self._parallel(payload, _timed, source)
+        else:
+            _timed(None, ValueError(f"unknown composite action: {atype}"))
+
+    def _sequence_step(
+        self, steps, index: int, results: List[Any], callback, source=None
+    ):
+        if index >= len(steps):
+            callback(results, None)
+            return
+
+        def _next(result, error):
+            if error is not None:
+                callback(results, error)
+                return
+            results.append(result)
+            self._sequence_step(steps, index + 1, results, callback, source)
+
+        if not self.submit(steps[index], callback=_next, source=source):
+            callback(results, RuntimeError("action queue full"))
+
+    def _parallel(self, steps, callback, source=None):
+        results: List[Any] = [None] * len(steps)
+        errors: List[BaseException] = []
+        remaining = [len(steps)]
+        lock = Lock()
+
+        def _one_done(index, result, error):
+            with lock:
+                results[index] = result
+                if error is not None:
+                    errors.append(error)
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                callback(results, errors[0] if errors else None)
+
+        for i, step in enumerate(steps):
+            cb = lambda r, e, i=i: _one_done(i, r, e)
+            if not self.submit(step, callback=cb, source=source):
+                cb(None, RuntimeError("action queue full"))
+
+    def run(
+        self, action, timeout: Optional[float] = None, source: Optional[str] = None
+    ):
+        """Run an action on its backend's queue and wait for the result."""
+        done = Event()
+        box: List[Any] = [None, None]
+
+        def _finished(result, error):
+            box[0], box[1] = result, error
+            done.set()
+
+        if not self.submit(action, callback=_finished, source=source):
+            raise RuntimeError("action queue full")
+        if not done.wait(timeout):
+            raise TimeoutError("action did not finish in time")
+        if box[1] is not None:
+            raise box[1]
+        return box[0]
+
+    def stats(self) -> Dict[str, int]:
+        out = self._pool.stats()
+        with self._lock:
+            out.update(self._coalesce_counters)
+        return out
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+def _execute(plan, source: Optional[str]):
+    """Run one plan, journaling it when a journal is open."""
+    log = journal.get_journal()
+    if log is None:
+        return plan()
+    started = time.time()
+    start = time.perf_counter()
+    try:
+        result = plan()
+    except BaseException:
+        log.record(plan, started, time.perf_counter() - start, False, source)
+        raise
+    log.record(plan, started, time.perf_counter() - start, True, source)
+    return result
+
+
+def _coalesce_key(plan) -> Hashable:
+    """Identical plans (same handler and arguments) share a coalescing slot."""
+    key = (plan.fn, plan.args, tuple(plan.kwargs.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return id(plan)
+    return key
+
+
+def _report_failure(_result, error):
+    if error is not None:
+        print(f"[ActionExecutor] action failed: {error}")
+
+
+_default_executor: Optional[ActionExecutor] = None
+_default_lock = Lock()
+
+
+def get_action_executor() -> ActionExecutor:
+    """Return the process-wide ActionExecutor, creating it on first use."""
+    global _default_executor
+    if _default_executor is None:
+        with _default_lock:
+            if _default_executor is None:
+                _default_executor = ActionExecutor()
+    return _default_executor
@@ -0,0 +1,426 @@
+"""Global hotkey triggers (h# entries) matched with a prefix trie.
+
+    h1:
+      label: Pedal
+      hotkey: f13                 # a chord: modifiers + one key
+      action: {type: voicemod_toggle_mute}
+    h2:
+      hotkey: "ctrl+k, ctrl+m"    # a sequence of chords (or a YAML list)
+      timeout: 1.0                # max seconds between chords, default 1
+      action: {type: mute_mic}
+
+Every chord is reduced to (modifier mask, key), and all hotkeys are
+compiled into one trie of chords. A key-down event is a single dict lookup
+in the current trie node, whatever the number of hotkeys. Modifiers match
+by family: ctrl, alt, shift and win (lctrl/rctrl both mean ctrl). Shifted
+characters are their base key plus shift ("!" is shift+1, US layout).
+
+The keyboard hook callback only matches and hands the action to the
+ActionExecutor; nothing runs on the hook thread.
+"""
+
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from triggerflowlib.utils.executor import get_action_executor
+
+# modifier family bits
+_MODIFIERS = {
+    "ctrl": 1,
+    "control": 1,
+    "lctrl": 1,
+    "rctrl": 1,
+    "leftctrl": 1,
+    "rightctrl": 1,
+    "alt": 2,
+    "lalt": 2,
+    "ralt": 2,
+    "leftalt": 2,
+    "rightalt": 2,
+    "altgr": 2,
+    "shift": 4,
+    "lshift": 4,
+    "rshift": 4,
+    "leftshift": 4,
+    "rightshift": 4,
+    "win": 8,
+    "lwin": 8,
+    "rwin": 8,
+    "windows": 8,
+    "leftwindows": 8,
+    "rightwindows": 8,
+    "cmd": 8,
+    "command": 8,
+}
+
+_ALIASES = {
+    "escape": "esc",
+    "return": "enter",
+    "del": "delete",
+    "pgup": "pageup",
+    "pgdn": "pagedown",
+    "prtsc": "printscreen",
+}
+
+_SHIFT = 4
+
+# shifted character -> base key (US layout)
+_SHIFTED = {
+    "!": "1",
+    "@": "2",
+    "#": "3",
+    "$": "4",
+    "%": "5",
+    "^": "6",
+    "&": "7",
+    "*": "8",
+    "(": "9",
+    ")": "0",
+    "_": "-",
+    "{": "[",
+    "}": "]",
+    "|": "\\",
+    ":": ";",
+    '"': "'",
+    "<": ",",
+    ">": ".",
+    "?": "/",
+    "~": "`",
+}
+
+Chord = Tuple[int, str]  # (modifier mask, canonical key name)
+
+_canonical: Dict[str, str] = {}
+
+
+def canonical_key(name: str) -> str:
+    """Normalize config and keyboard-lib key names ('Page Up' -> 'pageup')."""
+    cached = _canonical.get(name)
+    if cached is None:
+        key = "".join(str(name).lower().split())
+        cached = _canonical[name] = _ALIASES.get(key, key)
+    return cached
+
+
+def parse_chord(text: str) -> Chord:
+    """'ctrl+shift+m' -> (mask, 'm'); exactly one non-modifier key."""
+    mask = 0
+    keys = []
+    for part in str(text).split("+"):
+        name = canonical_key(part)
+        if not name:
+            raise ValueError(f"empty key in {text!r}")
+        bit = _MODIFIERS.get(name)
+        if bit:
+            mask |= bit
+        elif name in _SHIFTED:
+            mask |= _SHIFT
+            keys.append(_SHIFTED[name])
+        else:
+            keys.append(name)
+    if len(keys) != 1:
+        raise ValueError(f"{text!r} needs exactly one non-modifier key")
+    return mask, keys[0]
+
+
+def parse_hotkey(spec) -> Tuple[Chord, ...]:
+    """A chord string, a comma-separated sequence, or a list of chords."""
+    if isinstance(spec, (int, float)) and not isinstance(spec, bool):
+        spec = str(spec)  # e.g. `hotkey: 5` in YAML
+    if isinstance(spec, str):
+        parts = spec.split(",")
+    elif isinstance(spec, (list, tuple)):
+        parts = [str(p) for p in spec]
+    else:
+        raise ValueError("hotkey must be a string or a list of chords")
+    chords = tuple(parse_chord(p) for p in parts if p.strip())
+    if not chords:
+        raise ValueError("hotkey must not be empty")
+    return chords
+
+
+class HotkeyBinding:
+    """One h# entry and its fire count."""
+
+    def __init__(
+        self,
+        key: Optional[str],
+        hotkey,
+        action,
+        label: Optional[str] = None,
+        timeout: float = 1.0,
+    ):
+        self.key = key
+        self.chords = parse_hotkey(hotkey)
+        if isinstance(hotkey, (list, tuple)):
+            self.text = ", ".join(str(h) for h in hotkey)
+        else:
+            self.text = str(hotkey)
+        self.action = action
+        self.label = label or key or self.text
+        self.timeout = float(timeout)
+        if self.timeout <= 0:
+            raise ValueError("timeout must be positive")
+        self.fired = 0
+        self.last_fired: Optional[float] = None
+        self.version = 0
+
+
+class _Node:
+    __slots__ = ("children", "binding", "timeout")
+
+    def __init__(self):
+        self.children: Dict[Chord, "_Node"] = {}
+        self.binding: Optional[HotkeyBinding] = None
+        self.timeout = 0.0  # how long to wait for the next chord
+
+
+class HotkeyMatcher:
+    """Prefix trie over all bindings' chord sequences.
+
+    feed() takes key events (canonical name, down/up, monotonic time) and
+    returns the binding that completed, if any. A hotkey that is a prefix
+    of another (or a duplicate) is rejected with ValueError.
+    """
+
+    def __init__(self, bindings: Sequence[HotkeyBinding] = ()):
+        self._root = _Node()
+        self._node = self._root
+        self._deadline = 0.0
+        self._mask = 0
+        self._mods_down: Dict[str, int] = {}
+        self._keys_down = set()
+        for binding in bindings:
+            self.add(binding)
+
+    def add(self, binding: HotkeyBinding):
+        node = self._root
+        path = []
+        for chord in binding.chords:
+            if node.binding is not None:
+                raise ValueError(f"{node.binding.label} is a prefix of it")
+            path.append(node)
+            child = node.children.get(chord)
+            if child is None:
+                child = node.children[chord] = _Node()
+            node = child
+        if node.binding is not None:
+            raise ValueError(f"same hotkey as {node.binding.label}")
+        if node.children:
+            raise ValueError("is a prefix of another hotkey")
+        node.binding = binding
+        for parent in path:
+            parent.timeout = max(parent.timeout, binding.timeout)
+
+    @property
+    def shift_held(self) -> bool:
+        return bool(self._mask & _SHIFT)
+
+    def reset(self):
+        self._node = self._root
+        self._mask = 0
+        self._mods_down.clear()
+        self._keys_down.clear()
+
+    def feed(self, name: str, down: bool, now: float) -> Optional[HotkeyBinding]:
+        bit = _MODIFIERS.get(name, 0)
+        if bit:
+            if down:
+                self._mods_down[name] = bit
+            else:
+                self._mods_down.pop(name, None)
+            mask = 0
+            for b in self._mods_down.values():
+                mask |= b
+            self._mask = mask
+            return None
+        if not down:
+            self._keys_down.discard(name)
+            return None
+        if name in self._keys_down:
+            return None  # auto-repeat
+        self._keys_down.add(name)
+
+        chord = (self._mask, name)
+        node = self._node
+        if node is not self._root and now > self._deadline:
+            node = self._node = self._root
+        child = node.children.get(chord)
+        if child is None and node is not self._root:
+            # broken sequence; this chord may start a new one
+            child = self._root.children.get(chord)
+        if child is None:
+            self._node = self._root
+            return None
+        if child.binding is not None:
+            self._node = self._root
+            return child.binding
+        self._node = child
+        self._deadline = now + child.timeout
+        return None
+
+
+def build_binding(key: Optional[str], item: Dict[str, Any]) -> HotkeyBinding:
+    """HotkeyBinding for one h# item; ValueError if it is malformed."""
+    if item.get("action") is None:
+        raise ValueError("hotkey trigger needs an 'action'")
+    return HotkeyBinding(
+        key,
+        item.get("hotkey"),
+        item["action"],
+        label=item.get("label") or item.get("name"),
+        timeout=item.get("timeout", 1.0),
+    )
+
+
+def check_hotkeys(items: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Validate h# items (chords, timeout, action, clashes); return errors."""
+    errors = []
+    matcher = HotkeyMatcher()
+    for key, item in items.items():
+        try:
+            matcher.add(build_binding(key, item))
+        except ValueError as e:
+            errors.append(f"{key}: {e}")
+    return errors
+
+
+def _keyboard_hook(callback: Callable[[Any], None]) -> Callable[[], None]:
+    """Install a global hook with the 'keyboard' library; returns an unhook."""
+    import keyboard
+
+    handle = keyboard.hook(callback)
+    return lambda: keyboard.unhook(handle)
+
+
+def _keyboard_scan_codes(name: str) -> Tuple[int, ...]:
+    import keyboard
+
+    return tuple(keyboard.key_to_scan_codes(name, error_if_missing=False))
+
+
+class HotkeyWatcher:
+    """Listens for h# hotkeys globally and submits their actions.
+
+    Expected item shape: { "key": "h1", "hotkey": "ctrl+alt+f13",
+    "action": BoundAction, "label": str, "timeout": float }, already
+    checked by compile_config (check_hotkeys); a bad item raises ValueError.
+    `hook(callback) -> unhook` and `scan_codes(name)` default to the
+    'keyboard' library and can be swapped for testing.
+    """
+
+    def __init__(
+        self,
+        triggers: List[Dict[str, Any]],
+        hook: Optional[Callable] = None,
+        scan_codes: Optional[Callable[[str], Sequence[int]]] = None,
+        submit: Optional[Callable[..., bool]] = None,
+    ):
+        self._hook = hook or _keyboard_hook
+        self._scan_codes = scan_codes
+        self._submit = submit
+        self._unhook: Optional[Callable[[], None]] = None
+        self._lock = Lock()
+        self.bindings: List[HotkeyBinding] = []
+        self.matcher = HotkeyMatcher()
+        for t in triggers or []:
+            binding = build_binding(t.get("key"), t)
+            self.matcher.add(binding)
+            self.bindings.append(binding)
+        self._by_scan_code: Dict[int, str] = {}
+        self._version = 0
+
+    def _map_scan_codes(self):
+        """Resolve configured key names to scan codes, so shifted or
+        layout-dependent event names ('!' for shift+1) still match.
+
+        Raises ValueError if two configured names are the same physical key.
+        """
+        lookup = self._scan_codes
+        if lookup is None:
+            lookup = _keyboard_scan_codes
+        names = sorted({name for b in self.bindings for _mask, name in b.chords})
+        by_scan_code: Dict[int, str] = {}
+        for name in names:
+            try:
+                codes = lookup(name)
+            except Exception:
+                continue
+            for code in codes:
+                other = by_scan_code.setdefault(code, name)
+                if other != name:
+                    raise ValueError(
+                        f"{other!r} and {name!r} are the same key (scan code {code})"
+                    )
+        self._by_scan_code = by_scan_code
+
+    def start(self):
+        if self._unhook is not None or not self.bindings:
+            return
+        try:
+            self._map_scan_codes()
+        except ValueError as e:
+            print(f"[HotkeyWatcher] {e}; global hotkeys disabled")
+            return
+        try:
+            self._unhook = self._hook(self._on_event)
+        except Exception as e:
+            print(f"[HotkeyWatcher] global hotkeys unavailable: {e}")
+            return
+        print(f"[HotkeyWatcher] listening for {len(self.bindings)} hotkey(s)")
+
+    def stop(self):
+        unhook, self._unhook = self._unhook, None
+        if unhook is not None:
+            unhook()
+        self.matcher.reset()
+
+    def _on_event(self, event):
+        # hook thread: match and hand off, nothing else
+        name = self._by_scan_code.get(getattr(event, "scan_code", None))
+        with self._lock:
+            if name is None:
+                name = canonical_key(event.name or "")
+                # "!" with shift held is shift+1; keypad "*" stays "*"
+                if self.matcher.shift_held and not getattr(event, "is_keypad", False):
+                    name = _SHIFTED.get(name, name)
+            binding = self.matcher.feed(
+                name, event.event_type == "down", time.monotonic()
+            )
+            if binding is None:
+                return
+            binding.fired += 1
+            binding.last_fired = time.time()
+            self._version += 1
+            binding.version = self._version
+        submit = self._submit or get_action_executor().submit
+        if not submit(binding.action, source=binding.key):
+            print(f"[HotkeyWatcher] action queue full, dropped {binding.label}")
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever a hotkey fires."""
+        return self._version
+
+    def changed_since(self, version: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (current_version, bindings that fired after `version`)."""
+        current = self._version
+        if version >= current:
+            return current, []
+        return current, [
+            self._describe(b) for b in self.bindings if b.version > version
+        ]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [self._describe(b) for b in self.bindings]
+
+    @staticmethod
+    def _describe(b: HotkeyBinding) -> Dict[str, Any]:
+        return {
+            "key": b.key,
+            "label": b.label,
+            "hotkey": b.text,
+            "fired": b.fired,
+            "last_fired": b.last_fired,
+        }
@@ -0,0 +1,281 @@
+"""Append-only binary journal of executed actions, with mmap replay.
+
+Every action the ActionExecutor runs can be recorded as one compact
+record: start time, duration, ok/error, source (button or trigger key) and
+the action spec as JSON. Files are capped at `max_bytes` and rotated like
+logging's RotatingFileHandler (journal.bin -> journal.bin.1 -> ...).
+
+File layout: b"TFJ1" followed by records of
+
+    <d started (epoch s)> <f duration (s)> <B status> <x> <H source len>
+    <I spec len> <source utf-8> <spec JSON utf-8>
+
+Dump or replay a journal (oldest rotated file first):
+
+    python tools/journal.py dump journal.bin
+    python tools/journal.py replay journal.bin --speed 10
+    python tools/journal.py replay journal.bin --stub
+
+--stub keeps each action's type and backend queue but replaces the
+backend call with a sleep of the recorded duration, so a night's load can
+be re-driven offline. benchmarks/replay.py replays against the local
+backend stand-ins instead.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+MAGIC = b"TFJ1"
+_RECORD = struct.Struct("<dfBxHI")
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class JournalRecord(NamedTuple):
+    started: float
+    duration: float
+    ok: bool
+    source: str
+    spec: Dict[str, Any]
+
+
+class ActionJournal:
+    """Thread-safe writer; each record is appended with a single write()."""
+
+    def __init__(self, path: str, max_bytes: int = 16 << 20, backups: int = 3):
+        self.path = path
+        self.max_bytes = max(1024, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self._lock = Lock()
+        # encoded spec per plan; plans are long-lived and compiled once
+        self._specs: Dict[int, tuple] = {}
+        self._fd = -1
+        self._size = 0
+        self._open()
+
+    def _open(self):
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        if self._size == 0:
+            os.write(self._fd, MAGIC)
+            self._size = len(MAGIC)
+
+    def _rotate(self):
+        os.close(self._fd)
+        for i in range(self.backups, 0, -1):
+            src = self.path if i == 1 else f"{self.path}.{i - 1}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i}")
+        if self.backups == 0:
+            os.remove(self.path)
+        self._open()
+
+    def _encode_spec(self, plan) -> bytes:
+        cached = self._specs.get(id(plan))
+        if cached is not None and cached[0] is plan:
+            return cached[1]
+        spec = getattr(plan, "spec", None)
+        if spec is None:
+            spec = {"type": getattr(plan, "type", str(plan))}
+        data = json.dumps(dict(spec), separators=(",", ":"), default=str)
+        encoded = data.encode("utf-8")
+        if len(self._specs) >= 4096:
+            self._specs.clear()
+        # keep the plan referenced so its id() cannot be reused
+        self._specs[id(plan)] = (plan, encoded)
+        return encoded
+
+    def record(
+        self,
+        plan,
+        started: float,
+        duration: float,
+        ok: bool,
+        source: Optional[str] = None,
+    ):
+        source_b = (source or "").encode("utf-8")[:0xFFFF]
+        with self._lock:
+            if self._fd < 0:
+                return
+            spec_b = self._encode_spec(plan)
+            data = (
+                _RECORD.pack(
+                    started,
+                    duration,
+                    STATUS_OK if ok else STATUS_ERROR,
+                    len(source_b),
+                    len(spec_b),
+                )
+                + source_b
+                + spec_b
+            )
+            if self._size + len(data) > self.max_bytes and self._size > len(MAGIC):
+                self._rotate()
+            os.write(self._fd, data)
+            self._size += len(data)
+
+    def close(self):
+        with self._lock:
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+
+_active: Optional[ActionJournal] = None
+
+
+def open_journal(path: str, max_bytes: int = 16 << 20, backups: int = 3):
+    """Start journaling every executed action to `path`."""
+    global _active
+    journal = ActionJournal(path, max_bytes, backups)
+    previous, _active = _active, journal
+    if previous is not None:
+        previous.close()
+    return journal
+
+
+def get_journal() -> Optional[ActionJournal]:
+    return _active
+
+
+def close_journal():
+    global _active
+    journal, _active = _active, None
+    if journal is not None:
+        journal.close()
+
+
+def journal_files(path: str) -> List[str]:
+    """The journal and its rotated predecessors, oldest first."""
+    files = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        files.append(f"{path}.{i}")
+        i += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_journal(path: str) -> Iterator[JournalRecord]:
+    """Yield the records of one journal file, read through mmap.
+
+    A record cut short by a crash ends the iteration.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a TriggerFlow journal")
+            offset = len(MAGIC)
+            while offset + _RECORD.size <= size:
+                started, duration, status, source_len, spec_len = _RECORD.unpack_from(
+                    buf, offset
+                )
+                offset += _RECORD.size
+                end = offset + source_len + spec_len
+                if end > size:
+                    return
+                source = buf[offset : offset + source_len].decode("utf-8")
+                spec = json.loads(buf[offset + source_len : end])
+                offset = end
+                yield JournalRecord(
+                    started, duration, status == STATUS_OK, source, spec
+                )
+
+
+def read_journals(path: str) -> Iterator[JournalRecord]:
+    """Yield records from the journal and its rotated files, oldest first."""
+    for name in journal_files(path):
+        yield from read_journal(name)
+
+
+def _stub(plan, duration: float):
+    """Same type and backend queue, but the backend call just takes `duration`."""
+    return plan._replace(fn=time.sleep, args=(duration,), kwargs={})
+
+
+def replay(
+    records,
+    speed: float = 1.0,
+    stub: bool = False,
+    submit: Optional[Callable[..., bool]] = None,
+    stub_backends: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """Re-drive journaled actions with their original spacing.
+
+    speed scales time (10 = ten times faster, 0 = as fast as possible).
+    Actions go through the shared ActionExecutor, so backend queueing and
+    parallelism match a live session. stub (all actions) or stub_backends
+    (only those backends) replace the backend call with a sleep of the
+    recorded duration. Returns a summary dict.
+    """
+    from triggerflowlib.utils import actions
+    from triggerflowlib.utils.executor import get_action_executor
+
+    if submit is None:
+        submit = get_action_executor().submit
+    lock = Lock()
+    counts = {"replayed": 0, "dropped": 0, "errors": 0, "invalid": 0, "done": 0}
+    lag: List[float] = []
+    plans: Dict[str, Any] = {}
+    stub_backends = set(stub_backends)
+
+    def _done(_result, error):
+        with lock:
+            counts["done"] += 1
+            if error is not None:
+                counts["errors"] += 1
+
+    first = None
+    start = time.perf_counter()
+    for rec in records:
+        if first is None:
+            first = rec.started
+        key = json.dumps(rec.spec, sort_keys=True)
+        plan = plans.get(key)
+        if plan is None:
+            try:
+                plan = plans[key] = actions.compile_action(rec.spec)
+            except actions.ActionConfigError as e:
+                print(f"[journal] skipping unreplayable action: {e.errors[0]}")
+                counts["invalid"] += 1
+                continue
+        if stub or plan.backend in stub_backends:
+            plan = _stub(plan, rec.duration)
+        if speed > 0:
+            due = start + (rec.started - first) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            lag.append(max(0.0, time.perf_counter() - due))
+        if submit(plan, callback=_done, source=rec.source):
+            counts["replayed"] += 1
+        else:
+            counts["dropped"] += 1
+
+    deadline = time.monotonic() + 30.0
+    while counts["done"] < counts["replayed"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    summary: Dict[str, Any] = dict(counts)
+    summary["wall_s"] = time.perf_counter() - start
+    summary["max_submit_lag_ms"] = max(lag) * 1000.0 if lag else 0.0
+    return summary
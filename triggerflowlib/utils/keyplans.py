@@ -0,0 +1,742 @@
+"""Key combos compiled once into press/release plans, plus send backends.
+
+compile_keys() turns ['ctrl', 'shift', 'm'] into a KeyPlan: the virtual key
+codes to press (modifiers down, main keys tapped, modifiers released in
+reverse) and the optional delay between events. Plans are cached, so a
+combo is resolved once at config load, not on every press.
+compile_key_event() and compile_text() build the single-key down/up and
+text plans that macros use.
+
+Backends send a plan:
+  KeyboardLibBackend  Windows; the 'keyboard' library
+  SendInputBackend    Windows; one SendInput call per plan (or per delayed
+                      event) from a preallocated, cached INPUT array
+  XTestBackend        Linux/X11; XTest fake key events via python-xlib
+  UinputBackend       Linux (X11 or Wayland); a virtual keyboard through
+                      /dev/uinput via python-evdev
+  PyAutoGUIBackend    anywhere PyAutoGUI works; hotkey() or, with
+                      sequence=True, explicit keyDown/keyUp
+  RecordingBackend    records the event batches instead; for tests and
+                      benchmarks on any platform
+
+KeyInjector walks a list of backend factories, creating each backend the
+first time it is needed, and remembers per plan which backend worked.
+Optional libraries are imported only when their backend is created.
+"""
+
+import ctypes
+import time
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from triggerflowlib.utils import stats
+
+MODIFIERS = frozenset(
+    {
+        "ctrl",
+        "alt",
+        "shift",
+        "win",
+        "lctrl",
+        "rctrl",
+        "lalt",
+        "ralt",
+        "lshift",
+        "rshift",
+        "lwin",
+        "rwin",
+    }
+)
+
+_VK_CODES = {
+    "ctrl": 0x11,  # VK_CONTROL
+    "control": 0x11,
+    "lctrl": 0xA2,  # VK_LCONTROL
+    "rctrl": 0xA3,  # VK_RCONTROL
+    "alt": 0x12,  # VK_MENU
+    "lalt": 0xA4,  # VK_LMENU
+    "ralt": 0xA5,  # VK_RMENU
+    "shift": 0x10,  # VK_SHIFT
+    "lshift": 0xA0,  # VK_LSHIFT
+    "rshift": 0xA1,  # VK_RSHIFT
+    "win": 0x5B,  # VK_LWIN
+    "lwin": 0x5B,  # VK_LWIN
+    "rwin": 0x5C,  # VK_RWIN
+    "backspace": 0x08,
+    "tab": 0x09,
+    "enter": 0x0D,
+    "return": 0x0D,
+    "pause": 0x13,
+    "capslock": 0x14,
+    "esc": 0x1B,
+    "escape": 0x1B,
+    "space": 0x20,
+    "pageup": 0x21,
+    "pagedown": 0x22,
+    "end": 0x23,
+    "home": 0x24,
+    "left": 0x25,
+    "up": 0x26,
+    "right": 0x27,
+    "down": 0x28,
+    "printscreen": 0x2C,
+    "insert": 0x2D,
+    "delete": 0x2E,
+    "del": 0x2E,
+    "numlock": 0x90,
+    "scrolllock": 0x91,
+    "volumemute": 0xAD,
+    "volumedown": 0xAE,
+    "volumeup": 0xAF,
+    "nexttrack": 0xB0,
+    "prevtrack": 0xB1,
+    "stop": 0xB2,
+    "playpause": 0xB3,
+}
+
+# keys that need KEYEVENTF_EXTENDEDKEY (right-hand modifiers, navigation block)
+EXTENDED_VKS = frozenset(
+    {0xA3, 0xA5, 0x5B, 0x5C, 0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28}
+    | {0x2C, 0x2D, 0x2E, 0x90}
+)
+
+
+# VK code -> (X keysym name, Linux input event code name)
+_LINUX_NAMES = {
+    0x11: ("Control_L", "KEY_LEFTCTRL"),
+    0xA2: ("Control_L", "KEY_LEFTCTRL"),
+    0xA3: ("Control_R", "KEY_RIGHTCTRL"),
+    0x12: ("Alt_L", "KEY_LEFTALT"),
+    0xA4: ("Alt_L", "KEY_LEFTALT"),
+    0xA5: ("Alt_R", "KEY_RIGHTALT"),
+    0x10: ("Shift_L", "KEY_LEFTSHIFT"),
+    0xA0: ("Shift_L", "KEY_LEFTSHIFT"),
+    0xA1: ("Shift_R", "KEY_RIGHTSHIFT"),
+    0x5B: ("Super_L", "KEY_LEFTMETA"),
+    0x5C: ("Super_R", "KEY_RIGHTMETA"),
+    0x08: ("BackSpace", "KEY_BACKSPACE"),
+    0x09: ("Tab", "KEY_TAB"),
+    0x0D: ("Return", "KEY_ENTER"),
+    0x13: ("Pause", "KEY_PAUSE"),
+    0x14: ("Caps_Lock", "KEY_CAPSLOCK"),
+    0x1B: ("Escape", "KEY_ESC"),
+    0x20: ("space", "KEY_SPACE"),
+    0x21: ("Prior", "KEY_PAGEUP"),
+    0x22: ("Next", "KEY_PAGEDOWN"),
+    0x23: ("End", "KEY_END"),
+    0x24: ("Home", "KEY_HOME"),
+    0x25: ("Left", "KEY_LEFT"),
+    0x26: ("Up", "KEY_UP"),
+    0x27: ("Right", "KEY_RIGHT"),
+    0x28: ("Down", "KEY_DOWN"),
+    0x2C: ("Print", "KEY_SYSRQ"),
+    0x2D: ("Insert", "KEY_INSERT"),
+    0x2E: ("Delete", "KEY_DELETE"),
+    0x90: ("Num_Lock", "KEY_NUMLOCK"),
+    0x91: ("Scroll_Lock", "KEY_SCROLLLOCK"),
+    0xAD: ("XF86AudioMute", "KEY_MUTE"),
+    0xAE: ("XF86AudioLowerVolume", "KEY_VOLUMEDOWN"),
+    0xAF: ("XF86AudioRaiseVolume", "KEY_VOLUMEUP"),
+    0xB0: ("XF86AudioNext", "KEY_NEXTSONG"),
+    0xB1: ("XF86AudioPrev", "KEY_PREVIOUSSONG"),
+    0xB2: ("XF86AudioStop", "KEY_STOPCD"),
+    0xB3: ("XF86AudioPlay", "KEY_PLAYPAUSE"),
+}
+
+
+def vk_code_for(key: str) -> Optional[int]:
+    """Windows virtual key code for a key token, or None if unknown."""
+    k = key.lower()
+    if k in _VK_CODES:
+        return _VK_CODES[k]
+    if k.startswith("f") and k[1:].isdigit():
+        n = int(k[1:])
+        if 1 <= n <= 24:
+            return 0x70 + (n - 1)  # VK_F1 .. VK_F24
+    if k.startswith("num") and k[3:].isdigit() and len(k) == 4:
+        return 0x60 + int(k[3])  # VK_NUMPAD0 .. VK_NUMPAD9
+    if len(k) == 1:
+        o = ord(k.upper())
+        if 0x30 <= o <= 0x39 or 0x41 <= o <= 0x5A:
+            return o  # digits 0-9, letters A-Z
+    return None
+
+
+def linux_names_for(vk: int) -> Optional[Tuple[str, str]]:
+    """(X keysym name, Linux KEY_* name) for a VK code, or None if unknown."""
+    names = _LINUX_NAMES.get(vk)
+    if names is not None:
+        return names
+    if 0x70 <= vk <= 0x87:
+        n = vk - 0x6F
+        return f"F{n}", f"KEY_F{n}"
+    if 0x60 <= vk <= 0x69:
+        n = vk - 0x60
+        return f"KP_{n}", f"KEY_KP{n}"
+    if 0x30 <= vk <= 0x39 or 0x41 <= vk <= 0x5A:
+        ch = chr(vk)
+        return ch.lower(), f"KEY_{ch}"
+    return None
+
+
+class KeyEvent(NamedTuple):
+    vk: int
+    up: bool
+    extended: bool
+
+
+class KeyPlan(NamedTuple):
+    """A compiled combo, single key transition or text.
+
+    keys: normalized tokens (for backends that take names); for "text" the
+        text itself
+    events: press/release sequence, or () if a key has no VK code
+    delay: seconds between events; 0 sends all events at once
+    mode: "tap" (press and release the combo), "down", "up" or "text"
+    """
+
+    keys: Tuple[str, ...]
+    events: Tuple[KeyEvent, ...]
+    delay: float = 0.0
+    mode: str = "tap"
+
+    def batches(self) -> Tuple[Tuple[KeyEvent, ...], ...]:
+        """Events grouped into the chunks sent without a pause in between."""
+        if not self.events:
+            return ()
+        if self.delay <= 0:
+            return (self.events,)
+        return tuple((ev,) for ev in self.events)
+
+
+_plans: Dict[tuple, KeyPlan] = {}  # (keys, delay) or (keys, "down"/"up")
+_plans_lock = Lock()
+
+
+def compile_keys(keys: Sequence[str], delay_ms: float = 0.0) -> KeyPlan:
+    """Compile (or fetch the cached plan for) a key combo.
+
+    Raises ValueError for an empty combo or negative delay. Keys without a
+    VK code still compile; their plan has no events and only name-based
+    backends (PyAutoGUI) can send it.
+    """
+    norm = tuple(str(k).strip().lower() for k in keys or ())
+    if not norm or any(not k for k in norm):
+        raise ValueError("key combo must be a non-empty list of key names")
+    delay = float(delay_ms) / 1000.0
+    if delay < 0:
+        raise ValueError("delay_ms must not be negative")
+    cache_key = (norm, delay)
+    plan = _plans.get(cache_key)
+    if plan is not None:
+        return plan
+
+    mods = [k for k in norm if k in MODIFIERS]
+    mains = [k for k in norm if k not in MODIFIERS]
+    vks = {k: vk_code_for(k) for k in norm}
+    events: Tuple[KeyEvent, ...] = ()
+    if all(vk is not None for vk in vks.values()):
+        seq: List[KeyEvent] = []
+        for m in mods:
+            seq.append(KeyEvent(vks[m], False, vks[m] in EXTENDED_VKS))
+        for k in mains:
+            ext = vks[k] in EXTENDED_VKS
+            seq.append(KeyEvent(vks[k], False, ext))
+            seq.append(KeyEvent(vks[k], True, ext))
+        for m in reversed(mods):
+            seq.append(KeyEvent(vks[m], True, vks[m] in EXTENDED_VKS))
+        events = tuple(seq)
+    plan = KeyPlan(norm, events, delay)
+    with _plans_lock:
+        return _plans.setdefault(cache_key, plan)
+
+
+def _label(plan: KeyPlan) -> str:
+    return " + ".join(plan.keys)
+
+
+def _pause_between(plan: KeyPlan, index: int):
+    if index and plan.delay:
+        time.sleep(plan.delay)
+
+
+def compile_key_event(key: str, up: bool) -> KeyPlan:
+    """Plan that only presses (up=False) or only releases one key."""
+    name = str(key).strip().lower()
+    if not name:
+        raise ValueError("key name must not be empty")
+    mode = "up" if up else "down"
+    cache_key = ((name,), mode)
+    plan = _plans.get(cache_key)
+    if plan is None:
+        vk = vk_code_for(name)
+        events = () if vk is None else (KeyEvent(vk, up, vk in EXTENDED_VKS),)
+        with _plans_lock:
+            plan = _plans.setdefault(cache_key, KeyPlan((name,), events, 0.0, mode))
+    return plan
+
+
+_SHIFT = KeyEvent(0x10, False, False)
+_SHIFT_UP = KeyEvent(0x10, True, False)
+_TEXT_VKS = {" ": 0x20, "\n": 0x0D, "\t": 0x09}
+
+
+def compile_text(text: str) -> KeyPlan:
+    """Plan that types `text`.
+
+    Letters, digits, space, tab and newline become key events (with shift
+    for capitals). Other characters depend on the keyboard layout, so such
+    text gets no events and is typed by a name-based backend.
+    """
+    text = str(text)
+    if not text:
+        raise ValueError("text must not be empty")
+    seq: List[KeyEvent] = []
+    for ch in text:
+        vk = _TEXT_VKS.get(ch)
+        upper = ch.isascii() and ch.isalpha() and ch.isupper()
+        if vk is None and ch.isascii() and ch.isalnum():
+            vk = ord(ch.upper())
+        if vk is None:
+            seq = []
+            break
+        if upper:
+            seq.append(_SHIFT)
+        seq.append(KeyEvent(vk, False, False))
+        seq.append(KeyEvent(vk, True, False))
+        if upper:
+            seq.append(_SHIFT_UP)
+    return KeyPlan((text,), tuple(seq), 0.0, "text")
+
+
+# --- SendInput structures (winuser.h); full union so sizeof(INPUT) is right ---
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+MAPVK_VK_TO_VSC = 0
+
+_ULONG_PTR = ctypes.c_size_t
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", ctypes.c_ushort),
+        ("wScan", ctypes.c_ushort),
+        ("dwFlags", ctypes.c_uint),
+        ("time", ctypes.c_uint),
+        ("dwExtraInfo", _ULONG_PTR),
+    ]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", ctypes.c_int),
+        ("dy", ctypes.c_int),
+        ("mouseData", ctypes.c_uint),
+        ("dwFlags", ctypes.c_uint),
+        ("time", ctypes.c_uint),
+        ("dwExtraInfo", _ULONG_PTR),
+    ]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [
+        ("uMsg", ctypes.c_uint),
+        ("wParamL", ctypes.c_ushort),
+        ("wParamH", ctypes.c_ushort),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _anonymous_ = ("u",)
+    _fields_ = [("type", ctypes.c_uint), ("u", _INPUTUNION)]
+
+
+class SendInputBackend:
+    """Sends a plan with one SendInput call per batch.
+
+    Prototypes are set once, scan codes are looked up once per VK, and each
+    plan's INPUT arrays are built on first send and reused afterwards.
+    user32 can be injected for testing.
+    """
+
+    name = "sendinput"
+
+    def __init__(self, user32=None):
+        if user32 is None:
+            user32 = ctypes.windll.user32  # AttributeError off Windows
+        self._user32 = user32
+        user32.SendInput.argtypes = [ctypes.c_uint, ctypes.POINTER(INPUT), ctypes.c_int]
+        user32.SendInput.restype = ctypes.c_uint
+        user32.MapVirtualKeyW.argtypes = [ctypes.c_uint, ctypes.c_uint]
+        user32.MapVirtualKeyW.restype = ctypes.c_uint
+        self._input_size = ctypes.sizeof(INPUT)
+        self._scancodes: Dict[int, int] = {}
+        self._arrays: Dict[KeyPlan, Tuple[Tuple[ctypes.Array, int], ...]] = {}
+        self._lock = Lock()
+
+    def _scancode(self, vk: int) -> int:
+        sc = self._scancodes.get(vk)
+        if sc is None:
+            sc = self._scancodes[vk] = self._user32.MapVirtualKeyW(vk, MAPVK_VK_TO_VSC)
+        return sc
+
+    def _build(self, plan: KeyPlan) -> Tuple[Tuple[ctypes.Array, int], ...]:
+        arrays = []
+        for batch in plan.batches():
+            arr = (INPUT * len(batch))()
+            for inp, ev in zip(arr, batch):
+                flags = KEYEVENTF_EXTENDEDKEY if ev.extended else 0
+                if ev.up:
+                    flags |= KEYEVENTF_KEYUP
+                inp.type = INPUT_KEYBOARD
+                inp.ki.wVk = ev.vk
+                inp.ki.wScan = self._scancode(ev.vk)
+                inp.ki.dwFlags = flags
+            arrays.append((arr, len(batch)))
+        return tuple(arrays)
+
+    def prepare(self, plan: KeyPlan):
+        """Build and cache the INPUT arrays for a plan ahead of the first press."""
+        if plan.events and plan not in self._arrays:
+            with self._lock:
+                if plan not in self._arrays:
+                    self._arrays[plan] = self._build(plan)
+
+    def is_prepared(self, plan: KeyPlan) -> bool:
+        return plan in self._arrays
+
+    def send(self, plan: KeyPlan) -> bool:
+        if not plan.events:
+            return False
+        arrays = self._arrays.get(plan)
+        if arrays is None:
+            self.prepare(plan)
+            arrays = self._arrays[plan]
+        for i, (arr, count) in enumerate(arrays):
+            _pause_between(plan, i)
+            if self._user32.SendInput(count, arr, self._input_size) != count:
+                return False
+        return True
+
+
+class KeyboardLibBackend:
+    """The 'keyboard' library's send(); works from key names."""
+
+    name = "keyboard_lib"
+
+    _NAMES = {
+        "lctrl": "left ctrl",
+        "rctrl": "right ctrl",
+        "lshift": "left shift",
+        "rshift": "right shift",
+        "lalt": "left alt",
+        "ralt": "right alt",
+        "lwin": "left windows",
+        "rwin": "right windows",
+        "win": "windows",
+    }
+
+    def __init__(self):
+        import keyboard
+
+        self._kb = keyboard
+        self._combos: Dict[KeyPlan, str] = {}
+
+    @classmethod
+    def combo_for(cls, keys: Sequence[str]) -> str:
+        """['lctrl', 'rshift', 'f10'] -> 'left ctrl+right shift+f10'"""
+        return "+".join(cls._NAMES.get(k, k) for k in keys)
+
+    def send(self, plan: KeyPlan) -> bool:
+        if plan.mode == "text":
+            self._kb.write(plan.keys[0])
+            return True
+        combo = self._combos.get(plan)
+        if combo is None:
+            combo = self._combos[plan] = self.combo_for(plan.keys)
+        if plan.mode == "down":
+            self._kb.press(combo)
+        elif plan.mode == "up":
+            self._kb.release(combo)
+        else:
+            self._kb.send(combo, do_press=True, do_release=True)
+        return True
+
+
+class XTestBackend:
+    """X11 XTest fake key events; the keycode for each VK is looked up once."""
+
+    name = "xtest"
+
+    def __init__(self, display_name: Optional[str] = None):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+
+        self._display = display.Display(display_name)
+        if not self._display.has_extension("XTEST"):
+            self._display.close()
+            raise RuntimeError("X server has no XTEST extension")
+        self._X = X
+        self._XK = XK
+        self._xtest = xtest
+        self._keycodes: Dict[int, int] = {}
+
+    def _keycode(self, vk: int) -> int:
+        code = self._keycodes.get(vk)
+        if code is None:
+            names = linux_names_for(vk)
+            keysym = self._XK.string_to_keysym(names[0]) if names else 0
+            code = self._display.keysym_to_keycode(keysym) if keysym else 0
+            self._keycodes[vk] = code
+        return code
+
+    def send(self, plan: KeyPlan) -> bool:
+        if not plan.events or not all(self._keycode(ev.vk) for ev in plan.events):
+            return False
+        for i, batch in enumerate(plan.batches()):
+            _pause_between(plan, i)
+            for ev in batch:
+                kind = self._X.KeyRelease if ev.up else self._X.KeyPress
+                self._xtest.fake_input(self._display, kind, self._keycodes[ev.vk])
+            self._display.sync()
+        return True
+
+
+class UinputBackend:
+    """A virtual keyboard on /dev/uinput (python-evdev); works under Wayland.
+
+    Needs write access to /dev/uinput (root or the 'input' group, depending
+    on the distribution).
+    """
+
+    name = "uinput"
+
+    def __init__(self):
+        from evdev import UInput, ecodes
+
+        self._ecodes = ecodes
+        codes = {
+            getattr(ecodes, names[1])
+            for names in (linux_names_for(vk) for vk in range(256))
+            if names is not None and hasattr(ecodes, names[1])
+        }
+        self._ui = UInput({ecodes.EV_KEY: sorted(codes)}, name="triggerflow-keys")
+        self._plans: Dict[KeyPlan, Optional[tuple]] = {}
+
+    def _compile(self, plan: KeyPlan) -> Optional[tuple]:
+        batches = []
+        for batch in plan.batches():
+            writes = []
+            for ev in batch:
+                names = linux_names_for(ev.vk)
+                code = getattr(self._ecodes, names[1], None) if names else None
+                if code is None:
+                    return None
+                writes.append((code, 0 if ev.up else 1))
+            batches.append(tuple(writes))
+        return tuple(batches)
+
+    def send(self, plan: KeyPlan) -> bool:
+        if plan not in self._plans:
+            self._plans[plan] = self._compile(plan)
+        batches = self._plans[plan]
+        if not batches:
+            return False
+        ev_key = self._ecodes.EV_KEY
+        for i, batch in enumerate(batches):
+            _pause_between(plan, i)
+            for code, value in batch:
+                self._ui.write(ev_key, code, value)
+                self._ui.syn()
+        return True
+
+    def close(self):
+        self._ui.close()
+
+
+class PyAutoGUIBackend:
+    """PyAutoGUI hotkey(), or an explicit keyDown/keyUp sequence."""
+
+    def __init__(self, sequence: bool = False):
+        import pyautogui
+
+        pyautogui.FAILSAFE = False  # avoid abort if mouse hits top-left
+        pyautogui.PAUSE = 0.02  # small delay between actions
+        self._gui = pyautogui
+        self._sequence = sequence
+        self.name = "pyautogui_sequence" if sequence else "pyautogui"
+
+    def send(self, plan: KeyPlan) -> bool:
+        if plan.mode == "text":
+            self._gui.write(plan.keys[0], interval=plan.delay)
+            return True
+        if plan.mode == "down":
+            for k in plan.keys:
+                self._gui.keyDown(k)
+            return True
+        if plan.mode == "up":
+            for k in reversed(plan.keys):
+                self._gui.keyUp(k)
+            return True
+        if not self._sequence:
+            self._gui.hotkey(*plan.keys, interval=plan.delay)
+            return True
+        mods = [k for k in plan.keys if k in MODIFIERS]
+        mains = [k for k in plan.keys if k not in MODIFIERS]
+        for m in mods:
+            self._gui.keyDown(m)
+            time.sleep(plan.delay)
+        for k in mains:
+            self._gui.press(k)
+            time.sleep(plan.delay)
+        for m in reversed(mods):
+            self._gui.keyUp(m)
+            time.sleep(plan.delay)
+        return True
+
+
+class RecordingBackend:
+    """Records what would be sent: one tuple of KeyEvents per batch."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.batches: List[Tuple[KeyEvent, ...]] = []
+        self.plans: List[KeyPlan] = []
+
+    def send(self, plan: KeyPlan) -> bool:
+        if not plan.events:
+            return False
+        self.plans.append(plan)
+        self.batches.extend(plan.batches())
+        return True
+
+
+BackendFactory = Tuple[str, Callable[[], Any]]
+
+
+class KeyInjector:
+    """Sends plans through the first backend that works for them.
+
+    Backends are created from `factories` (name, zero-arg callable) the
+    first time the chain reaches them; a factory that raises marks its
+    backend unavailable for the rest of the session. The backend that
+    sends a plan successfully is remembered for that plan and tried first
+    (and alone, while it keeps working) on later presses. After
+    `demote_after` consecutive failures it is dropped and the chain is
+    probed again.
+    """
+
+    def __init__(self, factories: Sequence[BackendFactory], demote_after: int = 3):
+        self._factories = list(factories)
+        self.demote_after = max(1, int(demote_after))
+        self._backends: Dict[str, Any] = {}  # name -> backend, None if unavailable
+        self._winners: Dict[KeyPlan, str] = {}
+        self._failures: Dict[KeyPlan, int] = {}
+        self._lock = Lock()
+
+    @property
+    def names(self) -> List[str]:
+        return [name for name, _factory in self._factories]
+
+    def _backend(self, name: str, factory: Callable[[], Any]):
+        if name not in self._backends:
+            with self._lock:
+                if name not in self._backends:
+                    try:
+                        self._backends[name] = factory()
+                    except Exception as e:
+                        print(f"[keyboard] {name} backend unavailable: {e}")
+                        self._backends[name] = None
+        return self._backends[name]
+
+    def loaded(self) -> List[Any]:
+        """Backends created so far."""
+        return [b for b in self._backends.values() if b is not None]
+
+    def prepare(self, plan: KeyPlan) -> Optional[str]:
+        """Create the backend send() would try first and let it prepare `plan`.
+
+        Called at config load, so the first press doesn't pay for backend
+        creation or for building the plan's native arrays. Returns the
+        backend's name, or None if no backend is available.
+        """
+        winner = self._winners.get(plan)
+        for name, factory in self._factories:
+            if winner is not None and name != winner:
+                continue
+            backend = self._backend(name, factory)
+            if backend is None:
+                continue
+            if hasattr(backend, "prepare"):
+                backend.prepare(plan)
+            return name
+        return None
+
+    def winner(self, plan: KeyPlan) -> Optional[str]:
+        return self._winners.get(plan)
+
+    def _try(self, name: str, backend, plan: KeyPlan) -> bool:
+        with stats.timer("plugin", f"keyboard.{name}") as t:
+            try:
+                ok = bool(backend.send(plan))
+            except Exception as e:
+                print(f"[keyboard] {name} failed for {_label(plan)}: {e}")
+                ok = False
+            t.error = not ok
+        return ok
+
+    def send(self, plan: KeyPlan) -> bool:
+        # The keyboard queue and the macro thread both send; winners and
+        # failure counts only change under the lock (never held while sending).
+        winner = self._winners.get(plan)
+        if winner is not None:
+            if self._try(winner, self._backends[winner], plan):
+                if plan in self._failures:
+                    with self._lock:
+                        self._failures.pop(plan, None)
+                return True
+            demoted = False
+            with self._lock:
+                # skip if another thread already demoted or replaced it
+                if self._winners.get(plan) == winner:
+                    failures = self._failures.get(plan, 0) + 1
+                    if failures >= self.demote_after:
+                        del self._winners[plan]
+                        self._failures.pop(plan, None)
+                        demoted = True
+                    else:
+                        self._failures[plan] = failures
+            if demoted:
+                print(
+                    f"[keyboard] {winner} failed {failures}x for {_label(plan)}; "
+                    "probing other backends"
+                )
+        for name, factory in self._factories:
+            if name == winner:
+                continue
+            backend = self._backend(name, factory)
+            if backend is None or not self._try(name, backend, plan):
+                continue
+            with self._lock:
+                if plan not in self._winners:
+                    self._winners[plan] = name
+                    print(f"[keyboard] {_label(plan)} -> {name}")
+            return True
+        print(f"[keyboard] all backends failed for {_label(plan)}")
+        return False
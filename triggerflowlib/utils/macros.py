@@ -0,0 +1,286 @@
+"""Timed key macros, compiled once and run on a dedicated thread.
+
+A macro is a list of steps, each with exactly one of:
+
+    down: shift        hold a key
+    up: shift          release it
+    tap: f13           press and release a key
+    keys: [ctrl, v]    press a chord, like key_press
+    text: "gg"         type text
+    wait: 50           pause, in milliseconds
+
+compile_macro() gives every step an absolute offset from the macro's start.
+The macro thread sleeps until start + offset on time.perf_counter() and
+spins for the last couple of milliseconds, so a step that runs late does
+not push the following ones back and lateness never accumulates. On
+Windows the system timer is raised to 1 ms while a macro runs.
+
+Pressing the same macro again while it is running or queued cancels it
+(on_repress: cancel), cancels and starts it over (restart) or queues
+another run (queue). Keys a macro still holds when it ends or is
+cancelled are released.
+
+Macro steps go through keyboard_utils.send_plan like every other key
+action, one plan at a time under its send lock; nothing is held across
+waits. Macro actions have their own executor queue, which only hands runs
+to the macro thread, so a re-press never waits behind key actions.
+"""
+
+import ctypes
+import platform
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition, Event, Thread
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from triggerflowlib.utils import stats
+from triggerflowlib.utils.keyplans import (
+    KeyPlan,
+    compile_key_event,
+    compile_keys,
+    compile_text,
+)
+
+REPRESS_MODES = ("cancel", "restart", "queue")
+_STEP_KINDS = ("down", "up", "tap", "keys", "text", "wait")
+
+# the last stretch before a deadline is busy-waited instead of slept
+SPIN_SECONDS = 0.002
+
+
+class MacroStep(NamedTuple):
+    at: float  # seconds from the macro's start
+    plan: KeyPlan
+
+
+class Macro(NamedTuple):
+    name: str
+    steps: Tuple[MacroStep, ...]
+    duration: float  # nominal run time in seconds
+    repress: str = "cancel"
+
+
+def compile_macro(steps, repress: str = "cancel", name: str = "macro") -> Macro:
+    """Validate and compile macro steps (see module docstring).
+
+    Raises KeyError or ValueError naming the first bad step.
+    """
+    if not isinstance(steps, (list, tuple)) or not steps:
+        raise KeyError("macro requires a non-empty 'steps' list")
+    if repress not in REPRESS_MODES:
+        raise ValueError(f"on_repress must be one of {', '.join(REPRESS_MODES)}")
+    at = 0.0
+    compiled: List[MacroStep] = []
+    for i, step in enumerate(steps):
+        where = f"steps[{i}]"
+        if not isinstance(step, dict):
+            raise ValueError(f"{where} must be a mapping")
+        kinds = [k for k in _STEP_KINDS if k in step]
+        if len(kinds) != 1 or len(step) != 1:
+            raise KeyError(f"{where} needs exactly one of {', '.join(_STEP_KINDS)}")
+        kind = kinds[0]
+        value = step[kind]
+        try:
+            if kind == "wait":
+                ms = float(value)
+                if ms < 0:
+                    raise ValueError("wait must not be negative")
+                at += ms / 1000.0
+                continue
+            if kind == "keys":
+                if not isinstance(value, (list, tuple)):
+                    raise ValueError("keys must be a list")
+                plan = compile_keys([str(k) for k in value])
+            elif kind == "text":
+                plan = compile_text(value)
+            elif kind == "tap":
+                plan = compile_keys([str(value)])
+            else:
+                plan = compile_key_event(str(value), up=kind == "up")
+        except ValueError as e:
+            raise ValueError(f"{where}: {e}") from e
+        compiled.append(MacroStep(at, plan))
+    return Macro(name, tuple(compiled), at, repress)
+
+
+class MacroRun:
+    """One submitted run of a macro."""
+
+    def __init__(self, macro: Macro):
+        self.macro = macro
+        self.cancelled = Event()
+        self.done = Event()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.sent = 0
+        self.failed = 0
+        self.max_late = 0.0  # worst step lateness in seconds
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+@contextmanager
+def _timer_resolution():
+    """1 ms system timer on Windows while a macro runs; no-op elsewhere."""
+    winmm = None
+    if platform.system() == "Windows":
+        try:
+            winmm = ctypes.windll.winmm
+            winmm.timeBeginPeriod(1)
+        except Exception:
+            winmm = None
+    try:
+        yield
+    finally:
+        if winmm is not None:
+            winmm.timeEndPeriod(1)
+
+
+def _sleep_until(deadline: float, cancelled: Event) -> bool:
+    """Wait until `deadline` (perf_counter); False if cancelled first."""
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= SPIN_SECONDS:
+            break
+        if cancelled.wait(remaining - SPIN_SECONDS):
+            return False
+    while time.perf_counter() < deadline:
+        if cancelled.is_set():
+            return False
+    return not cancelled.is_set()
+
+
+class MacroRunner:
+    """Runs macros one at a time on a dedicated daemon thread.
+
+    `send` sends one KeyPlan (default: keyboard_utils.send_plan).
+    """
+
+    def __init__(self, send: Optional[Callable[[KeyPlan], Any]] = None):
+        self._send = send
+        self._cv = Condition()
+        self._queue: Deque[MacroRun] = deque()
+        self._current: Optional[MacroRun] = None
+        self._thread: Optional[Thread] = None
+        self._stopping = False
+
+    def _send_plan(self, plan: KeyPlan) -> bool:
+        if self._send is None:
+            from triggerflowlib.utils.keyboard_utils import send_plan
+
+            self._send = send_plan
+        return bool(self._send(plan))
+
+    def play(self, macro: Macro) -> MacroRun:
+        """Queue a run, applying the macro's on_repress rule."""
+        with self._cv:
+            active = [r for r in self._queue if r.macro is macro]
+            if self._current is not None and self._current.macro is macro:
+                active.insert(0, self._current)
+            if active and macro.repress != "queue":
+                for run in active:
+                    run.cancel()
+                    if run in self._queue:
+                        self._queue.remove(run)
+                        run.done.set()
+                print(f"[Macro] {macro.name}: cancelled")
+                if macro.repress == "cancel":
+                    return active[0]
+            run = MacroRun(macro)
+            self._queue.append(run)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = Thread(target=self._loop, name="TriggerFlow-Macro")
+                self._thread.daemon = True
+                self._thread.start()
+            self._cv.notify()
+            return run
+
+    def cancel_all(self):
+        with self._cv:
+            for run in self._queue:
+                run.cancel()
+                run.done.set()
+            self._queue.clear()
+            if self._current is not None:
+                self._current.cancel()
+
+    def stop(self, timeout: float = 2.0):
+        self.cancel_all()
+        with self._cv:
+            self._stopping = True
+            self._cv.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                while not self._queue and not self._stopping:
+                    self._cv.wait()
+                if self._stopping:
+                    return
+                run = self._current = self._queue.popleft()
+            try:
+                self._execute(run)
+            except Exception as e:
+                print(f"[Macro] {run.macro.name} failed: {e}")
+            finally:
+                with self._cv:
+                    self._current = None
+                run.finished = time.perf_counter()
+                run.done.set()
+
+    def _execute(self, run: MacroRun):
+        held: Dict[str, KeyPlan] = {}  # key -> its release plan
+        with _timer_resolution():
+            start = run.started = time.perf_counter()
+            for step in run.macro.steps:
+                deadline = start + step.at
+                if not _sleep_until(deadline, run.cancelled):
+                    break
+                late = time.perf_counter() - deadline
+                if late > run.max_late:
+                    run.max_late = late
+                stats.record("plugin", "macro.step_late", late)
+                plan = step.plan
+                if self._send_plan(plan):
+                    run.sent += 1
+                else:
+                    run.failed += 1
+                if plan.mode == "down":
+                    held[plan.keys[0]] = compile_key_event(plan.keys[0], up=True)
+                elif plan.mode == "up":
+                    held.pop(plan.keys[0], None)
+            else:
+                # a trailing wait still counts as running (on_repress applies)
+                _sleep_until(start + run.macro.duration, run.cancelled)
+            for release in reversed(list(held.values())):
+                self._send_plan(release)
+
+
+_runner: Optional[MacroRunner] = None
+
+
+def get_macro_runner() -> MacroRunner:
+    global _runner
+    if _runner is None:
+        _runner = MacroRunner()
+    return _runner
+
+
+def play_macro(macro: Macro) -> MacroRun:
+    """Hand a macro to the macro thread; returns without waiting for it."""
+    return get_macro_runner().play(macro)
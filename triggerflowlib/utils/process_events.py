@@ -0,0 +1,297 @@
+"""Process start/exit event backends for ConditionWatcher.
+
+A backend owns a ProcessTracker and exposes two calls to the watcher thread:
+
+  poll()         -> list of ProcessEvent since the previous poll
+  wait(timeout)  -> block until events may be pending, timeout elapses or wake()
+
+PollingBackend is the portable fallback and simply re-diffs the pid table
+every interval. On Linux, ProcConnectorBackend subscribes to the kernel's
+netlink proc connector so exec/exit events arrive within milliseconds, and
+PidfdBackend uses pidfds for instant exits of watched processes plus a
+reconciliation scan for starts. Both sleep in select() while nothing happens.
+"""
+
+import errno
+import os
+import select
+import socket
+import struct
+import sys
+import time
+from threading import Event
+from typing import Callable, List, Optional
+
+# netlink / proc connector constants (linux/connector.h, linux/cn_proc.h)
+_NETLINK_CONNECTOR = 11
+_CN_IDX_PROC = 1
+_CN_VAL_PROC = 1
+_NLMSG_DONE = 3
+_PROC_CN_MCAST_LISTEN = 1
+_PROC_EVENT_FORK = 0x00000001
+_PROC_EVENT_EXEC = 0x00000002
+_PROC_EVENT_COMM = 0x00000200
+_PROC_EVENT_EXIT = 0x80000000
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_CN_MSG = struct.Struct("=IIIIHH")
+_PROC_EVENT_HDR = struct.Struct("=IIQ")
+_TWO_PIDS = struct.Struct("=II")
+_FOUR_PIDS = struct.Struct("=IIII")
+
+# how often event backends fall back to a full pid diff to catch anything missed
+RECONCILE_INTERVAL = 30.0
+
+
+class PollingBackend:
+    """Portable backend: diff the pid table every `interval` seconds."""
+
+    name = "polling"
+    event_driven = False
+
+    def __init__(self, tracker, interval: float = 2.0):
+        self._tracker = tracker
+        self._interval = interval
+        self._wake = Event()
+
+    def poll(self):
+        return self._tracker.poll()
+
+    def wait(self, timeout: Optional[float] = None):
+        self._wake.wait(self._interval if timeout is None else timeout)
+        self._wake.clear()
+
+    def wake(self):
+        self._wake.set()
+
+    def close(self):
+        self.wake()
+
+
+class _SelectBackend:
+    """Shared plumbing for backends that sleep in select() on fds + a wake pipe."""
+
+    event_driven = True
+
+    def __init__(self, tracker, reconcile_interval: float = RECONCILE_INTERVAL):
+        self._tracker = tracker
+        self._reconcile_interval = reconcile_interval
+        self._next_reconcile = 0.0
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+
+    def _fds(self) -> List[int]:
+        raise NotImplementedError
+
+    def _drain(self, ready: List[int]):
+        raise NotImplementedError
+
+    def poll(self):
+        events = []
+        now = time.monotonic()
+        if now >= self._next_reconcile:
+            events.extend(self._tracker.poll())
+            self._next_reconcile = now + self._reconcile_interval
+            self._after_reconcile(events)
+        ready, _, _ = select.select(self._fds(), [], [], 0)
+        events.extend(self._drain(ready))
+        return events
+
+    def _after_reconcile(self, events):
+        pass
+
+    def wait(self, timeout: Optional[float] = None):
+        until_reconcile = max(0.0, self._next_reconcile - time.monotonic())
+        if timeout is None or timeout > until_reconcile:
+            timeout = until_reconcile
+        try:
+            ready, _, _ = select.select(self._fds() + [self._wake_r], [], [], timeout)
+        except InterruptedError:
+            return
+        if self._wake_r in ready:
+            try:
+                while os.read(self._wake_r, 512):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        self.wake()
+
+
+class ProcConnectorBackend(_SelectBackend):
+    """Linux netlink proc connector: exec/exit notifications pushed by the kernel.
+
+    Needs CAP_NET_ADMIN (usually root); construction raises OSError otherwise.
+    """
+
+    name = "proc_connector"
+
+    def __init__(self, tracker, reconcile_interval: float = RECONCILE_INTERVAL):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, _NETLINK_CONNECTOR)
+        try:
+            sock.bind((0, _CN_IDX_PROC))
+            op = struct.pack("=I", _PROC_CN_MCAST_LISTEN)
+            cn = _CN_MSG.pack(_CN_IDX_PROC, _CN_VAL_PROC, 0, 0, len(op), 0)
+            payload = cn + op
+            hdr = _NLMSGHDR.pack(
+                _NLMSGHDR.size + len(payload), _NLMSG_DONE, 0, 0, sock.getsockname()[0]
+            )
+            sock.send(hdr + payload)
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        super().__init__(tracker, reconcile_interval)
+
+    def _fds(self):
+        return [self._sock.fileno()]
+
+    def _drain(self, ready):
+        events = []
+        if not ready:
+            return events
+        while True:
+            try:
+                data = self._sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # kernel dropped messages; force a full rescan on next poll
+                    self._next_reconcile = 0.0
+                    continue
+                raise
+            events.extend(self._parse(data))
+        return events
+
+    def _parse(self, data: bytes):
+        events = []
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            msg_len = _NLMSGHDR.unpack_from(data, offset)[0]
+            if msg_len < _NLMSGHDR.size:
+                break
+            base = offset + _NLMSGHDR.size + _CN_MSG.size
+            if base + _PROC_EVENT_HDR.size <= offset + msg_len:
+                what = _PROC_EVENT_HDR.unpack_from(data, base)[0]
+                body = base + _PROC_EVENT_HDR.size
+                events.extend(self._handle(what, data, body))
+            offset += (msg_len + 3) & ~3
+        return events
+
+    def _handle(self, what: int, data: bytes, body: int):
+        if what == _PROC_EVENT_FORK:
+            _ppid, _ptgid, pid, tgid = _FOUR_PIDS.unpack_from(data, body)
+            if pid == tgid:
+                return self._tracker.refresh_pid(pid)
+        elif what in (_PROC_EVENT_EXEC, _PROC_EVENT_COMM):
+            pid, tgid = _TWO_PIDS.unpack_from(data, body)
+            if pid == tgid:
+                return self._tracker.refresh_pid(pid)
+        elif what == _PROC_EVENT_EXIT:
+            pid, tgid = _TWO_PIDS.unpack_from(data, body)
+            if pid == tgid:
+                return self._tracker.remove_pid(pid)
+        return []
+
+    def close(self):
+        super().close()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class PidfdBackend(_SelectBackend):
+    """Linux pidfd fallback: instant exit events for watched processes.
+
+    Starts are only seen by the reconciliation scan, which therefore runs at
+    the watcher's poll interval instead of RECONCILE_INTERVAL.
+    """
+
+    name = "pidfd"
+
+    def __init__(self, tracker, interval: float, interested: Callable[[str], bool]):
+        if not hasattr(os, "pidfd_open"):
+            raise OSError(errno.ENOSYS, "pidfd_open not available")
+        # probe on ourselves so unsupported kernels fail here, not mid-run
+        os.close(os.pidfd_open(os.getpid()))
+        self._interested = interested
+        self._pidfds = {}  # fd -> pid
+        super().__init__(tracker, interval)
+
+    def _after_reconcile(self, events):
+        watched = set(self._pidfds.values())
+        for name, pids in self._tracker.index.items():
+            if not self._interested(name):
+                continue
+            for pid in pids:
+                if pid in watched:
+                    continue
+                try:
+                    self._pidfds[os.pidfd_open(pid)] = pid
+                except OSError:
+                    # already gone; the next reconcile will notice
+                    continue
+
+    def _fds(self):
+        return list(self._pidfds)
+
+    def _drain(self, ready):
+        events = []
+        for fd in ready:
+            pid = self._pidfds.pop(fd, None)
+            if pid is None:
+                continue
+            os.close(fd)
+            events.extend(self._tracker.remove_pid(pid))
+        return events
+
+    def close(self):
+        super().close()
+        for fd in list(self._pidfds):
+            os.close(fd)
+        self._pidfds.clear()
+
+
+def create_backend(
+    kind: str,
+    tracker,
+    interval: float,
+    interested: Callable[[str], bool] = lambda _name: True,
+):
+    """Build a process event backend.
+
+    kind: "auto" (best available), "proc_connector", "pidfd" or "polling".
+    "auto" tries the Linux backends in that order and falls back to polling.
+    """
+    kind = (kind or "auto").lower()
+    if kind not in ("auto", "proc_connector", "pidfd", "polling"):
+        raise ValueError(f"unknown process event backend: {kind}")
+    if sys.platform.startswith("linux"):
+        if kind in ("auto", "proc_connector"):
+            try:
+                return ProcConnectorBackend(tracker)
+            except (OSError, AttributeError) as e:
+                if kind != "auto":
+                    raise
+                print(f"[ConditionWatcher] proc connector unavailable ({e})")
+        if kind in ("auto", "pidfd"):
+            try:
+                return PidfdBackend(tracker, interval, interested)
+            except OSError as e:
+                if kind != "auto":
+                    raise
+                print(f"[ConditionWatcher] pidfd unavailable ({e})")
+    elif kind != "auto" and kind != "polling":
+        raise OSError(errno.ENOSYS, f"{kind} backend requires Linux")
+    return PollingBackend(tracker, interval)
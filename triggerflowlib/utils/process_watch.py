@@ -1,65 +1,665 @@
+import heapq
+import re
+import time
+from collections import deque
 from threading import Event, Thread
-from typing import List, Dict, Any, Optional
+from typing import (
+    Callable,
+    Iterable,
+    List,
+    Dict,
+    Any,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import psutil
 
-from triggerflowlib.utils import actions
+from triggerflowlib.utils.executor import KeyedExecutor, get_action_executor
+from triggerflowlib.utils.process_events import create_backend
 
 
-class ProcessCondition:
+def snapshot_process_names() -> Dict[str, Set[int]]:
+    """Scan the process table once and index it as lowercase name -> pids."""
+    index: Dict[str, Set[int]] = {}
+    for p in psutil.process_iter(attrs=["name"]):
+        try:
+            name = (p.info.get("name") or "").lower()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+        if name:
+            index.setdefault(name, set()).add(p.pid)
+    return index
+
+
+_NO_CHANGES: Tuple = ()
+
+
+class ProcessEvent(NamedTuple):
+    kind: str  # "started" or "exited"
+    pid: int
+    name: str
+
+
+def _resolve_pid(pid: int) -> Optional[Tuple[float, str]]:
+    """Return (create_time, lowercase name) for a pid, or None if it is gone."""
+    try:
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            return proc.create_time(), (proc.name() or "").lower()
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+        return None
+    except psutil.AccessDenied:
+        # cache the pid anyway so it is not re-resolved every poll
+        return 0.0, ""
+
+
+class ProcessTracker:
+    """Tracks the process table incrementally.
+
+    Keeps a pid -> (create_time, name) cache. Each poll() diffs psutil.pids()
+    against the cache, resolves names only for new pids and evicts pids that
+    vanished, so a steady-state poll costs little more than the pid listing.
+    Pids whose name a trigger watches (see watch()) are also re-resolved
+    every poll, and SWEEP_PER_POLL other pids in rotation, so a pid reused
+    by another process, or an exec under the same pid, shows up as
+    exited + started instead of keeping the old name.
+
+    list_pids and resolve replace the psutil calls, e.g. with a synthetic
+    process table for benchmarks.
+    """
+
+    SWEEP_PER_POLL = 32
+
+    def __init__(
+        self,
+        list_pids: Optional[Callable[[], Iterable[int]]] = None,
+        resolve: Optional[Callable[[int], Optional[Tuple[float, str]]]] = None,
+    ):
+        self._list_pids = list_pids or psutil.pids
+        self._resolve = resolve or _resolve_pid
+        self._cache: Dict[int, Tuple[float, str]] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._watched: Optional[Callable[[str], bool]] = None
+        self._watched_pids: Set[int] = set()
+        self._sweep: List[int] = []  # unwatched pids left to re-verify
+
+    @property
+    def index(self) -> Dict[str, Set[int]]:
+        """Live lowercase name -> pids index (do not mutate)."""
+        return self._by_name
+
+    def watch(self, predicate: Callable[[str], bool]):
+        """Re-verify pids whose name matches `predicate` on every poll()."""
+        self._watched = predicate
+        self._watched_pids = {
+            pid for pid, (_c, name) in self._cache.items() if name and predicate(name)
+        }
+
+    def name_of(self, pid: int) -> Optional[str]:
+        entry = self._cache.get(pid)
+        return entry[1] if entry else None
+
+    def poll(self) -> List[ProcessEvent]:
+        """Refresh the cache and return the started/exited events since last poll."""
+        current = set(self._list_pids())
+        events: List[ProcessEvent] = []
+        for pid in [pid for pid in self._cache if pid not in current]:
+            ev = self._evict(pid)
+            if ev:
+                events.append(ev)
+        for pid in list(self._watched_pids):
+            events.extend(self._verify(pid))
+        if not self._sweep:
+            self._sweep = [p for p in self._cache if p not in self._watched_pids]
+        for _ in range(min(self.SWEEP_PER_POLL, len(self._sweep))):
+            pid = self._sweep.pop()
+            if pid in self._cache and pid not in self._watched_pids:
+                events.extend(self._verify(pid))
+        for pid in current:
+            if pid not in self._cache:
+                ev = self._add(pid)
+                if ev:
+                    events.append(ev)
+        return events
+
+    def refresh_pid(self, pid: int) -> List[ProcessEvent]:
+        """Re-resolve a single pid (e.g. after exec) and return resulting events."""
+        events: List[ProcessEvent] = []
+        if pid in self._cache:
+            ev = self._evict(pid)
+            if ev:
+                events.append(ev)
+        ev = self._add(pid)
+        if ev:
+            events.append(ev)
+        # an exec that keeps the same name is not a transition
+        if len(events) == 2 and events[0].name == events[1].name:
+            return []
+        return events
+
+    def remove_pid(self, pid: int) -> List[ProcessEvent]:
+        """Forget a pid that is known to have exited."""
+        if pid not in self._cache:
+            return []
+        ev = self._evict(pid)
+        return [ev] if ev else []
+
+    def _verify(self, pid: int) -> List[ProcessEvent]:
+        cached = self._cache[pid]
+        entry = self._resolve(pid)
+        if (
+            entry is not None
+            and entry[1] == cached[1]
+            and abs(entry[0] - cached[0]) < 0.01
+        ):
+            return []
+        # reused pid or exec: the cached process is gone
+        events = [self._evict(pid)]
+        if entry is not None:
+            events.append(self._store(pid, entry))
+        return [ev for ev in events if ev]
+
+    def _add(self, pid: int) -> Optional[ProcessEvent]:
+        entry = self._resolve(pid)
+        if entry is None:
+            return None
+        return self._store(pid, entry)
+
+    def _store(self, pid: int, entry: Tuple[float, str]) -> Optional[ProcessEvent]:
+        self._cache[pid] = entry
+        name = entry[1]
+        if not name:
+            return None
+        self._by_name.setdefault(name, set()).add(pid)
+        if self._watched is not None and self._watched(name):
+            self._watched_pids.add(pid)
+        return ProcessEvent("started", pid, name)
+
+    def _evict(self, pid: int) -> Optional[ProcessEvent]:
+        _created, name = self._cache.pop(pid)
+        self._watched_pids.discard(pid)
+        if not name:
+            return None
+        pids = self._by_name.get(name)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self._by_name[name]
+        return ProcessEvent("exited", pid, name)
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a shell glob to an anchored regex without named groups.
+
+    Unlike fnmatch.translate, the result can be safely joined with others
+    into a single alternation.
+    """
+    out = ["^"]
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        i += 1
+        if ch == "*":
+            out.append(".*")
+        elif ch == "?":
+            out.append(".")
+        elif ch == "[":
+            j = i + 1 if i < n and pattern[i] == "!" else i
+            # a leading "]" is part of the set, as in fnmatch
+            end = pattern.find("]", j + 1 if j < n and pattern[j] == "]" else j)
+            if end < 0:
+                out.append("\\[")
+                continue
+            body = pattern[i:end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        else:
+            out.append(re.escape(ch))
+    out.append("\\Z")
+    return "".join(out)
+
+
+class NameMatcher:
+    """Maps a process name to every process condition that matches it.
+
+    Exact names are a dict lookup. All glob/regex patterns are compiled into
+    one combined expression that rejects non-matching names in a single pass,
+    and results are memoised per name, so the per-name cost stays flat as
+    triggers are added. The memo is dropped when it passes `memo_limit`
+    names, so short-lived helper processes can't grow it without bound.
+    """
+
+    memo_limit = 4096
+
+    def __init__(self, conds: List["ProcessCondition"]):
+        self._exact: Dict[str, List[ProcessCondition]] = {}
+        self._patterns: List[Tuple[Pattern, ProcessCondition]] = []
+        for c in conds:
+            if c.regex is None:
+                self._exact.setdefault(c.process, []).append(c)
+            else:
+                self._patterns.append((c.regex, c))
+        self._combined: Optional[Pattern] = None
+        if self._patterns:
+            try:
+                self._combined = re.compile(
+                    "|".join(f"(?:{rx.pattern})" for rx, _c in self._patterns),
+                    re.IGNORECASE,
+                )
+            except re.error:
+                # e.g. a pattern with global inline flags; check individually
+                self._combined = None
+        self._memo: Dict[str, Tuple[ProcessCondition, ...]] = {}
+
+    def match(self, name: str) -> Tuple["ProcessCondition", ...]:
+        hit = self._memo.get(name)
+        if hit is None:
+            found = list(self._exact.get(name, ()))
+            if self._patterns and (
+                self._combined is None or self._combined.search(name)
+            ):
+                found.extend(c for rx, c in self._patterns if rx.search(name))
+            if len(self._memo) >= self.memo_limit:
+                self._memo.clear()  # live names are memoised again next tick
+            hit = self._memo[name] = tuple(found)
+        return hit
+
+
+class ResourceSampler:
+    """Shared psutil sampling pass for one watcher tick.
+
+    System-wide figures are read at most once per tick and each pid's CPU/RSS
+    at most once, however many conditions ask for them. psutil.Process
+    handles are kept between ticks so cpu_percent() covers the time since the
+    previous sample.
+    """
+
+    def __init__(self):
+        self._procs: Dict[int, Any] = {}
+        self._tick: Dict[int, Optional[Tuple[float, float]]] = {}
+        self._system: Optional[Tuple[float, float]] = None
+
+    def begin_tick(self):
+        self._tick.clear()
+        self._system = None
+
+    def forget(self, pid: int):
+        self._procs.pop(pid, None)
+
+    def process(self, pid: int) -> Optional[Tuple[float, float]]:
+        """Return (cpu_percent, rss_mb) for pid, or None if it is gone."""
+        if pid in self._tick:
+            return self._tick[pid]
+        sample = None
+        try:
+            proc = self._procs.get(pid)
+            if proc is None:
+                proc = self._procs[pid] = psutil.Process(pid)
+            with proc.oneshot():
+                sample = (
+                    proc.cpu_percent(interval=None),
+                    proc.memory_info().rss / (1024 * 1024),
+                )
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            self._procs.pop(pid, None)
+        self._tick[pid] = sample
+        return sample
+
+    def system(self) -> Tuple[float, float]:
+        """Return system-wide (cpu_percent, memory_percent)."""
+        if self._system is None:
+            self._system = (
+                psutil.cpu_percent(interval=None),
+                psutil.virtual_memory().percent,
+            )
+        return self._system
+
+
+class Condition:
+    """Base for watched conditions: actions, scheduling and hysteresis."""
+
+    type = ""
+    # conditions that read CPU/memory must be polled even with event backends
+    needs_sampling = False
+
     def __init__(
         self,
-        process: str,
         label: Optional[str] = None,
         on_enter: Optional[List[Dict[str, Any]]] = None,
         on_exit: Optional[List[Dict[str, Any]]] = None,
+        key: Optional[str] = None,
+        interval: float = 2.0,
+        adaptive: bool = False,
+        max_interval: float = 30.0,
+        wake_on: Optional[List[str]] = None,
+        min_up: float = 0.0,
+        min_down: float = 0.0,
+        cooldown: float = 0.0,
     ):
-        self.process = (process or "").lower()
-        self.label = label or process or ""
+        self.process = ""
+        self.label = label or ""
         self.on_enter = on_enter or []
         self.on_exit = on_exit or []
+        self.key = key
         self.active: Optional[bool] = None
+        self.version = 0  # watcher version at which `active` last changed
+        # scheduling: base interval, current (possibly backed-off) interval
+        self.interval = max(0.5, float(interval))
+        self.adaptive = bool(adaptive)
+        self.max_interval = max(self.interval, float(max_interval))
+        self.current_interval = self.interval
+        self.wake_on = {str(k).lower() for k in (wake_on or [])}
+        self._gen = 0
+        # hysteresis: a new state must hold for min_up/min_down seconds, and
+        # transitions are at least cooldown seconds apart
+        self.min_up = max(0.0, float(min_up))
+        self.min_down = max(0.0, float(min_down))
+        self.cooldown = max(0.0, float(cooldown))
+        self._pending: Optional[bool] = None
+        self._pending_since = 0.0
+        self._cooldown_until = 0.0
+        self.recheck_at: Optional[float] = None
+
+    def evaluate(self, sampler: ResourceSampler) -> bool:
+        raise NotImplementedError
+
+    def observe(self, running: bool, now: float) -> Optional[bool]:
+        """Feed a raw observation; return the new state once a transition commits.
+
+        Returns None while the state is unchanged or a change is still
+        settling. In the latter case recheck_at is set to when it may commit.
+        """
+        self.recheck_at = None
+        if self.active is None:
+            self.active = running
+            return None
+        if running == self.active:
+            # flapped back before the change held long enough
+            self._pending = None
+            return None
+        if self._pending != running:
+            self._pending = running
+            self._pending_since = now
+        ready_at = max(
+            self._pending_since + (self.min_up if running else self.min_down),
+            self._cooldown_until,
+        )
+        if now < ready_at:
+            self.recheck_at = ready_at
+            return None
+        self._pending = None
+        self._cooldown_until = now + self.cooldown
+        self.active = running
+        return running
+
+    def next_interval(self, changed: bool) -> float:
+        """Return the delay until the next check, backing off while idle."""
+        if not self.adaptive or changed:
+            self.current_interval = self.interval
+        else:
+            self.current_interval = min(self.current_interval * 2, self.max_interval)
+        return self.current_interval
+
+    def reset_interval(self):
+        self.current_interval = self.interval
+
+
+class ProcessCondition(Condition):
+    """Active while at least min_count matching processes exist.
+
+    Processes match by exact name (process), glob (pattern) or regular
+    expression (regex), all case-insensitive. With cpu_percent and/or rss_mb
+    set, only processes at or above those thresholds count.
+    """
+
+    type = "process_running"
+
+    def __init__(
+        self,
+        process: Optional[str] = None,
+        label: Optional[str] = None,
+        on_enter: Optional[List[Dict[str, Any]]] = None,
+        on_exit: Optional[List[Dict[str, Any]]] = None,
+        pattern: Optional[str] = None,
+        regex: Optional[str] = None,
+        min_count: int = 1,
+        cpu_percent: Optional[float] = None,
+        rss_mb: Optional[float] = None,
+        **kwargs,
+    ):
+        super().__init__(
+            label=label or process or pattern or regex,
+            on_enter=on_enter,
+            on_exit=on_exit,
+            **kwargs,
+        )
+        self.regex: Optional[Pattern] = None
+        if process:
+            self.process = process.lower()
+        elif pattern:
+            self.process = pattern.lower()
+            self.regex = re.compile(_glob_to_regex(self.process))
+        elif regex:
+            self.process = regex
+            self.regex = re.compile(regex, re.IGNORECASE)
+        self.min_count = max(1, int(min_count))
+        self.cpu_percent = None if cpu_percent is None else float(cpu_percent)
+        self.rss_mb = None if rss_mb is None else float(rss_mb)
+        self.needs_sampling = self.cpu_percent is not None or self.rss_mb is not None
+        # pids of matching processes, maintained by the watcher from events
+        self.pids: Set[int] = set()
+
+    def matches(self, name: str) -> bool:
+        if self.regex is None:
+            return name == self.process
+        return self.regex.search(name) is not None
+
+    def is_running(self, index: Optional[Dict[str, Set[int]]] = None) -> bool:
+        """Check process presence against a name index, scanning if none is given.
 
-    def is_running(self) -> bool:
+        Resource thresholds are not applied here; see evaluate().
+        """
         if not self.process:
             return False
-        for p in psutil.process_iter(attrs=["name"]):
-            try:
-                name = (p.info.get("name") or "").lower()
-                if name == self.process:
-                    return True
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        if index is None:
+            index = snapshot_process_names()
+        if self.regex is None:
+            return len(index.get(self.process, ())) >= self.min_count
+        count = sum(len(pids) for name, pids in index.items() if self.matches(name))
+        return count >= self.min_count
+
+    def evaluate(self, sampler: ResourceSampler) -> bool:
+        if len(self.pids) < self.min_count:
+            return False
+        if not self.needs_sampling:
+            return True
+        count = 0
+        for pid in self.pids:
+            sample = sampler.process(pid)
+            if sample is None:
                 continue
+            cpu, rss = sample
+            if self.cpu_percent is not None and cpu < self.cpu_percent:
+                continue
+            if self.rss_mb is not None and rss < self.rss_mb:
+                continue
+            count += 1
+            if count >= self.min_count:
+                return True
         return False
 
 
+class SystemLoadCondition(Condition):
+    """Active while system-wide CPU and/or memory usage is at or above thresholds."""
+
+    type = "system_load"
+    needs_sampling = True
+
+    def __init__(
+        self,
+        cpu_percent: Optional[float] = None,
+        memory_percent: Optional[float] = None,
+        label: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(label=label or "System load", **kwargs)
+        self.cpu_percent = None if cpu_percent is None else float(cpu_percent)
+        self.memory_percent = (
+            None if memory_percent is None else float(memory_percent)
+        )
+        self.process = "system"
+
+    def evaluate(self, sampler: ResourceSampler) -> bool:
+        cpu, mem = sampler.system()
+        if self.cpu_percent is not None and cpu < self.cpu_percent:
+            return False
+        if self.memory_percent is not None and mem < self.memory_percent:
+            return False
+        return True
+
+
+def build_condition(
+    item: Dict[str, Any], default_interval: float = 2.0
+) -> Optional[Condition]:
+    """Build a Condition from a t# config item, or None if it is not one."""
+    if not isinstance(item, dict):
+        return None
+    common = dict(
+        label=item.get("label") or item.get("name"),
+        on_enter=item.get("on_enter", []),
+        on_exit=item.get("on_exit", []),
+        key=item.get("key"),
+        interval=item.get("interval", default_interval),
+        adaptive=item.get("adaptive", False),
+        max_interval=item.get("max_interval", 30.0),
+        wake_on=item.get("wake_on"),
+        min_up=item.get("min_up", 0.0),
+        min_down=item.get("min_down", 0.0),
+        cooldown=item.get("cooldown", 0.0),
+    )
+    ctype = item.get("type")
+    if ctype == "process_running":
+        if not (item.get("process") or item.get("pattern") or item.get("regex")):
+            return None
+        return ProcessCondition(
+            item.get("process"),
+            pattern=item.get("pattern"),
+            regex=item.get("regex"),
+            min_count=item.get("min_count", 1),
+            cpu_percent=item.get("cpu_percent"),
+            rss_mb=item.get("rss_mb"),
+            **common,
+        )
+    if ctype == "system_load":
+        if item.get("cpu_percent") is None and item.get("memory_percent") is None:
+            return None
+        return SystemLoadCondition(
+            cpu_percent=item.get("cpu_percent"),
+            memory_percent=item.get("memory_percent"),
+            **common,
+        )
+    return None
+
+
+def check_conditions(items: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Validate condition t# items at config load; return errors.
+
+    Builds each condition, so bad regexes and non-numeric thresholds or
+    timings are reported with the rest of the config instead of raising
+    from ConditionWatcher.
+    """
+    errors = []
+    for key, item in items.items():
+        try:
+            build_condition(dict(item, key=key))
+        except re.error as e:
+            errors.append(f"{key}: bad regex: {e}")
+        except (TypeError, ValueError) as e:
+            errors.append(f"{key}: {e}")
+    return errors
+
+
 class ConditionWatcher:
-    """Polls for process conditions and fires actions on enter/exit.
+    """Watches conditions and fires actions on enter/exit.
 
     Expected trigger item shape:
       { "type": "process_running", "process": "vrserver.exe",
         "on_enter": [ {action...}, ... ],
-        "on_exit":  [ {action...}, ... ] }
+        "on_exit":  [ {action...}, ... ],
+        "pattern": "vr*.exe",   # instead of process: glob match
+        "regex": "^vr.*",       # instead of process: regex search
+        "min_count": 1,         # optional, N or more matching processes
+        "cpu_percent": 50,      # optional, only processes at/above this CPU%
+        "rss_mb": 500,          # optional, only processes at/above this RSS
+        "interval": 2.0,        # optional, seconds between checks
+        "adaptive": false,      # optional, back off while nothing changes
+        "max_interval": 30.0,   # optional, ceiling for adaptive back-off
+        "wake_on": ["b1"],      # optional, button keys that reset back-off
+        "min_up": 0.0,          # optional, seconds running before on_enter
+        "min_down": 0.0,        # optional, seconds stopped before on_exit
+        "cooldown": 0.0 }       # optional, minimum seconds between transitions
+
+      { "type": "system_load", "cpu_percent": 90, "memory_percent": 80, ... }
+
+    poll_interval is the default interval for items that do not set one.
+    Conditions are kept on a heap of next-due times so slow or backed-off
+    triggers cost nothing between checks. Process names are matched against
+    all conditions through one NameMatcher as pids appear, and CPU/memory
+    figures come from one shared ResourceSampler pass per tick.
+
+    on_enter/on_exit action lists run on a bounded KeyedExecutor keyed by
+    trigger, so slow actions never delay polling and each trigger's actions
+    still run in order. Pass executor to share a pool; executor_stats()
+    exposes queue depth and overflow counters.
+
+    backend selects how process starts/exits are detected (see
+    process_events.create_backend); "auto" uses kernel events on Linux where
+    permitted and falls back to polling. With an event backend, process
+    conditions are re-checked when their process starts or exits instead of
+    on a timer; conditions with resource thresholds are still polled.
+    tracker replaces the psutil-backed ProcessTracker (benchmarks).
     """
 
-    def __init__(self, triggers: List[Dict[str, Any]], poll_interval: float = 2.0):
+    def __init__(
+        self,
+        triggers: List[Dict[str, Any]],
+        poll_interval: float = 2.0,
+        backend: str = "auto",
+        executor: Optional[KeyedExecutor] = None,
+        tracker: Optional[ProcessTracker] = None,
+    ):
         self._stop = Event()
+        self._owns_executor = executor is None
+        self._executor = executor or KeyedExecutor(
+            workers=2, max_pending=64, name="TriggerActions"
+        )
         self._interval = max(0.5, float(poll_interval))
-        self._conds: List[ProcessCondition] = []
+        self._backend_kind = backend
+        self._backend = None
+        self._conds: List[Condition] = []
+        self._tracker = tracker or ProcessTracker()
         for t in triggers or []:
-            if (
-                isinstance(t, dict)
-                and t.get("type") == "process_running"
-                and t.get("process")
-            ):
-                self._conds.append(
-                    ProcessCondition(
-                        t.get("process"),
-                        label=t.get("label") or t.get("name"),
-                        on_enter=t.get("on_enter", []),
-                        on_exit=t.get("on_exit", []),
-                    )
-                )
+            cond = build_condition(t, self._interval)
+            if cond is not None:
+                self._conds.append(cond)
+        self._matcher = NameMatcher(
+            [c for c in self._conds if isinstance(c, ProcessCondition)]
+        )
+        self._tracker.watch(lambda name: bool(self._matcher.match(name)))
+        self._sampler = ResourceSampler()
+        self._heap: List[Tuple[float, int, int, Condition]] = []
+        self._seq = 0
+        self._pokes: deque = deque()
+        self._primed = False
+        self._version = 0
+        self._subscribers: List[Callable[[int, List[Dict[str, Any]]], None]] = []
         self._thread = None
 
     def start(self):
@@ -67,58 +667,221 @@ class ConditionWatcher:
             return
         if self._thread and self._thread.is_alive():
             return
+        self._ensure_backend()
         self._thread = Thread(target=self._run, name="ConditionWatcher", daemon=True)
         self._thread.start()
 
+    def _ensure_backend(self):
+        if self._backend is None:
+            self._backend = create_backend(
+                self._backend_kind,
+                self._tracker,
+                min((c.interval for c in self._conds), default=self._interval),
+                interested=lambda name: bool(self._matcher.match(name)),
+            )
+        return self._backend
+
     def stop(self):
         self._stop.set()
+        if self._backend is not None:
+            self._backend.wake()
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=1.0)
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+        if self._owns_executor:
+            # let queued actions finish in the background
+            self._executor.shutdown(wait=False)
+
+    def executor_stats(self) -> Dict[str, int]:
+        """Queue depth and submitted/completed/failed/overflow counters."""
+        return self._executor.stats()
+
+    @property
+    def backend_name(self) -> Optional[str]:
+        return self._backend.name if self._backend is not None else None
+
+    def poke(self, source: Optional[str] = None):
+        """Re-check conditions soon and reset their back-off.
+
+        source is a button key; only conditions listing it in wake_on are
+        affected. With no source every condition is poked. Thread-safe.
+        """
+        self._pokes.append(source.lower() if source else None)
+        if self._backend is not None:
+            self._backend.wake()
+
+    def _schedule(self, cond: Condition, due: float):
+        cond._gen += 1
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, cond._gen, cond))
 
     def _run(self):
+        backend = self._backend
         while not self._stop.is_set():
-            for cond in self._conds:
+            # sleep until the next condition is due, the backend has news
+            # (event backends) or stop()/poke() wakes us
+            backend.wait(self._tick(backend))
+
+    def run_once(self) -> Optional[float]:
+        """Run one watcher pass on the calling thread without waiting.
+
+        For benchmarks and tooling; do not mix with start(). Returns seconds
+        until the next condition is due, or None if nothing is scheduled.
+        """
+        return self._tick(self._ensure_backend())
+
+    def _tick(self, backend) -> Optional[float]:
+        # with an event backend plain process conditions are driven by events
+        # alone; anything that samples CPU/memory still runs on the heap
+        event_driven = backend.event_driven
+        # one incremental pid diff (or event drain) per tick, shared by
+        # every condition
+        try:
+            events = backend.poll()
+        except Exception as e:
+            print(f"[ConditionWatcher] process scan failed: {e}")
+            return self._interval
+        now = time.monotonic()
+        self._sampler.begin_tick()
+
+        due: List[Condition] = []
+        for ev in events:
+            started = ev.kind == "started"
+            if not started:
+                self._sampler.forget(ev.pid)
+            for c in self._matcher.match(ev.name):
+                if started:
+                    c.pids.add(ev.pid)
+                else:
+                    c.pids.discard(ev.pid)
+                due.append(c)
+        if not self._primed:
+            due = list(self._conds)
+        else:
+            while self._pokes:
+                source = self._pokes.popleft()
+                for c in self._conds:
+                    if source is None or source in c.wake_on:
+                        c.reset_interval()
+                        due.append(c)
+            while self._heap and self._heap[0][0] <= now:
+                _due, _seq, gen, cond = heapq.heappop(self._heap)
+                if gen == cond._gen:
+                    due.append(cond)
+
+        seen = set()
+        for cond in due:
+            if id(cond) in seen:
+                continue
+            seen.add(id(cond))
+            changed = self._evaluate(cond, now)
+            timed = cond.needs_sampling or not event_driven
+            due_at = now + cond.next_interval(changed) if timed else None
+            if cond.recheck_at is not None:
+                # a settling transition needs a look once its dwell ends
+                due_at = min(due_at or cond.recheck_at, cond.recheck_at)
+            if due_at is not None:
+                self._schedule(cond, due_at)
+        self._primed = True
+
+        if self._heap:
+            return max(0.0, self._heap[0][0] - time.monotonic())
+        return None
+
+    def _evaluate(self, cond: Condition, now: float) -> bool:
+        """Update one condition and queue its actions; return True on a transition."""
+        try:
+            before = cond.active
+            state = cond.observe(cond.evaluate(self._sampler), now)
+            if cond.active != before:
+                self._bump(cond)
+            if state is None:
+                return False
+            if state:
+                acts, phase = cond.on_enter, "on_enter"
+            else:
+                acts, phase = cond.on_exit, "on_exit"
+            if acts and not self._executor.submit(
+                cond.key or id(cond), self._run_actions, cond, acts, phase
+            ):
+                print(
+                    f"[ConditionWatcher] action queue full, dropped {phase} for {cond.process}"
+                )
+            return True
+        except Exception as e:
+            print(f"[ConditionWatcher] error: {e}")
+        return False
+
+    @staticmethod
+    def _run_actions(cond: Condition, acts: List[Dict[str, Any]], phase: str):
+        # each action still goes through its backend's serialized queue so
+        # trigger and button actions never overlap on one backend
+        runner = get_action_executor()
+        for act in acts:
+            try:
+                runner.run(act, source=f"{cond.key or cond.process}.{phase}")
+            except Exception as e:
+                print(f"[ConditionWatcher] {phase} failed for {cond.process}: {e}")
+
+    def _bump(self, cond: Condition):
+        self._version += 1
+        cond.version = self._version
+        if self._subscribers:
+            items = [self._describe(cond)]
+            for cb in list(self._subscribers):
                 try:
-                    running = cond.is_running()
-                    if cond.active is None:
-                        cond.active = running
-                    elif running and not cond.active:
-                        # entered
-                        for act in cond.on_enter:
-                            try:
-                                actions.run_action(act)
-                            except Exception as e:
-                                print(
-                                    f"[ConditionWatcher] on_enter failed for {cond.process}: {e}"
-                                )
-                        cond.active = True
-                    elif (not running) and cond.active:
-                        # exited
-                        for act in cond.on_exit:
-                            try:
-                                actions.run_action(act)
-                            except Exception as e:
-                                print(
-                                    f"[ConditionWatcher] on_exit failed for {cond.process}: {e}"
-                                )
-                        cond.active = False
+                    cb(self._version, items)
                 except Exception as e:
-                    print(f"[ConditionWatcher] error: {e}")
-            # wait with stop support
-            self._stop.wait(self._interval)
+                    print(f"[ConditionWatcher] subscriber failed: {e}")
+
+    @property
+    def version(self) -> int:
+        """Monotonically increasing counter, bumped whenever any state changes."""
+        return self._version
+
+    def changed_since(self, version: int) -> Tuple[int, Sequence[Dict[str, Any]]]:
+        """Return (current_version, items changed after `version`).
+
+        Items have the same shape as snapshot() entries. When nothing changed
+        this returns the same empty tuple and allocates nothing new.
+        """
+        current = self._version
+        if version >= current:
+            return current, _NO_CHANGES
+        return current, [self._describe(c) for c in self._conds if c.version > version]
+
+    def subscribe(
+        self, callback: Callable[[int, List[Dict[str, Any]]], None]
+    ) -> Callable[[], None]:
+        """Call callback(version, changed_items) on every change.
+
+        Callbacks run on the watcher thread. Returns an unsubscribe function.
+        """
+        self._subscribers.append(callback)
+
+        def _unsubscribe():
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return _unsubscribe
+
+    @staticmethod
+    def _describe(c: Condition) -> Dict[str, Any]:
+        return {
+            "key": c.key,
+            "type": c.type,
+            "label": c.label,
+            "process": c.process,
+            "active": c.active,
+            "version": c.version,
+        }
 
     def snapshot(self) -> List[Dict[str, Any]]:
         """Return a simple snapshot of current conditions for UI rendering.
 
-        Each item contains: {"label": str, "process": str, "active": Optional[bool]}
+        Each item contains: {"key": Optional[str], "type": str, "label": str,
+        "process": str, "active": Optional[bool], "version": int}
         """
-        out: List[Dict[str, Any]] = []
-        for c in self._conds:
-            out.append(
-                {
-                    "label": c.label,
-                    "process": c.process,
-                    "active": c.active,
-                }
-            )
-        return out
+        return [self._describe(c) for c in self._conds]
@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import time
+from threading import Condition, Lock, Thread
+from typing import Callable, List, Optional, Tuple
+
+
+class TimerHandle:
+    """A scheduled call; pass to Scheduler.cancel() to drop it."""
+
+    __slots__ = ("when", "fn", "args", "cancelled")
+
+    def __init__(self, when: float, fn: Callable, args: tuple):
+        self.when = when
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+
+class Scheduler:
+    """One timer thread driven by a min-heap of due times (time.monotonic()).
+
+    Callbacks run on the scheduler thread and should be quick, typically
+    handing work to an executor. Nothing runs between due times, however
+    many calls are pending.
+    """
+
+    def __init__(self, name: str = "Scheduler"):
+        self._name = name
+        self._cv = Condition()
+        self._heap: List[Tuple[float, int, TimerHandle]] = []
+        self._seq = itertools.count()
+        self._thread: Optional[Thread] = None
+        self._stopped = False
+
+    def call_at(self, when: float, fn: Callable, *args) -> TimerHandle:
+        """Run fn(*args) at monotonic time `when`."""
+        handle = TimerHandle(when, fn, args)
+        with self._cv:
+            if self._stopped:
+                raise RuntimeError(f"{self._name} is stopped")
+            heapq.heappush(self._heap, (when, next(self._seq), handle))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is handle:
+                # new earliest entry; re-arm the wait
+                self._cv.notify()
+        return handle
+
+    def call_later(self, delay: float, fn: Callable, *args) -> TimerHandle:
+        """Run fn(*args) after `delay` seconds."""
+        return self.call_at(time.monotonic() + max(0.0, delay), fn, *args)
+
+    def cancel(self, handle: TimerHandle):
+        handle.cancelled = True
+
+    def pending(self) -> int:
+        with self._cv:
+            return sum(1 for _w, _s, h in self._heap if not h.cancelled)
+
+    def stop(self):
+        with self._cv:
+            self._stopped = True
+            self._heap.clear()
+            self._cv.notify()
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    if self._stopped:
+                        return
+                    if not self._heap:
+                        self._cv.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cv.wait(delay)
+                _when, _seq, handle = heapq.heappop(self._heap)
+            if handle.cancelled:
+                continue
+            try:
+                handle.fn(*handle.args)
+            except Exception as e:
+                print(f"[{self._name}] scheduled call failed: {e}")
+
+
+_default_scheduler: Optional[Scheduler] = None
+_default_lock = Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Return the process-wide Scheduler, creating it on first use."""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_lock:
+            if _default_scheduler is None:
+                _default_scheduler = Scheduler()
+    return _default_scheduler
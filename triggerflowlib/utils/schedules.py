@@ -0,0 +1,388 @@
+"""Time-based triggers: one-shot `at`, fixed `every` intervals and `cron`.
+
+All entries share the process-wide Scheduler (one thread, one min-heap of
+due times), so any number of schedules cost nothing between fires. Wall
+clock entries (`at`, `cron`) re-check the wall clock when they wake and
+never sleep longer than RESYNC_INTERVAL, so clock changes and suspend/resume
+are picked up; missed fires are collapsed into one. `every` entries run on
+the monotonic clock like the Scheduler, so wall clock jumps don't move them.
+"""
+
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from triggerflowlib.utils.executor import KeyedExecutor, get_action_executor
+from triggerflowlib.utils.scheduler import Scheduler, TimerHandle, get_scheduler
+
+# longest single sleep for wall clock entries before re-checking the clock
+RESYNC_INTERVAL = 300.0
+
+_NO_CHANGES: Tuple = ()
+
+_CRON_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+_MONTHS = "jan feb mar apr may jun jul aug sep oct nov dec".split()
+_WEEKDAYS = "sun mon tue wed thu fri sat".split()
+
+
+def _cron_value(text: str, names: Sequence[str], offset: int) -> int:
+    lowered = text.lower()
+    if lowered in names:
+        return names.index(lowered) + offset
+    return int(text)
+
+
+def _parse_cron_field(
+    text: str, lo: int, hi: int, names: Sequence[str] = (), offset: int = 0
+) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"bad step in {text!r}")
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = _cron_value(a, names, offset), _cron_value(b, names, offset)
+        else:
+            start = _cron_value(part, names, offset)
+            end = hi if step > 1 else start
+        if start < lo or end > hi or start > end:
+            raise ValueError(f"{text!r} is outside {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpr:
+    """Standard 5-field cron expression (minute hour day month weekday).
+
+    Supports *, lists, ranges, steps, month/day names and the @daily style
+    aliases. As in cron, when both day-of-month and weekday are restricted
+    a day matching either fires. Times are local.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        fields = _CRON_ALIASES.get(expr.strip().lower(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron needs 5 fields, got {expr!r}")
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12, _MONTHS, 1)
+        weekdays = _parse_cron_field(fields[4], 0, 7, _WEEKDAYS)
+        # cron weekday 0 and 7 are Sunday
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+        if self.next_after(datetime(2000, 1, 1)) is None:
+            raise ValueError(f"cron {expr!r} never fires")
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, dt: datetime) -> Optional[datetime]:
+        """First matching minute strictly after dt (None if none in 8 years)."""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 8)
+        while t <= limit:
+            if t.month not in self.months:
+                if t.month == 12:
+                    t = t.replace(year=t.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    t = t.replace(month=t.month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        return None
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)\s*(ms|s|m|h|d)", re.IGNORECASE)
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0}
+
+
+def parse_duration(value: Any) -> float:
+    """Seconds from a number or a string like "90", "30s", "5m", "1h30m"."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    total, pos = 0.0, 0
+    for m in _DURATION.finditer(text):
+        if text[pos : m.start()].strip():
+            break
+        total += float(m.group(1)) * _UNITS[m.group(2).lower()]
+        pos = m.end()
+    if pos == 0 or text[pos:].strip():
+        raise ValueError(f"bad duration {value!r}")
+    return total
+
+
+def parse_at(value: Any, now: datetime) -> datetime:
+    """A one-shot time: ISO date-time, or "HH:MM[:SS]" meaning its next occurrence."""
+    text = str(value).strip()
+    if re.fullmatch(r"\d{1,2}:\d{2}(:\d{2})?", text):
+        parts = [int(p) for p in text.split(":")]
+        target = now.replace(
+            hour=parts[0],
+            minute=parts[1],
+            second=parts[2] if len(parts) > 2 else 0,
+            microsecond=0,
+        )
+        if target <= now:
+            target += timedelta(days=1)
+        return target
+    return datetime.fromisoformat(text)
+
+
+class ScheduleEntry:
+    """One `type: schedule` trigger and its next fire time."""
+
+    type = "schedule"
+
+    def __init__(
+        self,
+        key: Optional[str] = None,
+        label: Optional[str] = None,
+        on_fire: Optional[List[Any]] = None,
+        at: Any = None,
+        every: Any = None,
+        cron: Optional[str] = None,
+    ):
+        if sum(v is not None for v in (at, every, cron)) != 1:
+            raise ValueError("schedule needs exactly one of 'at', 'every' or 'cron'")
+        self.key = key
+        self.on_fire = on_fire or []
+        self.at: Optional[datetime] = None
+        self.every: Optional[float] = None
+        self.cron: Optional[CronExpr] = None
+        if at is not None:
+            self.at = parse_at(at, datetime.now())
+            self.kind, spec = "at", str(at)
+        elif every is not None:
+            self.every = parse_duration(every)
+            if self.every < 0.1:
+                raise ValueError("'every' must be at least 0.1 seconds")
+            self.kind, spec = "every", str(every)
+        else:
+            self.cron = CronExpr(str(cron))
+            self.kind, spec = "cron", str(cron)
+        self.label = label or f"{self.kind} {spec}"
+        self.next_wall: Optional[float] = None  # epoch seconds of the next fire
+        self.next_mono: Optional[float] = None  # `every`: monotonic next fire
+        self.fired = 0
+        self.version = 0
+        self.handle: Optional[TimerHandle] = None
+
+    def advance(
+        self, now_wall: float, now_mono: Optional[float] = None
+    ) -> Optional[float]:
+        """Set and return the next fire time (epoch) after now; None when done."""
+        if self.every is not None:
+            # keep a steady cadence; after a long stall restart from now
+            if now_mono is None:
+                now_mono = time.monotonic()
+            last = self.next_mono
+            if last is None or now_mono - last >= self.every:
+                last = now_mono
+            self.next_mono = last + self.every
+            self.next_wall = now_wall + (self.next_mono - now_mono)  # for display
+        elif self.cron is not None:
+            nxt = self.cron.next_after(datetime.fromtimestamp(now_wall))
+            self.next_wall = nxt.timestamp() if nxt is not None else None
+        elif self.fired == 0 and self.at is not None:
+            target = self.at.timestamp()
+            self.next_wall = target if target > now_wall else None
+        else:
+            self.next_wall = None
+        return self.next_wall
+
+
+def build_schedule(item: Dict[str, Any]) -> Optional[ScheduleEntry]:
+    """Build a ScheduleEntry from a `type: schedule` t# item, else None.
+
+    Raises ValueError for a malformed schedule.
+    """
+    if not isinstance(item, dict) or item.get("type") != "schedule":
+        return None
+    return ScheduleEntry(
+        key=item.get("key"),
+        label=item.get("label") or item.get("name"),
+        on_fire=item.get("on_fire", []),
+        at=item.get("at"),
+        every=item.get("every"),
+        cron=item.get("cron"),
+    )
+
+
+def check_schedules(items: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Validate `type: schedule` t# items at config load; return errors.
+
+    Catches what ScheduleEntry rejects (bad cron, duration or date, not
+    exactly one of at/every/cron) and one-shot `at` times already past.
+    """
+    errors = []
+    now = time.time()
+    for key, item in items.items():
+        try:
+            entry = build_schedule(dict(item, key=key))
+            if entry is not None and entry.advance(now) is None:
+                raise ValueError(f"'at' time {item.get('at')} is in the past")
+        except ValueError as e:
+            errors.append(f"{key}: {e}")
+    return errors
+
+
+class ScheduleWatcher:
+    """Fires `on_fire` action lists for schedule triggers.
+
+    Expected trigger item shape (exactly one of at/every/cron):
+      { "type": "schedule",
+        "at": "2025-12-31T23:59:00",   # or "20:00" = next 8 pm, once
+        "every": "15m",                # or seconds: 900
+        "cron": "*/30 9-17 * * mon-fri",
+        "on_fire": [ {action...}, ... ] }
+
+    Items are checked by compile_config (check_schedules); a malformed one
+    raises ValueError here. Entries share one Scheduler thread; on_fire lists run on a bounded
+    KeyedExecutor keyed by trigger, and each action goes through its
+    backend's queue like button and process-trigger actions.
+    """
+
+    def __init__(
+        self,
+        triggers: List[Dict[str, Any]],
+        scheduler: Optional[Scheduler] = None,
+        executor: Optional[KeyedExecutor] = None,
+    ):
+        self._scheduler = scheduler or get_scheduler()
+        self._owns_executor = executor is None
+        self._executor = executor or KeyedExecutor(
+            workers=2, max_pending=64, name="ScheduleActions"
+        )
+        self._entries: List[ScheduleEntry] = []
+        for t in triggers or []:
+            entry = build_schedule(t)
+            if entry is not None:
+                self._entries.append(entry)
+        self._version = 0
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        now = time.time()
+        for entry in self._entries:
+            if entry.advance(now) is None:
+                print(f"[ScheduleWatcher] {entry.label}: time is in the past")
+            self._arm(entry)
+            self._bump(entry)
+
+    def stop(self):
+        self._started = False
+        for entry in self._entries:
+            if entry.handle is not None:
+                self._scheduler.cancel(entry.handle)
+                entry.handle = None
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def _arm(self, entry: ScheduleEntry):
+        if entry.next_wall is None or not self._started:
+            entry.handle = None
+            return
+        if entry.next_mono is not None:
+            entry.handle = self._scheduler.call_at(entry.next_mono, self._wake, entry)
+            return
+        delay = min(max(0.0, entry.next_wall - time.time()), RESYNC_INTERVAL)
+        entry.handle = self._scheduler.call_later(delay, self._wake, entry)
+
+    def _wake(self, entry: ScheduleEntry):
+        # scheduler thread: keep this quick
+        if not self._started or entry.next_wall is None:
+            return
+        now = time.time()
+        if now < entry.next_wall - 0.05 and entry.every is None:
+            # woke early (resync or clock change); sleep the rest
+            self._arm(entry)
+            return
+        entry.fired += 1
+        if entry.on_fire and not self._executor.submit(
+            entry.key or id(entry), self._run_actions, entry
+        ):
+            print(f"[ScheduleWatcher] action queue full, dropped {entry.label}")
+        entry.advance(now)
+        self._arm(entry)
+        self._bump(entry)
+
+    @staticmethod
+    def _run_actions(entry: ScheduleEntry):
+        runner = get_action_executor()
+        source = f"{entry.key or entry.label}.on_fire"
+        for act in entry.on_fire:
+            try:
+                runner.run(act, source=source)
+            except Exception as e:
+                print(f"[ScheduleWatcher] on_fire failed for {entry.label}: {e}")
+
+    def _bump(self, entry: ScheduleEntry):
+        self._version += 1
+        entry.version = self._version
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever any entry fires or is rescheduled."""
+        return self._version
+
+    def changed_since(self, version: int) -> Tuple[int, Sequence[Dict[str, Any]]]:
+        """Return (current_version, entries changed after `version`)."""
+        current = self._version
+        if version >= current:
+            return current, _NO_CHANGES
+        return current, [
+            self._describe(e) for e in self._entries if e.version > version
+        ]
+
+    @staticmethod
+    def _describe(e: ScheduleEntry) -> Dict[str, Any]:
+        return {
+            "key": e.key,
+            "type": e.type,
+            "label": e.label,
+            "kind": e.kind,
+            "next_fire": e.next_wall,
+            "fired": e.fired,
+            "version": e.version,
+        }
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Each item: key, type, label, kind, next_fire (epoch or None), fired."""
+        return [self._describe(e) for e in self._entries]
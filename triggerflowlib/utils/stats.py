@@ -0,0 +1,184 @@
+"""Low-overhead latency histograms for actions, backends and plugin calls.
+
+Samples are grouped by kind ("action" per action type, "backend" per
+backend, "plugin" per named plugin call such as "voicemeeter.login") and
+kept in log-spaced buckets about 10% wide. Recording a sample costs one
+log() and a dict increment. Read the data with snapshot(), write it with
+dump_json(), or call start_periodic_dump() to write a JSON file regularly.
+"""
+
+import json
+import math
+import os
+import time
+from functools import wraps
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict
+
+_MIN_SECONDS = 1e-6
+_GROWTH = 1.1
+_LOG_GROWTH = math.log(_GROWTH)
+
+
+class Histogram:
+    """Log-bucketed latency histogram with count, error count and max."""
+
+    __slots__ = ("buckets", "count", "errors", "total", "max")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float, error: bool = False):
+        if seconds <= _MIN_SECONDS:
+            b = 0
+        else:
+            b = int(math.log(seconds / _MIN_SECONDS) / _LOG_GROWTH) + 1
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-quantile (0..1) in seconds, within one bucket width."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= target:
+                return min(_MIN_SECONDS * _GROWTH**b, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        ms = 1000.0
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": (self.total / self.count * ms) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * ms,
+            "p95_ms": self.percentile(0.95) * ms,
+            "p99_ms": self.percentile(0.99) * ms,
+            "max_ms": self.max * ms,
+        }
+
+
+_lock = Lock()
+_histograms: Dict[str, Dict[str, Histogram]] = {}
+
+
+def record(kind: str, name: str, seconds: float, error: bool = False):
+    """Add one latency sample for `name` under `kind`."""
+    with _lock:
+        group = _histograms.get(kind)
+        if group is None:
+            group = _histograms[kind] = {}
+        hist = group.get(name)
+        if hist is None:
+            hist = group[name] = Histogram()
+        hist.add(seconds, error)
+
+
+def record_action(atype: str, backend: str, seconds: float, error: bool = False):
+    """Record one action run under both its action type and its backend."""
+    record("action", atype, seconds, error)
+    record("backend", backend, seconds, error)
+
+
+class timer:
+    """Context manager that records the time spent in its block.
+
+    Exceptions are counted as errors; set `.error = True` inside the block to
+    flag a failure that was handled without raising.
+    """
+
+    __slots__ = ("kind", "name", "error", "_start")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.error = False
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, _exc, _tb):
+        record(
+            self.kind,
+            self.name,
+            time.perf_counter() - self._start,
+            self.error or exc_type is not None,
+        )
+        return False
+
+
+def instrument(name: str, kind: str = "plugin") -> Callable:
+    """Decorator recording every call of the wrapped function as `name`."""
+
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                record(kind, name, time.perf_counter() - start, True)
+                raise
+            record(kind, name, time.perf_counter() - start)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def snapshot() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Return {kind: {name: summary}} with count, errors, mean/p50/p95/p99/max ms."""
+    with _lock:
+        return {
+            kind: {name: h.summary() for name, h in group.items()}
+            for kind, group in _histograms.items()
+        }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def dump_json(path: str):
+    """Write snapshot() plus a timestamp to `path` (atomically replaced)."""
+    data = {"timestamp": time.time(), "stats": snapshot()}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def start_periodic_dump(path: str, interval: float = 60.0) -> Callable[[], None]:
+    """Dump stats to `path` every `interval` seconds on a daemon thread.
+
+    The file write stays off the shared scheduler, whose thread also runs
+    action delays and the Voicemeeter poll. Returns a function that stops
+    the dumps.
+    """
+    interval = max(1.0, float(interval))
+    stopped = Event()
+
+    def _run():
+        while not stopped.wait(interval):
+            try:
+                dump_json(path)
+            except OSError as e:
+                print(f"[stats] dump to {path} failed: {e}")
+
+    Thread(target=_run, name="StatsDump", daemon=True).start()
+    return stopped.set